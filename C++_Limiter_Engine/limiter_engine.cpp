@@ -4,6 +4,12 @@
 #include <mutex>
 #include <chrono>
 #include <map>
+#include <set>
+#include <queue>
+#include <condition_variable>
+#include <functional>
+#include <algorithm>
+#include <cmath>
 
 // --- Function Pointer Typedefs for the NT API ---
 typedef LONG (NTAPI *pNtSuspendProcess)(IN HANDLE ProcessHandle);
@@ -16,17 +22,80 @@ static pNtResumeProcess g_NtResumeProcess = nullptr;
 struct ProcessInfo {
     DWORD pid;
     HANDLE hProcess;
+    HANDLE hExitWait = NULL; // Thread-pool wait that fires when the process exits
+    int limit_percentage;
+    double cycle_ms;
     double suspend_ms;
     double resume_ms;
     bool is_suspended = false;
+    double phase = 0; // Where in the cycle the process suspends, as a fraction of cycle_ms
     std::chrono::steady_clock::time_point next_state_change_time;
+    unsigned long long generation = 0; // Bumped on every reschedule; stale heap items are skipped
+    // Stats
+    std::chrono::steady_clock::time_point added_at, last_change, suspended_at;
+    unsigned long long cycles = 0;
+    double suspended_total_ms = 0;
+    unsigned int failed_suspends = 0;
+};
+
+// --- Stats structs returned to Python (mirrored by ctypes Structures in windows.py) ---
+struct ProcessStats {
+    DWORD pid;
+    int limit_percentage;
+    double period_ms;
+    unsigned long long cycles;
+    double suspended_ms;
+    unsigned int failed_suspends;
+    double since_last_change_ms;
+    double configured_duty;
+    double measured_duty;
+};
+
+struct EngineStats {
+    int managed;
+    unsigned long long ticks;
+    double lateness_avg_ms;
+    double lateness_p99_ms;
+    double lock_hold_avg_us;
+    double lock_hold_max_us;
+    unsigned long long failed_suspends;
+};
+
+// One entry of the deadline heap. Only the newest item of a process (matching
+// `generation`) is live; anything older was superseded by a modify/remove.
+struct ScheduleItem {
+    std::chrono::steady_clock::time_point when;
+    DWORD pid;
+    unsigned long long generation;
+    bool operator>(const ScheduleItem& other) const { return when > other.when; }
 };
 
 static std::map<DWORD, ProcessInfo> g_managed_processes;
-static std::mutex g_mutex;
+static std::priority_queue<ScheduleItem, std::vector<ScheduleItem>, std::greater<ScheduleItem>> g_schedule;
+static std::vector<DWORD> g_exited_pids; // Filled by the exit wait callbacks
+static unsigned long long g_next_generation = 1;
+static double g_default_cycle_ms = 200.0; // Period used when the caller doesn't pass one
+// Phase staggering: the n-th process added suspends at frac(n * 0.618...) of its cycle, measured
+// from g_epoch, so suspend windows interleave instead of every process switching in lockstep.
+static const double GOLDEN_RATIO_CONJUGATE = 0.6180339887498949;
+static unsigned long long g_phase_slot = 0;
+static std::chrono::steady_clock::time_point g_epoch = std::chrono::steady_clock::now();
+static std::mutex g_mutex; // Guards the managed set, the schedule and the stats
+static std::mutex g_cmd_mutex; // Guards g_commands, g_exited_pids, g_should_stop and g_default_cycle_ms
+static std::condition_variable g_wakeup; // Used with g_cmd_mutex
 static bool g_should_stop = false;
 static std::thread g_manager_thread;
 
+// Engine-wide stats (guarded by g_mutex)
+static const int LATENESS_WINDOW = 1024; // Latest lateness samples kept for the p99
+static double g_lateness_ms[LATENESS_WINDOW];
+static unsigned long long g_lateness_count = 0;
+static double g_lateness_sum_ms = 0;
+static unsigned long long g_ticks = 0;
+static double g_lock_hold_sum_us = 0;
+static double g_lock_hold_max_us = 0;
+static unsigned long long g_failed_suspends = 0;
+
 // --- Helper Functions ---
 BOOL EnableDebugPrivilege() {
     HANDLE hToken;
@@ -42,7 +111,61 @@ BOOL EnableDebugPrivilege() {
     return result;
 }
 
+void schedule(ProcessInfo& info, std::chrono::steady_clock::time_point when) {
+    info.next_state_change_time = when;
+    info.generation = g_next_generation++;
+    g_schedule.push({when, info.pid, info.generation});
+}
+
+std::chrono::steady_clock::time_point after_epoch(double ms) {
+    return g_epoch + std::chrono::microseconds(std::llround(ms * 1000.0));
+}
+
+// The first moment from `now` on when the process is at its phase of the cycle. It is taken
+// from a grid anchored at g_epoch rather than computed from `now`, so processes sharing a
+// phase and period (the members of a group) get exactly the same deadlines, whenever they
+// were added, and are switched in the same tick.
+std::chrono::steady_clock::time_point next_suspend_time(const ProcessInfo& info, std::chrono::steady_clock::time_point now) {
+    double into_ms = std::chrono::duration<double, std::milli>(now - g_epoch).count();
+    double cycle = std::ceil(into_ms / info.cycle_ms - info.phase);
+    return after_epoch((cycle + info.phase) * info.cycle_ms);
+}
+
+// When a process suspended at the deadline `suspended_at` resumes. It always runs for
+// `resume_ms` before the next deadline, even when the suspend fills the whole cycle.
+std::chrono::steady_clock::time_point resume_time(const ProcessInfo& info, std::chrono::steady_clock::time_point suspended_at) {
+    double at_ms = std::chrono::duration<double, std::milli>(suspended_at - g_epoch).count();
+    return after_epoch(at_ms + std::min(info.suspend_ms, info.cycle_ms - info.resume_ms));
+}
+
+// Runs on a thread-pool thread when a managed process exits. Instead of the
+// manager polling GetExitCodeProcess for every process on every tick, it is
+// woken up here and only touches the processes that actually exited.
+VOID CALLBACK on_process_exit(PVOID context, BOOLEAN /*timed_out*/) {
+    std::lock_guard<std::mutex> lock(g_cmd_mutex);
+    g_exited_pids.push_back(static_cast<DWORD>(reinterpret_cast<ULONG_PTR>(context)));
+    g_wakeup.notify_one();
+}
+
+double elapsed_ms(std::chrono::steady_clock::time_point from, std::chrono::steady_clock::time_point to) {
+    return std::chrono::duration<double, std::milli>(to - from).count();
+}
+
+void mark_resumed(ProcessInfo& info, std::chrono::steady_clock::time_point now) {
+    if (info.is_suspended) {
+        info.suspended_total_ms += elapsed_ms(info.suspended_at, now);
+        info.cycles++;
+    }
+    info.is_suspended = false;
+    info.last_change = now;
+}
+
 void cleanup_and_resume_process(ProcessInfo& info) {
+    if (info.hExitWait) {
+        // Non-blocking unregister: a callback already running only queues the PID, which is then ignored.
+        UnregisterWaitEx(info.hExitWait, NULL);
+        info.hExitWait = NULL;
+    }
     if (info.hProcess) {
         if (g_NtResumeProcess && info.is_suspended) { // Only resume if we know it was suspended
             g_NtResumeProcess(info.hProcess);
@@ -52,66 +175,248 @@ void cleanup_and_resume_process(ProcessInfo& info) {
     }
 }
 
+// --- Commands: the control plane never touches the managed set directly ---
+// Exported calls only append a command under g_cmd_mutex (opening the process handle,
+// if needed, before taking it), so they never wait for the manager's system calls.
+// The manager thread applies the queued commands at the start of its next tick.
+enum class CommandKind { Add, Modify, Remove };
+
+struct Command {
+    CommandKind kind;
+    DWORD pid;
+    int limit_percentage;
+    double period_ms; // Add: already resolved. Modify: <= 0 keeps the current period.
+    HANDLE hProcess;  // Add only
+    double phase = -1; // Add only: a phase from ReservePhase() (group members), or < 0 for the next free one
+};
+
+// One suspend/resume call (or cleanup) for the manager to make after releasing g_mutex.
+enum class OpKind { Suspend, Resume, Cleanup };
+
+struct Op {
+    OpKind kind;
+    DWORD pid;
+    HANDLE hProcess;
+    ProcessInfo released; // Cleanup only: the entry that was removed from the managed set
+};
+
+static std::vector<Command> g_commands;
+
+void push_command(const Command& command) {
+    std::lock_guard<std::mutex> lock(g_cmd_mutex);
+    g_commands.push_back(command);
+    g_wakeup.notify_one();
+}
+
+// Moves an entry out of the managed set; its handles are released by a Cleanup op.
+void release_locked(std::map<DWORD, ProcessInfo>::iterator it, std::vector<Op>& ops) {
+    Op op{OpKind::Cleanup, it->first, it->second.hProcess};
+    op.released = it->second;
+    g_managed_processes.erase(it);
+    ops.push_back(op);
+}
+
+// --- Control-plane helpers (caller must hold g_mutex; system calls are queued in `ops`) ---
+void set_duty_cycle(ProcessInfo& info, int limit_percentage, double cycle_time_ms) {
+    if (cycle_time_ms < 2) cycle_time_ms = 2;
+    info.limit_percentage = limit_percentage;
+    info.cycle_ms = cycle_time_ms;
+    info.suspend_ms = cycle_time_ms * (limit_percentage / 100.0);
+    info.resume_ms = cycle_time_ms - info.suspend_ms;
+    if (info.resume_ms < 1) info.resume_ms = 1;
+    if (info.suspend_ms < 1) info.suspend_ms = 1;
+}
+
+// Spreads processes over the cycle: the n-th phase is frac(n * 0.618...). Caller must hold g_mutex.
+double next_phase_locked() {
+    return std::fmod(static_cast<double>(g_phase_slot++) * GOLDEN_RATIO_CONJUGATE, 1.0);
+}
+
+// `now` is shared by every command applied in one tick, so group members added or modified
+// together land on the same cycle of the grid.
+void add_process_locked(DWORD pid, HANDLE hProcess, int limit_percentage, double period_ms, double phase,
+                        std::chrono::steady_clock::time_point now, std::vector<Op>& ops) {
+    if (g_managed_processes.count(pid)) {
+        ProcessInfo duplicate;
+        duplicate.hProcess = hProcess;
+        Op op{OpKind::Cleanup, pid, hProcess};
+        op.released = duplicate;
+        ops.push_back(op);
+        return;
+    }
+    ProcessInfo info;
+    info.pid = pid;
+    info.hProcess = hProcess;
+    set_duty_cycle(info, limit_percentage, period_ms);
+    info.is_suspended = false;
+    info.phase = phase >= 0 ? phase : next_phase_locked();
+    info.added_at = info.last_change = info.suspended_at = now;
+
+    ProcessInfo& stored = g_managed_processes[pid];
+    stored = info;
+    // Only registers a wait with the thread pool; the callback runs later and takes g_cmd_mutex.
+    RegisterWaitForSingleObject(&stored.hExitWait, hProcess, on_process_exit,
+                                reinterpret_cast<PVOID>(static_cast<ULONG_PTR>(pid)),
+                                INFINITE, WT_EXECUTEONLYONCE);
+    schedule(stored, next_suspend_time(stored, now));
+}
+
+// `period_ms <= 0` keeps the process's current period.
+void modify_process_locked(DWORD pid, int new_limit_percentage, double period_ms, std::chrono::steady_clock::time_point now, std::vector<Op>& ops) {
+    auto it = g_managed_processes.find(pid);
+    if (it == g_managed_processes.end()) return;
+    ProcessInfo& info = it->second;
+
+    set_duty_cycle(info, new_limit_percentage, period_ms > 0 ? period_ms : info.cycle_ms);
+
+    // Apply the new limit from the next cycle. The process keeps its phase, so limits
+    // changed in one batch don't line the processes up again.
+    if (info.is_suspended) {
+        ops.push_back({OpKind::Resume, pid, info.hProcess});
+        mark_resumed(info, now);
+    }
+    schedule(info, next_suspend_time(info, now));
+}
+
+void remove_process_locked(DWORD pid, std::vector<Op>& ops) {
+    auto it = g_managed_processes.find(pid);
+    if (it != g_managed_processes.end()) release_locked(it, ops);
+}
+
+void apply_command_locked(const Command& command, std::chrono::steady_clock::time_point now, std::vector<Op>& ops) {
+    switch (command.kind) {
+        case CommandKind::Add: add_process_locked(command.pid, command.hProcess, command.limit_percentage, command.period_ms, command.phase, now, ops); break;
+        case CommandKind::Modify: modify_process_locked(command.pid, command.limit_percentage, command.period_ms, now, ops); break;
+        case CommandKind::Remove: remove_process_locked(command.pid, ops); break;
+    }
+}
+
+// Makes the queued calls, in order, without holding any lock. Returns the suspends that failed.
+std::vector<Op> execute(std::vector<Op>& ops) {
+    std::vector<Op> failed;
+    for (Op& op : ops) {
+        switch (op.kind) {
+            case OpKind::Suspend:
+                if (g_NtSuspendProcess(op.hProcess) != 0) failed.push_back(op); // 0 is STATUS_SUCCESS
+                break;
+            case OpKind::Resume:
+                g_NtResumeProcess(op.hProcess);
+                break;
+            case OpKind::Cleanup:
+                cleanup_and_resume_process(op.released);
+                break;
+        }
+    }
+    return failed;
+}
+
+// `period_ms <= 0` means "use the default period".
+void queue_add(DWORD pid, int limit_percentage, double period_ms) {
+    // *** FIX: Request PROCESS_ALL_ACCESS for the best chance of success ***
+    HANDLE hProcess = OpenProcess(PROCESS_ALL_ACCESS, FALSE, pid);
+    if (!hProcess) return;
+    std::lock_guard<std::mutex> lock(g_cmd_mutex);
+    g_commands.push_back({CommandKind::Add, pid, limit_percentage, period_ms > 0 ? period_ms : g_default_cycle_ms, hProcess});
+    g_wakeup.notify_one();
+}
+
 // --- The Core Limiter Thread ---
 void manager_loop() {
     using namespace std::chrono;
     timeBeginPeriod(1);
 
-    while (!g_should_stop) {
-        auto now = steady_clock::now();
-        steady_clock::time_point next_wakeup = now + milliseconds(500);
-        std::vector<DWORD> pids_to_remove;
-
-        std::unique_lock<std::mutex> lock(g_mutex);
-
-        if (g_managed_processes.empty()) {
-            lock.unlock(); Sleep(100); continue;
-        }
+    std::vector<Command> commands;
+    std::vector<DWORD> exited;
+    std::vector<Op> ops;
+    while (true) {
+        ops.clear();
+        double held_us;
+        {
+            // The state lock is taken before the command queue is swapped, so readers holding
+            // it always see a command either still queued or already applied.
+            std::lock_guard<std::mutex> state(g_mutex);
+            auto acquired = steady_clock::now();
+            {
+                std::lock_guard<std::mutex> queue(g_cmd_mutex);
+                if (g_should_stop) break;
+                commands.swap(g_commands);
+                exited.swap(g_exited_pids);
+            }
+            // 1. Apply the control calls made since the last wakeup.
+            for (const Command& command : commands) apply_command_locked(command, acquired, ops);
+            commands.clear();
 
-        for (auto& pair : g_managed_processes) {
-            ProcessInfo& info = pair.second;
-            
-            DWORD exit_code;
-            if (!GetExitCodeProcess(info.hProcess, &exit_code) || exit_code != STILL_ACTIVE) {
-                pids_to_remove.push_back(info.pid);
-                continue;
+            // 2. Drop processes whose exit was signalled since the last wakeup.
+            for (DWORD pid : exited) {
+                auto it = g_managed_processes.find(pid);
+                // The PID may have been removed and re-added meanwhile; only drop it if this handle really exited.
+                if (it != g_managed_processes.end() && WaitForSingleObject(it->second.hProcess, 0) == WAIT_OBJECT_0) {
+                    release_locked(it, ops);
+                }
             }
+            exited.clear();
+
+            // 3. Advance the processes whose state change is due, queuing their calls.
+            auto now = steady_clock::now();
+            while (!g_schedule.empty() && g_schedule.top().when <= now) {
+                ScheduleItem item = g_schedule.top();
+                g_schedule.pop();
+                auto it = g_managed_processes.find(item.pid);
+                if (it == g_managed_processes.end() || it->second.generation != item.generation) continue;
+                ProcessInfo& info = it->second;
+                double lateness = elapsed_ms(item.when, now);
+                g_lateness_ms[g_lateness_count % LATENESS_WINDOW] = lateness;
+                g_lateness_count++;
+                g_lateness_sum_ms += lateness;
 
-            if (now >= info.next_state_change_time) {
+                // Deadlines come from the phase grid, not from `now`, so being late never shifts the cycle.
                 if (info.is_suspended) { // Time to RESUME
-                    if (g_NtResumeProcess(info.hProcess) == 0) { // 0 is STATUS_SUCCESS
-                        info.is_suspended = false;
-                    }
-                    info.next_state_change_time = now + milliseconds(static_cast<long long>(info.resume_ms));
+                    ops.push_back({OpKind::Resume, info.pid, info.hProcess});
+                    mark_resumed(info, now);
+                    schedule(info, next_suspend_time(info, now));
                 } else { // Time to SUSPEND
-                    if (g_NtSuspendProcess(info.hProcess) == 0) { // 0 is STATUS_SUCCESS
-                        info.is_suspended = true;
-                    } else {
-                        // FAILED to suspend. This method won't work for this process.
-                        // Mark it for removal so we don't waste CPU trying again.
-                        pids_to_remove.push_back(info.pid);
-                        continue;
-                    }
-                    info.next_state_change_time = now + milliseconds(static_cast<long long>(info.suspend_ms));
+                    ops.push_back({OpKind::Suspend, info.pid, info.hProcess});
+                    info.is_suspended = true;
+                    info.suspended_at = info.last_change = now;
+                    schedule(info, std::max(resume_time(info, item.when), now));
                 }
             }
-
-            if (info.next_state_change_time < next_wakeup) {
-                next_wakeup = info.next_state_change_time;
-            }
+            held_us = duration<double, std::micro>(steady_clock::now() - acquired).count();
         }
-        
-        for (DWORD pid_to_remove : pids_to_remove) {
-            auto it = g_managed_processes.find(pid_to_remove);
-            if (it != g_managed_processes.end()) {
-                cleanup_and_resume_process(it->second);
-                g_managed_processes.erase(it);
+
+        // 4. The system calls, without any lock: control calls and stats polls never wait for them.
+        std::vector<Op> failed = execute(ops);
+
+        // 5. Forget processes that could not be suspended. This method won't work for them,
+        //    so stop wasting wakeups on them.
+        ops.clear();
+        steady_clock::time_point next_wakeup;
+        bool idle;
+        {
+            std::lock_guard<std::mutex> state(g_mutex);
+            auto acquired = steady_clock::now();
+            for (const Op& op : failed) {
+                auto it = g_managed_processes.find(op.pid);
+                if (it == g_managed_processes.end() || it->second.hProcess != op.hProcess) continue;
+                it->second.is_suspended = false; // Nothing to resume
+                it->second.failed_suspends++;
+                g_failed_suspends++;
+                release_locked(it, ops);
             }
+            g_ticks++;
+            held_us += duration<double, std::micro>(steady_clock::now() - acquired).count();
+            g_lock_hold_sum_us += held_us;
+            if (held_us > g_lock_hold_max_us) g_lock_hold_max_us = held_us;
+            idle = g_schedule.empty();
+            if (!idle) next_wakeup = g_schedule.top().when;
         }
-        lock.unlock();
+        execute(ops);
 
-        auto sleep_duration_ms = duration_cast<milliseconds>(next_wakeup - steady_clock::now()).count();
-        if (sleep_duration_ms > 0) Sleep(static_cast<DWORD>(sleep_duration_ms));
+        // 6. Sleep until the earliest deadline, a control call or an exit notification.
+        std::unique_lock<std::mutex> queue(g_cmd_mutex);
+        auto pending = [] { return g_should_stop || !g_commands.empty() || !g_exited_pids.empty(); };
+        if (idle) g_wakeup.wait(queue, pending);
+        else g_wakeup.wait_until(queue, next_wakeup, pending);
     }
     timeEndPeriod(1);
 }
@@ -127,80 +432,168 @@ extern "C" {
         }
         if (!g_NtSuspendProcess || !g_NtResumeProcess) return;
         EnableDebugPrivilege();
-        g_should_stop = false;
+        {
+            std::lock_guard<std::mutex> lock(g_cmd_mutex);
+            g_should_stop = false;
+        }
         g_manager_thread = std::thread(manager_loop);
     }
 
     __declspec(dllexport) void StopLimiter() {
         if (!g_manager_thread.joinable()) return;
-        g_should_stop = true;
+        {
+            std::lock_guard<std::mutex> lock(g_cmd_mutex);
+            g_should_stop = true;
+            g_wakeup.notify_one();
+        }
         g_manager_thread.join();
-        std::lock_guard<std::mutex> lock(g_mutex);
-        for (auto& pair : g_managed_processes) {
-            cleanup_and_resume_process(pair.second);
+        // The manager is gone: apply what it didn't get to, then resume and release everything.
+        std::vector<Op> ops;
+        {
+            std::lock_guard<std::mutex> state(g_mutex);
+            std::lock_guard<std::mutex> queue(g_cmd_mutex);
+            auto now = std::chrono::steady_clock::now();
+            for (const Command& command : g_commands) apply_command_locked(command, now, ops);
+            g_commands.clear();
+            g_exited_pids.clear();
+            while (!g_managed_processes.empty()) release_locked(g_managed_processes.begin(), ops);
+            g_schedule = {};
         }
-        g_managed_processes.clear();
+        execute(ops);
     }
 
     __declspec(dllexport) void AddProcess(DWORD pid, int limit_percentage) {
-        std::lock_guard<std::mutex> lock(g_mutex);
-        if (g_managed_processes.count(pid)) return;
+        queue_add(pid, limit_percentage, 0);
+    }
 
-        // *** FIX: Request PROCESS_ALL_ACCESS for the best chance of success ***
-        HANDLE hProcess = OpenProcess(PROCESS_ALL_ACCESS, FALSE, pid);
-        if (!hProcess) return;
+    __declspec(dllexport) void AddProcessEx(DWORD pid, int limit_percentage, double period_ms) {
+        queue_add(pid, limit_percentage, period_ms);
+    }
 
-        double cycle_time_ms = 200.0;
-        ProcessInfo info;
-        info.pid = pid;
-        info.hProcess = hProcess;
-        info.suspend_ms = cycle_time_ms * (limit_percentage / 100.0);
-        info.resume_ms = cycle_time_ms - info.suspend_ms;
-        if (info.resume_ms < 1) info.resume_ms = 1;
-        if (info.suspend_ms < 1) info.suspend_ms = 1;
-        info.is_suspended = false;
-        info.next_state_change_time = std::chrono::steady_clock::now();
+    __declspec(dllexport) void ModifyProcessLimit(DWORD pid, int new_limit_percentage) {
+        push_command({CommandKind::Modify, pid, new_limit_percentage, 0, NULL});
+    }
 
-        g_managed_processes[pid] = info;
+    __declspec(dllexport) void ModifyProcessLimitEx(DWORD pid, int new_limit_percentage, double period_ms) {
+        push_command({CommandKind::Modify, pid, new_limit_percentage, period_ms, NULL});
     }
 
-    __declspec(dllexport) void ModifyProcessLimit(DWORD pid, int new_limit_percentage) {
-        std::lock_guard<std::mutex> lock(g_mutex);
-        auto it = g_managed_processes.find(pid);
-        if (it != g_managed_processes.end()) {
-            ProcessInfo& info = it->second;
-            
-            double cycle_time_ms = 200.0; // This must be consistent with AddProcess
-            info.suspend_ms = cycle_time_ms * (new_limit_percentage / 100.0);
-            info.resume_ms = cycle_time_ms - info.suspend_ms;
-            if (info.resume_ms < 1) info.resume_ms = 1;
-            if (info.suspend_ms < 1) info.suspend_ms = 1;
-
-            // --- FIX: Reset the state change time to apply the new limit immediately ---
-            info.next_state_change_time = std::chrono::steady_clock::now();
-            if (info.is_suspended) {
-                NtResumeProcess(info.hProcess);
-                info.is_suspended = false;
-            }
-        }
+    __declspec(dllexport) void SetDefaultPeriod(double period_ms) {
+        std::lock_guard<std::mutex> lock(g_cmd_mutex);
+        if (period_ms >= 2) g_default_cycle_ms = period_ms;
     }
 
     __declspec(dllexport) void RemoveProcess(DWORD pid) {
+        push_command({CommandKind::Remove, pid, 0, 0, NULL});
+    }
+
+    // --- Batch variants: one FFI crossing and one queue lock for the whole array ---
+    // `periods` may be NULL; a period <= 0 means "default" (add) or "unchanged" (modify).
+    __declspec(dllexport) void AddProcessesInPhase(const DWORD* pids, const int* limits, const double* periods, int count, double phase);
+
+    __declspec(dllexport) void AddProcesses(const DWORD* pids, const int* limits, const double* periods, int count) {
+        AddProcessesInPhase(pids, limits, periods, count, -1);
+    }
+
+    // --- Groups: members added with the same phase (and limit and period) are switched in the same tick ---
+    __declspec(dllexport) double ReservePhase() {
         std::lock_guard<std::mutex> lock(g_mutex);
-        auto it = g_managed_processes.find(pid);
-        if (it != g_managed_processes.end()) {
-            cleanup_and_resume_process(it->second);
-            g_managed_processes.erase(it);
+        return next_phase_locked();
+    }
+
+    // Like AddProcesses, but every process gets `phase` (from ReservePhase) instead of one of its own.
+    __declspec(dllexport) void AddProcessesInPhase(const DWORD* pids, const int* limits, const double* periods, int count, double phase) {
+        std::vector<Command> batch;
+        batch.reserve(count);
+        for (int i = 0; i < count; ++i) {
+            HANDLE hProcess = OpenProcess(PROCESS_ALL_ACCESS, FALSE, pids[i]);
+            if (hProcess) batch.push_back({CommandKind::Add, pids[i], limits[i], periods ? periods[i] : 0, hProcess, phase});
         }
+        std::lock_guard<std::mutex> lock(g_cmd_mutex);
+        for (Command& command : batch) {
+            if (command.period_ms <= 0) command.period_ms = g_default_cycle_ms;
+            g_commands.push_back(command);
+        }
+        g_wakeup.notify_one();
+    }
+
+    __declspec(dllexport) void ModifyProcessLimits(const DWORD* pids, const int* limits, const double* periods, int count) {
+        std::lock_guard<std::mutex> lock(g_cmd_mutex);
+        for (int i = 0; i < count; ++i) g_commands.push_back({CommandKind::Modify, pids[i], limits[i], periods ? periods[i] : 0, NULL});
+        g_wakeup.notify_one();
+    }
+
+    __declspec(dllexport) void RemoveProcesses(const DWORD* pids, int count) {
+        std::lock_guard<std::mutex> lock(g_cmd_mutex);
+        for (int i = 0; i < count; ++i) g_commands.push_back({CommandKind::Remove, pids[i], 0, 0, NULL});
+        g_wakeup.notify_one();
     }
 
+    // Includes the effect of control calls the manager hasn't applied yet, so a caller
+    // always sees its own AddProcess/RemoveProcess.
     __declspec(dllexport) int GetManagedPids(DWORD* pids_array, int max_size) {
-        std::lock_guard<std::mutex> lock(g_mutex);
+        std::set<DWORD> pids;
+        {
+            std::lock_guard<std::mutex> state(g_mutex);
+            for (const auto& pair : g_managed_processes) pids.insert(pair.first);
+            std::lock_guard<std::mutex> queue(g_cmd_mutex);
+            for (const Command& command : g_commands) {
+                if (command.kind == CommandKind::Add) pids.insert(command.pid);
+                else if (command.kind == CommandKind::Remove) pids.erase(command.pid);
+            }
+        }
         int count = 0;
-        for (const auto& pair : g_managed_processes) {
-            if (count < max_size) pids_array[count++] = pair.first;
+        for (DWORD pid : pids) {
+            if (count < max_size) pids_array[count++] = pid;
             else break;
         }
         return count;
     }
+
+    // --- Stats: cheap enough to poll every second ---
+    // Fills up to `max_size` entries and returns the number of managed processes,
+    // so the caller can retry with a bigger buffer if that is more than `max_size`.
+    __declspec(dllexport) int GetProcessStats(ProcessStats* stats_array, int max_size) {
+        std::lock_guard<std::mutex> lock(g_mutex);
+        auto now = std::chrono::steady_clock::now();
+        int count = 0;
+        for (const auto& pair : g_managed_processes) {
+            if (count >= max_size) break;
+            const ProcessInfo& info = pair.second;
+            ProcessStats& out = stats_array[count++];
+            double suspended = info.suspended_total_ms + (info.is_suspended ? elapsed_ms(info.suspended_at, now) : 0);
+            double lifetime = elapsed_ms(info.added_at, now);
+            out.pid = info.pid;
+            out.limit_percentage = info.limit_percentage;
+            out.period_ms = info.cycle_ms;
+            out.cycles = info.cycles;
+            out.suspended_ms = suspended;
+            out.failed_suspends = info.failed_suspends;
+            out.since_last_change_ms = elapsed_ms(info.last_change, now);
+            out.configured_duty = info.limit_percentage / 100.0;
+            out.measured_duty = lifetime > 0 ? suspended / lifetime : 0;
+        }
+        return static_cast<int>(g_managed_processes.size());
+    }
+
+    __declspec(dllexport) void GetEngineStats(EngineStats* out) {
+        double window[LATENESS_WINDOW];
+        int samples;
+        {
+            std::lock_guard<std::mutex> lock(g_mutex);
+            out->managed = static_cast<int>(g_managed_processes.size());
+            out->ticks = g_ticks;
+            out->lateness_avg_ms = g_lateness_count ? g_lateness_sum_ms / g_lateness_count : 0;
+            out->lock_hold_avg_us = g_ticks ? g_lock_hold_sum_us / g_ticks : 0;
+            out->lock_hold_max_us = g_lock_hold_max_us;
+            out->failed_suspends = g_failed_suspends;
+            samples = static_cast<int>(std::min<unsigned long long>(g_lateness_count, LATENESS_WINDOW));
+            std::copy(g_lateness_ms, g_lateness_ms + samples, window);
+        }
+        // The p99 is computed after releasing the lock, so polling doesn't delay the scheduler.
+        if (samples == 0) { out->lateness_p99_ms = 0; return; }
+        int index = std::min(samples - 1, static_cast<int>(samples * 0.99));
+        std::nth_element(window, window + index, window + samples);
+        out->lateness_p99_ms = window[index];
+    }
 }
\ No newline at end of file
@@ -0,0 +1,52 @@
+"""
+Closed-Loop Accuracy Benchmark
+
+Runs a busy-loop worker in `target_cpu_percent` mode and reports how close its
+measured CPU usage gets to each target once the controller has settled.
+The goal is to stay within +/-2 percentage points.
+
+Usage:
+    python benchmarks/bench_closed_loop.py
+"""
+
+import os
+import subprocess
+import sys
+import time
+
+import psutil
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # This checkout, installed or not
+
+from cpulimiter import CpuLimiter
+
+TARGETS = [5, 10, 30, 60]
+SETTLE_SECONDS = 4.0
+MEASURE_SECONDS = 5.0
+
+
+def run(limiter, worker, target):
+    limiter.add(pid=worker.pid, target_cpu_percent=target)
+    limiter.start(pid=worker.pid)
+    time.sleep(SETTLE_SECONDS)
+    process = psutil.Process(worker.pid)
+    process.cpu_percent()
+    time.sleep(MEASURE_SECONDS)
+    return {"target": target, "measured": process.cpu_percent()}
+
+
+def main():
+    worker = subprocess.Popen([sys.executable, "-c", "while True: pass"])
+    limiter = CpuLimiter()
+    try:
+        print(f"{'target %':>9} {'measured %':>11} {'error':>7}")
+        for target in TARGETS:
+            r = run(limiter, worker, target)
+            print(f"{r['target']:>9} {r['measured']:>11.1f} {r['measured'] - r['target']:>+7.1f}")
+    finally:
+        limiter.stop_all()
+        worker.kill()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Control Call Latency Benchmark
+
+Measures how long modify / remove / add calls take while the scheduler is busy
+suspending and resuming many processes. Suspend and resume are simulated with a
+fixed delay per call (like `NtSuspendProcess` on a process with many threads),
+and the scheduler makes those calls without holding its lock, so control-call
+latency should stay flat however many processes are managed.
+
+Usage:
+    python benchmarks/bench_control_latency.py [syscall_us]
+"""
+
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # This checkout, installed or not
+
+from cpulimiter.backends import ScheduledEngine
+
+SIZES = [10, 100, 1000]
+SYSCALL_US = 200
+CALLS = 300
+FIRST_PID = 4_000_000  # Far above pid_max, so they can never be real processes
+
+
+class _SlowEngine(ScheduledEngine):
+    """A scheduler whose suspend/resume calls only burn time."""
+    name = "slow"
+
+    def __init__(self, syscall_s):
+        super().__init__(period_ms=100)
+        self.syscall_s = syscall_s
+
+    def _busy(self):
+        end = time.perf_counter() + self.syscall_s
+        while time.perf_counter() < end: time.sleep(0)
+        return True
+
+    def _suspend(self, pid, handle): return self._busy()
+    def _resume(self, pid, handle): return self._busy()
+
+
+def _timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return (time.perf_counter() - start) * 1e6
+
+
+def run(size, syscall_s):
+    engine = _SlowEngine(syscall_s)
+    engine.add_many([(FIRST_PID + i, 50) for i in range(size)])
+    time.sleep(0.3)
+    spare = FIRST_PID + size
+    latencies = []
+    for i in range(CALLS):
+        pid = FIRST_PID + i % size
+        latencies.append(_timed(engine.modify_process_limit, pid, 40 + i % 20))
+        latencies.append(_timed(engine.add_process, spare, 50))
+        latencies.append(_timed(engine.remove_process, spare))
+        time.sleep(0.002)
+    stats = engine.get_engine_stats()
+    engine.shutdown()
+    latencies.sort()
+    return statistics.median(latencies), latencies[int(len(latencies) * 0.99)], latencies[-1], stats.lock_hold_max_us
+
+
+def main():
+    syscall_us = float(sys.argv[1]) if len(sys.argv) > 1 else SYSCALL_US
+    print(f"simulated suspend/resume call: {syscall_us:.0f} us")
+    print(f"{'managed':>8}{'p50 us':>10}{'p99 us':>10}{'max us':>10}{'max lock hold us':>18}")
+    for size in SIZES:
+        p50, p99, worst, hold = run(size, syscall_us / 1e6)
+        print(f"{size:>8}{p50:>10.1f}{p99:>10.1f}{worst:>10.1f}{hold:>18.1f}")
+
+
+if __name__ == "__main__":
+    main()
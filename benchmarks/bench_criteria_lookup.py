@@ -0,0 +1,85 @@
+"""
+Criteria Lookup Benchmark
+
+Times the public `stop()` + `start()` and `modify_limit()` calls by `process_name=`
+and by `window_title_contains=` on a CpuLimiter holding 1k and 10k managed entries.
+Every name and title matches the same 10 entries at every size, so the calls should
+cost the same whatever the size of the managed set. For reference, the last column is
+a linear scan over the managed entries: what each of these calls cost before the
+limiter's name and title indexes.
+
+The entries are made-up PIDs with made-up names and titles, so they are inserted
+directly rather than looked up with `add()`, and the engine does nothing: the numbers
+are the limiter's own overhead.
+
+Usage:
+    python benchmarks/bench_criteria_lookup.py [sizes...]
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # This checkout, installed or not
+
+from cpulimiter import CpuLimiter
+from cpulimiter.backends import Engine
+
+SIZES = (1_000, 10_000)
+MATCHES = 10  # Entries sharing each name or title
+FIRST_PID = 4_000_000  # Far above pid_max, so they can never be real processes
+
+
+class _NullEngine(Engine):
+    name = "null"
+
+    def add_process(self, pid, limit, period_ms=None): pass
+    def modify_process_limit(self, pid, limit, period_ms=None): pass
+    def remove_process(self, pid): pass
+    def get_managed_pids(self): return []
+    def shutdown(self): pass
+
+
+def _linear_scan(process_info, process_name=None, window_title_contains=None):
+    """The lookup as it was before the indexes."""
+    found_pids = []
+    for p, info in process_info.items():
+        if (process_name and info["process_name"] == process_name) or (window_title_contains and info["window_title_contains"] == window_title_contains):
+            found_pids.append(p)
+    return found_pids
+
+
+def _time_us(func, number):
+    return timeit.timeit(func, number=number) / number * 1e6
+
+
+def _limiter(size):
+    """Half the entries have one of `size / 2 / MATCHES` names, the other half one of as many titles."""
+    limiter = CpuLimiter(engine=_NullEngine())
+    groups = max(1, size // 2 // MATCHES)
+    for i in range(size):
+        name, title = (f"worker{i // 2 % groups}.exe", None) if i % 2 else (None, f"Window {i // 2 % groups}")
+        limiter._insert_info({"pid": FIRST_PID + i, "process_name": name, "window_title_contains": title, "limit_percentage": 50, "period_ms": None, "target_cpu_percent": None, "rule": None, "create_time": None})
+    limiter.start_all()
+    return limiter
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or SIZES
+    print(f"{MATCHES} entries per name and per title")
+    print(f"{'managed':>8}  {'criteria':<24}{'stop+start us':>15}{'modify_limit us':>17}{'linear scan us':>16}")
+    for size in sizes:
+        limiter = _limiter(size)
+        for label, criteria in (("process_name", {"process_name": "worker7.exe"}), ("window_title_contains", {"window_title_contains": "Window 8"})):
+            assert len(_linear_scan(limiter._process_info, **criteria)) == MATCHES
+            limiter.stop(**criteria)
+            assert len(limiter.get_active()) == size - MATCHES
+            limiter.start(**criteria)
+            pair = _time_us(lambda: (limiter.stop(**criteria), limiter.start(**criteria)), 5000)
+            modify = _time_us(lambda: limiter.modify_limit(**criteria, new_limit_percentage=60), 5000)
+            scan = _time_us(lambda: _linear_scan(limiter._process_info, **criteria), 200)
+            print(f"{size:>8}  {label:<24}{pair:>15.2f}{modify:>17.2f}{scan:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Import Time Benchmark
+
+Measures what programs pay just to import the library, in a fresh interpreter
+each run, and checks each case against its budget. Importing the package must
+stay cheap and must not start an engine; the heavier entry points only load
+what they use (no asyncio for `CpuLimiter`, no engine for `get_active_app_pids`).
+
+Times are the median over several runs, minus the cost of starting an empty
+interpreter. Exits with status 1 if any case is over budget.
+
+Usage:
+    python benchmarks/bench_import_time.py [runs]
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+RUNS = 15
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (statement, budget in ms). Everything past the bare package import is dominated by psutil,
+# which every real lookup needs anyway.
+CASES = [
+    ("import cpulimiter", 10),
+    ("from cpulimiter import get_active_app_pids", 75),
+    ("from cpulimiter import CpuLimiter", 100),
+    ("from cpulimiter import AsyncCpuLimiter", 150),
+]
+# Modules that must not be loaded by a statement.
+FORBIDDEN = {
+    "import cpulimiter": ["psutil", "asyncio", "cpulimiter.limiter", "cpulimiter.backends"],
+    "from cpulimiter import get_active_app_pids": ["asyncio", "cpulimiter.backends"],
+    "from cpulimiter import CpuLimiter": ["asyncio"],
+}
+
+
+def _run_ms(statement):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", statement], cwd=ROOT, check=True)
+    return (time.perf_counter() - start) * 1000.0
+
+
+def _median_ms(statement, runs):
+    return statistics.median(_run_ms(statement) for _ in range(runs))
+
+
+def _loaded(statement, modules):
+    check = f"{statement}; import sys; print(' '.join(m for m in {modules!r} if m in sys.modules))"
+    out = subprocess.run([sys.executable, "-c", check], cwd=ROOT, check=True, capture_output=True, text=True).stdout
+    return out.split()
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else RUNS
+    baseline = _median_ms("pass", runs)
+    print(f"interpreter startup: {baseline:.1f} ms (subtracted)")
+    print(f"{'statement':<46}{'ms':>8}{'budget':>8}  status")
+    failed = False
+    for statement, budget in CASES:
+        cost = max(0.0, _median_ms(statement, runs) - baseline)
+        loaded = _loaded(statement, FORBIDDEN.get(statement, []))
+        ok = cost <= budget and not loaded
+        failed |= not ok
+        status = "ok" if ok else ("over budget" if cost > budget else "") + (f" loads {', '.join(loaded)}" if loaded else "")
+        print(f"{statement:<46}{cost:>8.1f}{budget:>8}  {status}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
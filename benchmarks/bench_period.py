@@ -0,0 +1,91 @@
+"""
+Duty-Cycle Period Benchmark
+
+For each period, limits a busy-loop worker to 50% and reports:
+- the limiter's own wakeups per second (scheduler ticks and suspend/resume calls),
+- the worst pause the worker saw, measured from inside the worker itself.
+
+Short periods keep pauses short (good for latency-sensitive services); long
+periods cut limiter wakeups and context switches (good for batch jobs).
+
+Usage (Linux, uses the signal engine):
+    python benchmarks/bench_period.py
+"""
+
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # This checkout, installed or not
+
+from cpulimiter.backends import SignalEngine
+
+PERIODS_MS = [20, 50, 200, 1000, 3000]
+LIMIT_PERCENTAGE = 50
+RUN_SECONDS = 6.0
+
+# The worker spins and remembers the longest gap between two clock reads,
+# which is the longest time it was paused.
+WORKER = """
+import sys, time
+end = time.monotonic() + float(sys.argv[1])
+last = time.monotonic()
+worst = 0.0
+while True:
+    now = time.monotonic()
+    if now - last > worst: worst = now - last
+    last = now
+    if now > end: break
+print(worst * 1000.0)
+"""
+
+
+class _CountingEngine(SignalEngine):
+    """A signal engine that counts its own scheduler wakeups and signal calls."""
+    name = "signals-counting"
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.ticks = 0
+        self.signals = 0
+
+    def _run_due(self, now):
+        self.ticks += 1
+        return super()._run_due(now)
+
+    def _suspend(self, pid, handle):
+        self.signals += 1
+        return super()._suspend(pid, handle)
+
+    def _resume(self, pid, handle):
+        self.signals += 1
+        return super()._resume(pid, handle)
+
+
+def run(period_ms):
+    engine = _CountingEngine(period_ms=period_ms)
+    worker = subprocess.Popen([sys.executable, "-c", WORKER, str(RUN_SECONDS)], stdout=subprocess.PIPE, text=True)
+    start = time.monotonic()
+    engine.add_process(worker.pid, LIMIT_PERCENTAGE)
+    worst_pause_ms = float(worker.communicate()[0].strip() or "nan")
+    elapsed = time.monotonic() - start
+    ticks, signals = engine.ticks, engine.signals
+    engine.shutdown()
+    return {
+        "period_ms": period_ms,
+        "wakeups_per_sec": ticks / elapsed,
+        "signals_per_sec": signals / elapsed,
+        "worst_pause_ms": worst_pause_ms,
+    }
+
+
+def main():
+    print(f"{'period_ms':>10} {'wakeups/s':>10} {'signals/s':>10} {'worst pause (ms)':>17}")
+    for period_ms in PERIODS_MS:
+        r = run(period_ms)
+        print(f"{r['period_ms']:>10} {r['wakeups_per_sec']:>10.1f} {r['signals_per_sec']:>10.1f} {r['worst_pause_ms']:>17.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Phase Stagger Benchmark
+
+Measures how many throttled targets are runnable at the same time, with and
+without phase staggering. Without it, targets added (or re-limited) together
+suspend and resume in lockstep, so the runnable count swings between zero and
+all of them every cycle; with it, the count stays close to its mean.
+
+The scheduler runs on a virtual clock against no-op suspend/resume calls, so
+the result is exact and repeatable. Halfway through, every limit is changed in
+one batch, which must not line the targets up again.
+
+Usage:
+    python benchmarks/bench_phase_stagger.py [targets]
+"""
+
+import os
+import statistics
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # This checkout, installed or not
+
+from cpulimiter.backends import ScheduledEngine
+
+TARGETS = 50
+LIMIT_PERCENTAGES = (50, 70)  # Before and after the batch modify
+PERIOD_MS = 200
+RUN_SECONDS = 10.0
+STEP_S = 0.001
+
+
+class _NullEngine(ScheduledEngine):
+    """A scheduler on a virtual clock whose suspend/resume calls do nothing."""
+    name = "null"
+
+    def __init__(self, stagger):
+        self.now = 0.0
+        super().__init__(PERIOD_MS, clock=lambda: self.now, stagger=stagger)
+
+    def _suspend(self, pid, handle):
+        return True
+
+    def _resume(self, pid, handle):
+        return True
+
+
+def run(count, stagger):
+    engine = _NullEngine(stagger)
+    # Drive the scheduler by hand instead of starting its thread.
+    for pid in range(1, count + 1): engine._add_locked(pid, LIMIT_PERCENTAGES[0])
+    samples = {0: [], 1: []}
+    steps = int(RUN_SECONDS / STEP_S)
+    for step in range(steps):
+        engine.now = step * STEP_S
+        half = step >= steps // 2
+        if step == steps // 2:
+            for pid in range(1, count + 1): engine._modify_locked(pid, LIMIT_PERCENTAGES[1])
+        engine._tick(engine.now)
+        if step % (steps // 2) >= int(1.0 / STEP_S):  # Skip the first second of each half
+            samples[half].append(sum(not entry.is_suspended for entry in engine._entries.values()))
+    return samples
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else TARGETS
+    print(f"{count} targets, {PERIOD_MS} ms period; runnable targets sampled every {STEP_S * 1000:.0f} ms")
+    print(f"{'schedule':<12}{'limit':>7}{'expected':>10}{'mean':>8}{'variance':>10}{'min':>6}{'max':>6}")
+    for stagger in (False, True):
+        samples = run(count, stagger)
+        for half, limit in enumerate(LIMIT_PERCENTAGES):
+            s = samples[half]
+            print(f"{'staggered' if stagger else 'lockstep':<12}{limit:>6}%{count * (100 - limit) / 100:>10.1f}"
+                  f"{statistics.mean(s):>8.1f}{statistics.pvariance(s):>10.1f}{min(s):>6}{max(s):>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Process Lookup Benchmark
+
+Spawns a few hundred idle processes and compares the cost of finding PIDs by
+name with a full `psutil.process_iter` scan against the shared `ProcessTable`:
+- an incremental refresh (only new `/proc` entries are read),
+- a lookup served from the index.
+
+Usage:
+    python benchmarks/bench_process_lookup.py [extra_processes]
+"""
+
+import os
+import subprocess
+import sys
+import timeit
+
+import psutil
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # This checkout, installed or not
+
+from cpulimiter.proctable import ProcessTable
+
+EXTRA_PROCESSES = 500
+SLEEPER = [sys.executable, "-c", "import time; time.sleep(120)"]
+
+
+def _scan(process_name):
+    return [p.pid for p in psutil.process_iter(['pid', 'name']) if (p.info['name'] or "").lower() == process_name]
+
+
+def _time_us(func, number):
+    return timeit.timeit(func, number=number) / number * 1e6
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else EXTRA_PROCESSES
+    workers = [subprocess.Popen(SLEEPER) for _ in range(count)]
+    try:
+        table = ProcessTable(max_age=0)
+        table.refresh()
+        name = psutil.Process(workers[0].pid).name()
+        print(f"{len(table.names())} processes running")
+        print(f"{'method':<28}{'us/lookup':>12}")
+        print(f"{'psutil.process_iter scan':<28}{_time_us(lambda: _scan(name), 20):>12.1f}")
+        print(f"{'incremental refresh':<28}{_time_us(lambda: table.refresh(force=True), 50):>12.1f}")
+        cached = ProcessTable()
+        cached.refresh()
+        print(f"{'indexed lookup':<28}{_time_us(lambda: cached.pids_named(name), 10000):>12.1f}")
+    finally:
+        for worker in workers: worker.kill()
+        for worker in workers: worker.wait()
+
+
+if __name__ == "__main__":
+    main()
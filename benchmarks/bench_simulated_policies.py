@@ -0,0 +1,108 @@
+"""
+Simulated Policies Benchmark
+
+Runs the scheduler's policies on `cpulimiter.simulation`'s virtual clock, so the
+results are exact, repeatable and take well under a second of wall time:
+- fixed limits: achieved duty cycle, pause lengths and wakeups per second, with
+  and without phase staggering, and with up to 2 ms of wakeup latency,
+- closed-loop targets: the CPU usage a busy process settles at,
+- a budget tree: how a cap is split between weighted, busy and idle leaves.
+
+Exits with status 1 if an achieved duty cycle or closed-loop target is off by
+more than its tolerance, so it can guard scheduling changes in CI.
+
+Usage:
+    python benchmarks/bench_simulated_policies.py [targets]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # This checkout, installed or not
+
+from cpulimiter.budgets import Budget
+from cpulimiter.simulation import Simulation
+
+TARGETS = 50
+LIMITS = (25, 50, 75, 90, 98)
+PERIOD_MS = 200
+RUN_SECONDS = 30.0
+SETTLE_SECONDS = 5.0
+LATENCY_S = 0.002
+DUTY_TOLERANCE = 0.01  # Fraction of the cycle
+CLOSED_LOOP_TARGETS = (5, 10, 30, 60)
+CLOSED_LOOP_TOLERANCE = 2.0  # Percentage points
+
+
+def fixed_limits(count, stagger, latency):
+    sim = Simulation(PERIOD_MS, stagger=stagger, wakeup_latency=latency)
+    processes = [sim.spawn(demand=1.0) for _ in range(count)]
+    sim.engine.add_many([(p.pid, LIMITS[i % len(LIMITS)]) for i, p in enumerate(processes)])
+    sim.run(RUN_SECONDS)
+    report = sim.report(since=SETTLE_SECONDS)
+    rows = []
+    for limit in LIMITS:
+        procs = [r for r in report.processes.values() if r.limit == limit]
+        rows.append((limit, sum(r.suspended_fraction for r in procs) / len(procs),
+                     sum(r.pause_p50_ms for r in procs) / len(procs), max(r.pause_p99_ms for r in procs)))
+    return rows, report.wakeups / report.duration
+
+
+def closed_loop(target):
+    sim = Simulation(100, cpu_count=4)
+    worker = sim.spawn(demand=1.0)
+    sim.feedback.track(worker.pid, target)
+    sim.run(RUN_SECONDS)
+    return sim.report(since=RUN_SECONDS / 2).processes[worker.pid].cpu_percent
+
+
+def budget_split():
+    sim = Simulation(100, cpu_count=4)
+    encode, index, idle = sim.spawn(demand=2.0), sim.spawn(demand=1.0), sim.spawn(demand=0.05)
+    budget = Budget("batch", cap_percent=25, children=[
+        Budget("encode", weight=2, pid=encode.pid),
+        Budget("index", weight=1, pid=index.pid),
+        Budget("idle", weight=1, pid=idle.pid),
+    ])
+    for path, leaf in budget.leaves(): sim.feedback.track_group(path, [leaf.pid], 100)
+    sim.feedback.set_budget(budget)
+    sim.run(RUN_SECONDS)
+    report = sim.report(since=RUN_SECONDS / 2)
+    return [(path, report.processes[leaf.pid].cpu_percent) for path, leaf in budget.leaves()]
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else TARGETS
+    started = time.perf_counter()
+    failed = False
+
+    print(f"Fixed limits: {count} busy targets, {PERIOD_MS} ms period, {RUN_SECONDS:.0f} s simulated")
+    print(f"{'schedule':<24}{'limit':>7}{'duty':>8}{'pause p50 ms':>14}{'pause p99 ms':>14}")
+    for stagger, latency in ((False, 0.0), (True, 0.0), (True, LATENCY_S)):
+        rows, wakeups = fixed_limits(count, stagger, latency)
+        label = ("staggered" if stagger else "lockstep") + (f" +{latency * 1000:.0f}ms latency" if latency else "")
+        for limit, duty, p50, p99 in rows:
+            print(f"{label:<24}{limit:>6}%{duty:>8.3f}{p50:>14.1f}{p99:>14.1f}")
+            failed |= abs(duty - limit / 100.0) > DUTY_TOLERANCE
+        print(f"{label:<24}{'wakeups/s':>7}{wakeups:>8.0f}")
+
+    print(f"\nClosed loop: one busy process")
+    print(f"{'target %':>9}{'measured %':>12}{'error':>8}")
+    for target in CLOSED_LOOP_TARGETS:
+        measured = closed_loop(target)
+        print(f"{target:>9}{measured:>12.1f}{measured - target:>+8.1f}")
+        failed |= abs(measured - target) > CLOSED_LOOP_TOLERANCE
+
+    print(f"\nBudget: 25% of a 4-core host (100% of one core), weights 2:1:1, 'idle' needs 5%")
+    for path, cpu in budget_split():
+        print(f"{path:<16}{cpu:>8.1f}%")
+
+    print(f"\n{time.perf_counter() - started:.2f} s wall time")
+    if failed:
+        print("FAILED: a result is outside its tolerance")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
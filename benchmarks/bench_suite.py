@@ -0,0 +1,350 @@
+"""
+Benchmark Suite
+
+Runs the same measurements against every available backend and the legacy
+`limiter_legacy` path, using real synthetic workers:
+- accuracy: the CPU share a busy-loop worker and a 4-thread worker actually get,
+  against the share `limit_percentage` leaves them,
+- control latency: time from `stop()` / `modify_limit()` on a suspended worker
+  to the worker running again, seen from inside the worker,
+- scaling: with 1 to 2,000 idle targets managed, the time to start and stop
+  them all, the limiter's own CPU time per managed target, and the scheduler's
+  lateness.
+
+Results are printed and, with `--json`, written as machine-readable JSON.
+`--baseline` compares against an earlier JSON file and exits with status 1 on
+a regression, so the suite can track changes across commits.
+
+Usage:
+    python benchmarks/bench_suite.py [--backends cgroup,signals,legacy] [--sizes 1,10,100,1000,2000]
+                                     [--quick] [--json results.json] [--baseline old.json]
+"""
+
+import argparse
+import json
+import mmap
+import os
+import platform
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+
+import psutil
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # This checkout, installed or not
+
+import cpulimiter
+from cpulimiter import CpuLimiter, limiter_legacy
+
+PERIOD_MS = 200
+LIMITS = (25, 50, 75, 90)
+SIZES = (1, 10, 100, 1000, 2000)
+SETTLE_S = 1.0
+MEASURE_S = 3.0
+LATENCY_TRIALS = 20
+LATENCY_LIMIT = 90  # Long pauses, so every trial starts while the worker is suspended
+SCALING_WINDOW_S = 3.0
+DEFAULT_BACKENDS = "windows,threads,legacy" if os.name == "nt" else "cgroup,signals,legacy"
+
+# Regressions reported by --baseline
+ACCURACY_SLACK = 3.0  # Percentage points of extra error
+LATENCY_FACTOR, LATENCY_SLACK_MS = 2.0, 2.0
+OVERHEAD_FACTOR, OVERHEAD_SLACK_US = 1.5, 20.0
+CPU_TIME_RESOLUTION_S = 0.01  # Process CPU times advance in clock ticks
+
+BUSY_WORKER = [sys.executable, "-c", "while True: pass"]
+THREADED_WORKER = [sys.executable, "-c", """
+import threading
+def spin():
+    while True: pass
+for _ in range(4): threading.Thread(target=spin).start()
+"""]
+# Writes the time into a shared file as fast as it can: a stale value means it is suspended.
+HEARTBEAT_WORKER = [sys.executable, "-c", """
+import mmap, struct, sys, time
+f = open(sys.argv[1], "r+b")
+m = mmap.mmap(f.fileno(), 8)
+pack, clock = struct.pack_into, time.monotonic
+while True: pack("d", m, 0, clock())
+"""]
+IDLE_WORKER = ["sleep", "600"] if os.name != "nt" else [sys.executable, "-c", "import time; time.sleep(600)"]
+
+
+# --- Backends ---
+class _Backend:
+    """A limiter to benchmark and the engine behind it (None when it can't be inspected)."""
+
+    def __init__(self, name, limiter, engine):
+        self.name = name
+        self.limiter = limiter
+        self.engine = engine
+
+    @property
+    def can_modify(self):
+        return hasattr(self.limiter, "modify_limit")
+
+
+def _engine_backend(name, factory):
+    def make():
+        engine = factory()
+        return _Backend(name, CpuLimiter(engine=engine), engine)
+    return make
+
+
+def _legacy_backend():
+    limiter = limiter_legacy.CpuLimiter()
+    return _Backend("legacy", limiter, limiter._get_engine())  # Raises OSError where it can't run.
+
+
+def _windows_engine():
+    from cpulimiter.backends.windows import WindowsEngine
+    return WindowsEngine()
+
+
+def _backend_factories():
+    from cpulimiter.backends import CgroupEngine, SignalEngine, ThreadEngine
+    return {
+        "windows": _engine_backend("windows", _windows_engine),
+        "threads": _engine_backend("threads", lambda: ThreadEngine(PERIOD_MS)),
+        "cgroup": _engine_backend("cgroup", lambda: CgroupEngine(period_ms=PERIOD_MS)),
+        "signals": _engine_backend("signals", lambda: SignalEngine(PERIOD_MS)),
+        "legacy": _legacy_backend,
+    }
+
+
+# --- Workers ---
+def _spawn(command, *args):
+    return subprocess.Popen(command + list(args), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def _kill(workers):
+    for worker in workers:
+        try: worker.kill()
+        except OSError: pass
+    for worker in workers: worker.wait()
+
+
+def _cpu_seconds(process):
+    times = process.cpu_times()
+    return times.user + times.system
+
+
+# --- Measurements ---
+def measure_accuracy(backend, limits, settle_s, measure_s):
+    """CPU share of each worker kind at each limit, in percent of one core."""
+    rows = []
+    for kind, command in (("busy", BUSY_WORKER), ("threads", THREADED_WORKER)):
+        for limit in limits:
+            worker = _spawn(command)
+            try:
+                time.sleep(0.2)
+                backend.limiter.add(pid=worker.pid, limit_percentage=limit, period_ms=PERIOD_MS)
+                backend.limiter.start(pid=worker.pid)
+                time.sleep(settle_s)
+                process = psutil.Process(worker.pid)
+                before, started = _cpu_seconds(process), time.monotonic()
+                time.sleep(measure_s)
+                used = 100.0 * (_cpu_seconds(process) - before) / (time.monotonic() - started)
+                backend.limiter.remove(pid=worker.pid)
+            finally:
+                _kill([worker])
+            # The share the limit leaves, of what the worker could use unthrottled (at most one core per thread).
+            expected = (100 - limit) * min(1 if kind == "busy" else 4, psutil.cpu_count() or 1)
+            rows.append({"worker": kind, "limit_percentage": limit, "expected_cpu_percent": expected,
+                         "measured_cpu_percent": round(used, 2), "error": round(used - expected, 2)})
+    return rows
+
+
+def _percentiles(samples_ms):
+    samples = sorted(samples_ms)
+    if not samples: return None
+    pick = lambda q: round(samples[min(len(samples) - 1, int(len(samples) * q))], 3)
+    return {"p50_ms": pick(0.5), "p99_ms": pick(0.99), "max_ms": round(samples[-1], 3), "trials": len(samples)}
+
+
+def measure_control_latency(backend, trials):
+    """Time from each control call on a suspended worker to the worker's next heartbeat."""
+    with tempfile.NamedTemporaryFile(delete=False) as f:
+        f.write(b"\0" * 8)
+        path = f.name
+    worker = _spawn(HEARTBEAT_WORKER, path)
+    try:
+        with open(path, "r+b") as f:
+            beat = mmap.mmap(f.fileno(), 8)
+            heartbeat = lambda: struct.unpack_from("d", beat, 0)[0]
+            while heartbeat() == 0.0: time.sleep(0.01)
+
+            def trial(action, restore):
+                deadline = time.monotonic() + 2.0
+                while time.monotonic() - heartbeat() < 0.02:  # Wait until it is suspended.
+                    if time.monotonic() > deadline: return None
+                    time.sleep(0.001)
+                called = time.monotonic()
+                action()
+                while heartbeat() < called:
+                    if time.monotonic() > deadline: return None
+                    time.sleep(0.0002)
+                latency = (heartbeat() - called) * 1000.0
+                restore()
+                return latency
+
+            limiter, pid = backend.limiter, worker.pid
+            limiter.add(pid=pid, limit_percentage=LATENCY_LIMIT, period_ms=PERIOD_MS)
+            limiter.start(pid=pid)
+            result = {}
+            calls = {"stop": (lambda: limiter.stop(pid=pid), lambda: limiter.start(pid=pid))}
+            if backend.can_modify:
+                calls["modify_limit"] = (lambda: limiter.modify_limit(pid=pid, new_limit_percentage=0),
+                                         lambda: limiter.modify_limit(pid=pid, new_limit_percentage=LATENCY_LIMIT))
+            for name, (action, restore) in calls.items():
+                samples = [trial(action, restore) for _ in range(trials)]
+                result[name] = _percentiles([s for s in samples if s is not None])
+            limiter.remove(pid=pid)
+            beat.close()
+    finally:
+        _kill([worker])
+        os.unlink(path)
+    return result
+
+
+def measure_scaling(backend, sizes, window_s):
+    """Start/stop cost, the limiter's own CPU per target and the scheduler lateness, by managed set size."""
+    rows = []
+    me = psutil.Process()
+    for size in sizes:
+        workers = [_spawn(IDLE_WORKER) for _ in range(size)]
+        try:
+            limiter = backend.limiter
+            for worker in workers: limiter.add(pid=worker.pid, limit_percentage=50, period_ms=PERIOD_MS)
+            started = time.perf_counter()
+            limiter.start_all()
+            start_ms = (time.perf_counter() - started) * 1000.0
+            time.sleep(0.5)
+            before, since = _cpu_seconds(me), time.monotonic()
+            time.sleep(window_s)
+            self_cpu = _cpu_seconds(me) - before
+            elapsed = time.monotonic() - since
+            stats = backend.engine.get_engine_stats() if backend.engine is not None else None
+            started = time.perf_counter()
+            limiter.stop_all()
+            stop_ms = (time.perf_counter() - started) * 1000.0
+            for worker in workers: limiter.remove(pid=worker.pid)
+        finally:
+            _kill(workers)
+        rows.append({
+            "targets": size,
+            "start_all_ms": round(start_ms, 3),
+            "stop_all_ms": round(stop_ms, 3),
+            "self_cpu_percent": round(100.0 * self_cpu / elapsed, 3),
+            "self_cpu_us_per_target_s": round(1e6 * self_cpu / elapsed / size, 3),
+            "lateness_p99_ms": None if stats is None else round(stats.lateness_p99_ms, 3),
+        })
+    return rows
+
+
+# --- Reporting ---
+def _print_backend(name, result):
+    print(f"\n== {name} ==")
+    if "skipped" in result:
+        print(f"skipped: {result['skipped']}")
+        return
+    print(f"{'worker':<9}{'limit':>7}{'expected %':>12}{'measured %':>12}{'error':>8}")
+    for r in result["accuracy"]:
+        print(f"{r['worker']:<9}{r['limit_percentage']:>6}%{r['expected_cpu_percent']:>12}{r['measured_cpu_percent']:>12.1f}{r['error']:>+8.1f}")
+    print(f"\n{'control call':<14}{'p50 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+    for call, p in result["control_latency"].items():
+        if p is None: print(f"{call:<14}{'no samples':>27}")
+        else: print(f"{call:<14}{p['p50_ms']:>9.2f}{p['p99_ms']:>9.2f}{p['max_ms']:>9.2f}")
+    print(f"\n{'targets':>8}{'start ms':>10}{'stop ms':>10}{'self CPU %':>12}{'us/target/s':>13}{'late p99 ms':>13}")
+    for r in result["scaling"]:
+        lateness = "-" if r['lateness_p99_ms'] is None else f"{r['lateness_p99_ms']:.2f}"
+        print(f"{r['targets']:>8}{r['start_all_ms']:>10.2f}{r['stop_all_ms']:>10.2f}{r['self_cpu_percent']:>12.2f}{r['self_cpu_us_per_target_s']:>13.1f}{lateness:>13}")
+
+
+def compare(results, baseline):
+    """Lists the regressions of `results` against a baseline produced by this suite."""
+    regressions = []
+    for name, new in results["backends"].items():
+        old = baseline.get("backends", {}).get(name)
+        if old is None or "skipped" in old or "skipped" in new: continue
+        old_accuracy = {(r["worker"], r["limit_percentage"]): r for r in old["accuracy"]}
+        for r in new["accuracy"]:
+            before = old_accuracy.get((r["worker"], r["limit_percentage"]))
+            if before is not None and abs(r["error"]) > abs(before["error"]) + ACCURACY_SLACK:
+                regressions.append(f"{name}: {r['worker']} @ {r['limit_percentage']}% error {before['error']:+.1f} -> {r['error']:+.1f} pp")
+        for call, p in new["control_latency"].items():
+            before = old["control_latency"].get(call)
+            if p is not None and before is not None and p["p99_ms"] > before["p99_ms"] * LATENCY_FACTOR + LATENCY_SLACK_MS:
+                regressions.append(f"{name}: {call} latency p99 {before['p99_ms']:.2f} -> {p['p99_ms']:.2f} ms")
+        old_scaling = {r["targets"]: r for r in old["scaling"]}
+        window_s = min(results["config"]["scaling_window_s"], baseline["config"]["scaling_window_s"])
+        for r in new["scaling"]:
+            before = old_scaling.get(r["targets"])
+            # Two clock ticks of CPU time in the window, spread over the targets, is just noise.
+            noise_us = 2e6 * CPU_TIME_RESOLUTION_S / window_s / r["targets"]
+            if before is not None and r["self_cpu_us_per_target_s"] > before["self_cpu_us_per_target_s"] * OVERHEAD_FACTOR + OVERHEAD_SLACK_US + noise_us:
+                regressions.append(f"{name}: {r['targets']} targets overhead {before['self_cpu_us_per_target_s']:.1f} -> {r['self_cpu_us_per_target_s']:.1f} us/target/s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="cpulimiter benchmark suite")
+    parser.add_argument("--backends", default=DEFAULT_BACKENDS, help="comma separated; unavailable ones are reported as skipped")
+    parser.add_argument("--sizes", default=",".join(map(str, SIZES)), help="managed set sizes for the scaling run")
+    parser.add_argument("--quick", action="store_true", help="fewer limits, sizes and trials, shorter windows")
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--baseline", help="compare against an earlier --json file")
+    args = parser.parse_args()
+
+    limits, sizes = LIMITS, [int(s) for s in args.sizes.split(",")]
+    settle_s, measure_s, trials, window_s = SETTLE_S, MEASURE_S, LATENCY_TRIALS, SCALING_WINDOW_S
+    if args.quick:
+        limits, sizes = (50, 90), [s for s in sizes if s <= 100]
+        settle_s, measure_s, trials, window_s = 0.5, 1.5, 8, 1.0
+
+    results = {
+        "suite": "cpulimiter-benchmarks",
+        "format": 1,
+        "meta": {
+            "cpulimiter": cpulimiter.__version__,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": psutil.cpu_count(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        },
+        "config": {"period_ms": PERIOD_MS, "limits": list(limits), "sizes": sizes, "settle_s": settle_s,
+                   "measure_s": measure_s, "latency_trials": trials, "scaling_window_s": window_s},
+        "backends": {},
+    }
+    factories = _backend_factories()
+    for name in args.backends.split(","):
+        try:
+            backend = factories[name]()
+        except (OSError, RuntimeError, ImportError) as e:
+            results["backends"][name] = {"skipped": f"{type(e).__name__}: {e}"}
+        else:
+            try:
+                results["backends"][name] = {
+                    "accuracy": measure_accuracy(backend, limits, settle_s, measure_s),
+                    "control_latency": measure_control_latency(backend, trials),
+                    "scaling": measure_scaling(backend, sizes, window_s),
+                }
+            finally:
+                backend.limiter.shutdown()
+                if backend.engine is not None: backend.engine.shutdown()
+        _print_backend(name, results["backends"][name])
+
+    if args.json:
+        with open(args.json, "w") as f: json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.json}")
+    if args.baseline:
+        with open(args.baseline) as f: regressions = compare(results, json.load(f))
+        print(f"\n{len(regressions)} regression(s) against {args.baseline}")
+        for line in regressions: print(f"  {line}")
+        if regressions: sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
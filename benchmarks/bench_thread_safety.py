@@ -0,0 +1,120 @@
+"""
+Thread Safety Stress Benchmark
+
+Several writer threads call add / modify_limit / stop / start / remove on
+overlapping PIDs while reader threads poll get_active() and get_groups(), all on
+one CpuLimiter. Reports operations per second for both kinds of call, any
+exceptions raised, and whether the engine ended up managing exactly the PIDs the
+limiter reports as active.
+
+The engine only records calls, so the numbers show the limiter's own overhead
+(locking and snapshotting), not the cost of suspending real processes.
+
+Readers pause between polls (1 ms by default, like a UI refresh). With a pause
+of 0 the readers spin, and on CPython every lock handoff then waits for the GIL
+switch interval, which measures the interpreter rather than the limiter.
+
+Usage:
+    python benchmarks/bench_thread_safety.py [writers] [readers] [reader_pause_ms]
+"""
+
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # This checkout, installed or not
+
+from cpulimiter import CpuLimiter
+from cpulimiter.backends import Engine
+
+PIDS = range(4_000_000, 4_000_500)  # Far above pid_max, so they can never be real processes
+RUN_SECONDS = 3.0
+
+
+class _RecordingEngine(Engine):
+    """Keeps the managed set in a dict and does nothing else."""
+    name = "recording"
+
+    def __init__(self):
+        super().__init__()
+        self._managed = {}
+        self._lock = threading.Lock()
+
+    def add_process(self, pid, limit, period_ms=None):
+        with self._lock: self._managed.setdefault(pid, limit)
+
+    def modify_process_limit(self, pid, limit, period_ms=None):
+        with self._lock:
+            if pid in self._managed: self._managed[pid] = limit
+
+    def remove_process(self, pid):
+        with self._lock: self._managed.pop(pid, None)
+
+    def get_managed_pids(self):
+        with self._lock: return list(self._managed)
+
+    def shutdown(self):
+        pass
+
+
+def _writer(limiter, deadline, counts, errors):
+    rng = random.Random()
+    ops = 0
+    while time.monotonic() < deadline:
+        pid = rng.choice(PIDS)
+        action = rng.randrange(5)
+        try:
+            if action == 0: limiter.add(pid=pid, limit_percentage=rng.randrange(10, 95))
+            elif action == 1: limiter.modify_limit(pid=pid, new_limit_percentage=rng.randrange(10, 95))
+            elif action == 2: limiter.stop(pid=pid)
+            elif action == 3: limiter.start(pid=pid)
+            else: limiter.remove(pid=pid)
+        except Exception as e:
+            errors.append(repr(e))
+        ops += 1
+    counts.append(ops)
+
+
+def _reader(limiter, deadline, pause, counts, errors):
+    ops = 0
+    while time.monotonic() < deadline:
+        try:
+            for info in limiter.get_active(): info['limit_percentage']
+            limiter.get_groups()
+            if pause: time.sleep(pause)
+        except Exception as e:
+            errors.append(repr(e))
+        ops += 1
+    counts.append(ops)
+
+
+def main():
+    writers = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    readers = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    pause = float(sys.argv[3]) / 1000.0 if len(sys.argv) > 3 else 0.001
+    engine = _RecordingEngine()
+    limiter = CpuLimiter(engine=engine)
+    limiter.add_listener(lambda event: None)
+    for pid in PIDS[:250]: limiter.add(pid=pid, limit_percentage=50)
+    limiter.start_all()
+
+    write_counts, read_counts, errors = [], [], []
+    deadline = time.monotonic() + RUN_SECONDS
+    threads = [threading.Thread(target=_writer, args=(limiter, deadline, write_counts, errors)) for _ in range(writers)]
+    threads += [threading.Thread(target=_reader, args=(limiter, deadline, pause, read_counts, errors)) for _ in range(readers)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+
+    active = {info['pid'] for info in limiter.get_active()}
+    consistent = active == set(engine.get_managed_pids())
+    print(f"writers={writers} readers={readers} seconds={RUN_SECONDS}")
+    print(f"writes/s: {sum(write_counts) / RUN_SECONDS:,.0f}")
+    print(f"reads/s:  {sum(read_counts) / RUN_SECONDS:,.0f}")
+    print(f"errors:   {len(errors)}{' e.g. ' + errors[0] if errors else ''}")
+    print(f"engine consistent with get_active(): {consistent} ({len(active)} active)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Scheduler Tick Scaling Benchmark
+
+Shows that the cost of an engine wakeup depends on how many processes change
+state, not on how many processes are managed. The scheduler runs against no-op
+suspend/resume calls, so only the scheduling work itself is measured.
+
+Usage:
+    python benchmarks/bench_tick_scaling.py
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # This checkout, installed or not
+
+from cpulimiter.backends import ScheduledEngine
+
+SIZES = [10, 100, 1000, 5000]
+RUN_SECONDS = 2.0
+LIMIT_PERCENTAGE = 50
+
+
+class _NullEngine(ScheduledEngine):
+    """A scheduler whose suspend/resume calls do nothing, with per-tick timing."""
+    name = "null"
+
+    def __init__(self):
+        super().__init__()
+        self.ticks = 0
+        self.transitions = 0
+        self.busy_seconds = 0.0
+
+    def _suspend(self, pid, handle):
+        self.transitions += 1
+        return True
+
+    def _resume(self, pid, handle):
+        self.transitions += 1
+        return True
+
+    def _run_due(self, now):
+        start = time.perf_counter()
+        next_wakeup = super()._run_due(now)
+        self.busy_seconds += time.perf_counter() - start
+        self.ticks += 1
+        return next_wakeup
+
+
+def run(size):
+    engine = _NullEngine()
+    for pid in range(1, size + 1):
+        engine.add_process(pid, LIMIT_PERCENTAGE)
+    time.sleep(RUN_SECONDS)
+    with engine._lock:
+        ticks, transitions, busy = engine.ticks, engine.transitions, engine.busy_seconds
+    engine.shutdown()
+    return {
+        "managed": size,
+        "ticks": ticks,
+        "transitions": transitions,
+        "us_per_tick": busy / max(ticks, 1) * 1e6,
+        "us_per_transition": busy / max(transitions, 1) * 1e6,
+    }
+
+
+def main():
+    print(f"{'managed':>8} {'ticks':>8} {'transitions':>12} {'us/tick':>10} {'us/transition':>14}")
+    for size in SIZES:
+        r = run(size)
+        print(f"{r['managed']:>8} {r['ticks']:>8} {r['transitions']:>12} {r['us_per_tick']:>10.1f} {r['us_per_transition']:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
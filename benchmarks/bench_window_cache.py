@@ -0,0 +1,100 @@
+"""
+Window Cache Benchmark
+
+Polls a simulated desktop of 60 visible windows owned by 30 real (idle) processes and
+compares the cost of one poll:
+- uncached: a `GetWindowThreadProcessId` and a `psutil.Process(pid).name()` per window,
+  which is what `get_active_app_pids` used to do,
+- `get_active_app_pids` served from the `WindowCache`,
+- `AppTracker.changes()` when nothing changed.
+
+The window enumeration itself is simulated, so it runs anywhere and only measures the
+work done on top of it.
+
+Usage:
+    python benchmarks/bench_window_cache.py [processes]
+"""
+
+import os
+import subprocess
+import sys
+import timeit
+
+import psutil
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # This checkout, installed or not
+
+from cpulimiter import utils
+from cpulimiter.utils import AppTracker, WindowCache
+
+PROCESSES = 30
+WINDOWS_PER_PROCESS = 2
+SLEEPER = [sys.executable, "-c", "import time; time.sleep(120)"]
+
+
+class _Window:
+    def __init__(self, hwnd, title):
+        self._hWnd = hwnd
+        self.title = title
+        self.visible = True
+
+
+class _FakeDesktop:
+    """Stands in for pygetwindow and win32process."""
+    PyGetWindowException = Exception
+
+    def __init__(self, pids):
+        self.owner = {}
+        self.windows = []
+        for i, pid in enumerate(pids):
+            for j in range(WINDOWS_PER_PROCESS):
+                hwnd = 0x10000 + i * WINDOWS_PER_PROCESS + j
+                self.owner[hwnd] = pid
+                self.windows.append(_Window(hwnd, f"Window {i}.{j}"))
+
+    def getAllWindows(self):
+        return list(self.windows)
+
+    def GetWindowThreadProcessId(self, hwnd):
+        return 1, self.owner[hwnd]
+
+
+def _uncached(desktop):
+    active_apps = {}
+    for window in desktop.getAllWindows():
+        if window.visible and window.title:
+            _, pid = desktop.GetWindowThreadProcessId(window._hWnd)
+            if pid not in active_apps:
+                try: active_apps[pid] = {'name': psutil.Process(pid).name(), 'title': window.title}
+                except (psutil.NoSuchProcess, psutil.AccessDenied): continue
+    return active_apps
+
+
+def _time_us(func, number):
+    return timeit.timeit(func, number=number) / number * 1e6
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else PROCESSES
+    workers = [subprocess.Popen(SLEEPER) for _ in range(count)]
+    try:
+        desktop = _FakeDesktop([worker.pid for worker in workers])
+        utils._window_modules = (desktop, desktop)
+        cache = WindowCache()
+        tracker = AppTracker(cache)
+        assert cache.apps() == _uncached(desktop)
+        tracker.changes()
+        assert not any(tracker.changes())
+
+        print(f"{len(desktop.windows)} windows, {count} processes")
+        print(f"{'poll':<28}{'us/poll':>12}")
+        print(f"{'uncached':<28}{_time_us(lambda: _uncached(desktop), 200):>12.1f}")
+        print(f"{'cached':<28}{_time_us(cache.apps, 2000):>12.1f}")
+        print(f"{'changes(), none':<28}{_time_us(tracker.changes, 2000):>12.1f}")
+    finally:
+        for worker in workers: worker.kill()
+        for worker in workers: worker.wait()
+
+
+if __name__ == "__main__":
+    main()
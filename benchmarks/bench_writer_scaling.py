@@ -0,0 +1,63 @@
+"""
+Writer Scaling Benchmark
+
+Times the public `start` / `stop` path of a CpuLimiter holding 100 to 10k managed
+entries: a no-op `stop()` of an inactive PID, and a `stop()` + `start()` pair of an
+active one. A write should cost the same whatever the size of the managed set; only
+the first `get_active()` after a change copies the state, which is timed separately.
+
+The engine does nothing, so the numbers are the limiter's own overhead.
+
+Usage:
+    python benchmarks/bench_writer_scaling.py [sizes...]
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # This checkout, installed or not
+
+from cpulimiter import CpuLimiter
+from cpulimiter.backends import Engine
+
+SIZES = (100, 1_000, 10_000)
+FIRST_PID = 4_000_000  # Far above pid_max, so they can never be real processes
+
+
+class _NullEngine(Engine):
+    name = "null"
+
+    def add_process(self, pid, limit, period_ms=None): pass
+    def modify_process_limit(self, pid, limit, period_ms=None): pass
+    def remove_process(self, pid): pass
+    def get_managed_pids(self): return []
+    def shutdown(self): pass
+
+
+def _time_us(func, number):
+    return timeit.timeit(func, number=number) / number * 1e6
+
+
+def _limiter(size):
+    limiter = CpuLimiter(engine=_NullEngine())
+    for pid in range(FIRST_PID, FIRST_PID + size): limiter.add(pid=pid, limit_percentage=50)
+    limiter.start_all()
+    limiter.add(pid=FIRST_PID + size, limit_percentage=50)  # Added but never started
+    return limiter
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or SIZES
+    print(f"{'managed':>8}{'no-op stop us':>16}{'stop+start us':>16}{'read after us':>16}")
+    for size in sizes:
+        limiter = _limiter(size)
+        idle, busy = FIRST_PID + size, FIRST_PID
+        noop = _time_us(lambda: limiter.stop(pid=idle), 20000)
+        pair = _time_us(lambda: (limiter.stop(pid=busy), limiter.start(pid=busy)), 10000)
+        read = _time_us(lambda: (limiter.stop(pid=idle), limiter.get_active()), 200)
+        print(f"{size:>8}{noop:>16.2f}{pair:>16.2f}{read:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
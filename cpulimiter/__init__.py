@@ -1,17 +1,47 @@
 """
-cpulimiter - A simple, lightweight Python library for Windows to limit CPU usage of processes.
+cpulimiter - A simple, lightweight Python library for Windows and Linux to limit CPU usage of processes.
 """
 
 __version__ = "1.0.3"
 __author__ = "Ahmed Ashraf"
 
-from .limiter import CpuLimiter
-from .utils import get_active_window_info, get_active_app_pids
-from . import limiter_legacy
+import importlib
+
+# Public names and the submodule that defines them. They are imported on first access,
+# so `import cpulimiter` stays cheap and never starts an engine.
+_LAZY = {
+    "CpuLimiter": ".limiter",
+    "LimiterEvent": ".limiter",
+    "set_default_period": ".limiter",
+    "AsyncCpuLimiter": ".aio",
+    "Budget": ".budgets",
+    "AutoSaver": ".autosaver",
+    "get_active_window_info": ".utils",
+    "get_active_app_pids": ".utils",
+    "AppTracker": ".utils",
+    "limiter_legacy": None,
+}
+
+def __getattr__(name):
+    if name not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module = _LAZY[name]
+    value = importlib.import_module(f".{name}", __name__) if module is None else getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
 
 __all__ = [
     "CpuLimiter",
+    "AsyncCpuLimiter",
+    "Budget",
+    "AutoSaver",
+    "LimiterEvent",
+    "set_default_period",
     "get_active_window_info",
     "get_active_app_pids",
+    "AppTracker",
     "limiter_legacy"
-]
\ No newline at end of file
+]
@@ -0,0 +1,106 @@
+"""
+asyncio front-end for `CpuLimiter`.
+
+`CpuLimiter` calls block: `add(process_name=...)` looks processes up, window
+lookups enumerate every window, and engines take locks. `AsyncCpuLimiter` runs
+every call on an executor so the event loop never stalls, and turns the
+limiter's events (rule attachments, process exits) into an async iterator:
+
+    limiter = AsyncCpuLimiter()
+    await limiter.add_rule(process_name="ffmpeg", limit_percentage=90)
+    async for event in limiter.events():
+        print(event.kind, event.pid)
+"""
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from .limiter import CpuLimiter
+
+DEFAULT_EXIT_POLL_INTERVAL = 0.5
+
+
+class AsyncCpuLimiter:
+    """
+    Awaitable wrapper around a `CpuLimiter`. Every method takes the same arguments as its
+    `CpuLimiter` counterpart. By default, calls run one at a time on a dedicated worker
+    thread, so they are applied in the order they were awaited.
+    """
+
+    def __init__(self, engine=None, executor=None, exit_poll_interval=DEFAULT_EXIT_POLL_INTERVAL):
+        self.limiter = CpuLimiter(engine=engine)
+        self._own_executor = executor is None
+        self._executor = executor if executor is not None else ThreadPoolExecutor(max_workers=1, thread_name_prefix="cpulimiter-async")
+        self.exit_poll_interval = exit_poll_interval
+        self._subscribers = set()
+        self._poller = None
+        self.limiter.add_listener(self._dispatch)
+
+    async def _call(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    # --- Limiter API ---
+    async def add(self, *args, **kwargs): return await self._call(self.limiter.add, *args, **kwargs)
+    async def remove(self, *args, **kwargs): return await self._call(self.limiter.remove, *args, **kwargs)
+    async def start(self, *args, **kwargs): return await self._call(self.limiter.start, *args, **kwargs)
+    async def stop(self, *args, **kwargs): return await self._call(self.limiter.stop, *args, **kwargs)
+    async def modify_limit(self, *args, **kwargs): return await self._call(self.limiter.modify_limit, *args, **kwargs)
+    async def set_period(self, *args, **kwargs): return await self._call(self.limiter.set_period, *args, **kwargs)
+    async def start_all(self): return await self._call(self.limiter.start_all)
+    async def stop_all(self): return await self._call(self.limiter.stop_all)
+    async def add_group(self, *args, **kwargs): return await self._call(self.limiter.add_group, *args, **kwargs)
+    async def start_group(self, group_name): return await self._call(self.limiter.start_group, group_name)
+    async def stop_group(self, group_name): return await self._call(self.limiter.stop_group, group_name)
+    async def remove_group(self, group_name): return await self._call(self.limiter.remove_group, group_name)
+    async def add_budget(self, budget): return await self._call(self.limiter.add_budget, budget)
+    async def remove_budget(self, name): return await self._call(self.limiter.remove_budget, name)
+    async def add_rule(self, *args, **kwargs): return await self._call(self.limiter.add_rule, *args, **kwargs)
+    async def update_rule(self, rule, *args, **kwargs): return await self._call(self.limiter.update_rule, rule, *args, **kwargs)
+    async def remove_rule(self, rule): return await self._call(self.limiter.remove_rule, rule)
+    async def get_active(self): return await self._call(self.limiter.get_active)
+    async def get_stats(self): return await self._call(self.limiter.get_stats)
+    async def prune_exited(self): return await self._call(self.limiter.prune_exited)
+
+    # --- Events ---
+    def _dispatch(self, event):
+        """Limiter listener: runs on a background thread and hands the event to every subscriber's loop."""
+        for loop, queue in list(self._subscribers):
+            try: loop.call_soon_threadsafe(queue.put_nowait, event)
+            except RuntimeError: pass  # That loop is closed.
+
+    async def _poll_exits(self):
+        # Exits of processes added by hand are only noticed by looking; rule-attached ones arrive on their own.
+        while self._subscribers:
+            await self.prune_exited()
+            await asyncio.sleep(self.exit_poll_interval)
+        self._poller = None
+
+    async def events(self):
+        """
+        Async iterator over `LimiterEvent`s: "attached" when a rule starts limiting a new process,
+        "exited" when a managed process goes away. Each iterator gets every event from the moment it starts.
+        """
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue())
+        self._subscribers.add(subscriber)
+        if self._poller is None: self._poller = asyncio.ensure_future(self._poll_exits())
+        try:
+            while True:
+                yield await subscriber[1].get()
+        finally:
+            self._subscribers.discard(subscriber)
+
+    # --- Lifecycle ---
+    async def aclose(self):
+        """Removes every rule, stops limiting everything and releases the executor."""
+        await self._call(self.limiter.shutdown)
+        self.limiter.remove_listener(self._dispatch)
+        self._subscribers.clear()
+        if self._poller is not None: self._poller.cancel()
+        if self._own_executor: self._executor.shutdown(wait=False)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
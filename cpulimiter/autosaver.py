@@ -0,0 +1,337 @@
+"""
+Foreground-aware auto-saver: limits the applications you are not using and gives an
+application its full speed back the moment you switch to it.
+
+    from cpulimiter.autosaver import AutoSaver
+
+    saver = AutoSaver(limit_percentage=98, inactivity_threshold=10, ignore={"explorer.exe"})
+    saver.start()
+    ...
+    saver.close()   # every application runs at full speed again
+
+Where focus comes from is pluggable (a `FocusSource`): `WinEventFocusSource` is told by
+Windows when the foreground window changes, `PollingFocusSource` asks for it a few times a
+second, and `FakeFocusSource` is driven by hand, for tests. Focus changes are applied as
+they arrive; the list of visible applications is refreshed every `interval` seconds.
+
+Applications are tracked by process name, each one as a limiter group (see
+`CpuLimiter.add_group`), so processes an application starts later are limited too.
+The saver remembers what it applied and only hands the limiter the differences.
+"""
+import ctypes
+import ctypes.wintypes
+import os
+import threading
+import time
+
+from .limiter import CpuLimiter, logger
+from .utils import get_active_app_pids, get_active_window_info, get_window_cache
+
+DEFAULT_INTERVAL = 2.0  # Seconds between refreshes of the visible applications
+DEFAULT_FOCUS_INTERVAL = 0.25  # Seconds between foreground checks of `PollingFocusSource`
+DEFAULT_INACTIVITY_THRESHOLD = 10.0
+DEFAULT_RELEASE_DELAY = 5.0
+GROUP_PREFIX = "autosaver:"
+
+# Windows API constants
+EVENT_SYSTEM_FOREGROUND = 0x0003
+WINEVENT_OUTOFCONTEXT = 0x0000
+WM_QUIT = 0x0012
+
+
+class FocusSource:
+    """
+    Tells the auto-saver which applications are on screen and which one has the focus.
+    Applications are described like `get_active_window_info()` does: `{'pid', 'name', 'title'}`.
+    """
+
+    def apps(self):
+        """`{pid: {'name', 'title'}}` for every application with a visible window."""
+        raise NotImplementedError
+
+    def foreground(self):
+        """The focused application, or None."""
+        raise NotImplementedError
+
+    def watch(self, callback):
+        """Starts calling `callback(info)` (from any thread) whenever the focused application changes."""
+        raise NotImplementedError
+
+    def close(self):
+        """Stops watching."""
+
+
+class PollingFocusSource(FocusSource):
+    """Checks the foreground window every `focus_interval` seconds, on a background thread."""
+
+    def __init__(self, focus_interval=DEFAULT_FOCUS_INTERVAL):
+        self.focus_interval = focus_interval
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def apps(self):
+        return get_active_app_pids()
+
+    def foreground(self):
+        return get_active_window_info()
+
+    def watch(self, callback):
+        def loop():
+            last = None
+            while not self._stopped.wait(self.focus_interval):
+                info = self.foreground()
+                key = None if info is None else info['pid']
+                if key != last:
+                    last = key
+                    callback(info)
+        self._stopped.clear()
+        self._thread = threading.Thread(target=loop, name="cpulimiter-focus", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self._stopped.set()
+
+
+class WinEventFocusSource(PollingFocusSource):
+    """
+    Event-driven focus tracking: a `SetWinEventHook(EVENT_SYSTEM_FOREGROUND)` hook on a
+    background thread is called by Windows on every foreground change, so nothing polls.
+    """
+
+    def __init__(self):
+        if os.name != "nt": raise OSError("Foreground events are only available on Windows.")
+        super().__init__()
+        self._thread_id = None
+
+    def _window_info(self, hwnd):
+        user32 = ctypes.windll.user32
+        length = user32.GetWindowTextLengthW(hwnd)
+        title = ctypes.create_unicode_buffer(length + 1)
+        user32.GetWindowTextW(hwnd, title, length + 1)
+        return get_window_cache().window_info(hwnd, title.value)
+
+    def watch(self, callback):
+        user32 = ctypes.windll.user32
+        WinEventProc = ctypes.WINFUNCTYPE(None, ctypes.wintypes.HANDLE, ctypes.wintypes.DWORD, ctypes.wintypes.HWND,
+                                          ctypes.wintypes.LONG, ctypes.wintypes.LONG, ctypes.wintypes.DWORD, ctypes.wintypes.DWORD)
+
+        def on_event(hook, event, hwnd, id_object, id_child, thread, time_ms):
+            if hwnd: callback(self._window_info(hwnd))
+
+        started = threading.Event()
+
+        def loop():
+            proc = WinEventProc(on_event)  # Referenced until the hook is gone.
+            hook = user32.SetWinEventHook(EVENT_SYSTEM_FOREGROUND, EVENT_SYSTEM_FOREGROUND, 0, proc, 0, 0, WINEVENT_OUTOFCONTEXT)
+            self._thread_id = ctypes.windll.kernel32.GetCurrentThreadId()
+            started.set()
+            if not hook:
+                logger.error("❌ Could not install the foreground event hook.")
+                return
+            msg = ctypes.wintypes.MSG()
+            while user32.GetMessageW(ctypes.byref(msg), 0, 0, 0) > 0:  # Hook callbacks are delivered while waiting here.
+                user32.TranslateMessage(ctypes.byref(msg))
+                user32.DispatchMessageW(ctypes.byref(msg))
+            user32.UnhookWinEvent(hook)
+
+        self._thread = threading.Thread(target=loop, name="cpulimiter-focus", daemon=True)
+        self._thread.start()
+        started.wait()
+
+    def close(self):
+        if self._thread_id is not None:
+            ctypes.windll.user32.PostThreadMessageW(self._thread_id, WM_QUIT, 0, 0)
+            self._thread_id = None
+
+
+class FakeFocusSource(FocusSource):
+    """A focus source driven by hand: `set_apps()` and `focus()` stand in for the desktop."""
+
+    def __init__(self, apps=None):
+        self._apps = dict(apps or {})
+        self._foreground = None
+        self._callback = None
+
+    def set_apps(self, apps):
+        """Replaces the visible applications, `{pid: {'name', 'title'}}`."""
+        self._apps = dict(apps)
+
+    def focus(self, pid):
+        """Gives the focus to `pid` (None: to nothing) and reports it like a real source would."""
+        app = self._apps.get(pid)
+        self._foreground = None if app is None else dict(app, pid=pid)
+        if self._callback is not None: self._callback(self._foreground)
+
+    def apps(self):
+        return dict(self._apps)
+
+    def foreground(self):
+        return self._foreground
+
+    def watch(self, callback):
+        self._callback = callback
+
+    def close(self):
+        self._callback = None
+
+
+def default_focus_source():
+    """The event-driven source where it is available, polling otherwise."""
+    try:
+        return WinEventFocusSource()
+    except OSError:
+        return PollingFocusSource()
+
+
+class AutoSaver:
+    """
+    Limits every visible application that has not had the focus for `inactivity_threshold`
+    seconds by `limit_percentage` (or its entry in `limits`, keyed by process name), except
+    those in `ignore`. Names are compared case-insensitively.
+
+    Two delays keep applications from being limited and released over and over: an
+    application is only limited once it has been out of focus for `inactivity_threshold`
+    seconds, so switching back and forth between windows leaves both at full speed; and
+    a limited application whose windows disappear (minimized to the tray, or reopening a
+    window) keeps its limit for `release_delay` seconds before it is released. Gaining the
+    focus always releases an application at once.
+
+    `on_change(limited)` is called with `{name: limit}` after every change to what is limited.
+    """
+
+    def __init__(self, limiter=None, source=None, limit_percentage=98, inactivity_threshold=DEFAULT_INACTIVITY_THRESHOLD,
+                 release_delay=DEFAULT_RELEASE_DELAY, interval=DEFAULT_INTERVAL, ignore=(), limits=None, on_change=None, clock=time.monotonic):
+        self.limiter = limiter if limiter is not None else CpuLimiter()
+        self.source = source if source is not None else default_focus_source()
+        self.interval = interval
+        self.release_delay = release_delay
+        self._clock = clock
+        self._on_change = on_change
+        self._lock = threading.RLock()
+        self._wakeup = threading.Condition(self._lock)
+        self._settings = {}
+        self.configure(limit_percentage, inactivity_threshold, ignore, limits or {})
+        self.focused = None  # Lower-case name of the focused application
+        self._last_focused = {}  # name -> when it last had the focus
+        self._last_seen = {}  # name -> when it last had a visible window
+        self._applied = {}  # name -> limit handed to the limiter
+        self._thread = None
+        self._running = False
+
+    def configure(self, limit_percentage=None, inactivity_threshold=None, ignore=None, limits=None):
+        """Changes the settings given; the next refresh applies them (only what they change)."""
+        with self._lock:
+            if limit_percentage is not None: self._settings['limit_percentage'] = limit_percentage
+            if inactivity_threshold is not None: self._settings['inactivity_threshold'] = inactivity_threshold
+            if ignore is not None: self._settings['ignore'] = {name.lower() for name in ignore}
+            if limits is not None: self._settings['limits'] = {name.lower(): limit for name, limit in limits.items()}
+            self._wakeup.notify()
+
+    # --- Lifecycle ---
+    def start(self):
+        """Starts watching the focus and refreshing in the background."""
+        with self._lock:
+            if self._running: return
+            self._running = True
+        self.source.watch(self._on_focus)
+        self._on_focus(self.source.foreground())
+        self._thread = threading.Thread(target=self._loop, name="cpulimiter-autosaver", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        """Stops the saver and releases every application it limited."""
+        with self._lock:
+            self._running = False
+            self._wakeup.notify()
+        self.source.close()
+        with self._lock:
+            changed = self._apply({})
+        if changed: self._notify()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _loop(self):
+        while True:
+            with self._lock:
+                if not self._running: return
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"❌ Auto-saver refresh failed: {e}")
+            with self._lock:
+                if self._running: self._wakeup.wait(self.interval)
+
+    # --- State ---
+    def get_limited(self):
+        """`{name: limit}` of the applications limited right now."""
+        with self._lock:
+            return dict(self._applied)
+
+    def _on_focus(self, info):
+        """Focus source callback: releases the newly focused application immediately."""
+        now = self._clock()
+        with self._lock:
+            if self.focused is not None: self._last_focused[self.focused] = now  # It had the focus until now.
+            self.focused = None if info is None or not info.get('name') else info['name'].lower()
+            changed = False
+            if self.focused is not None:
+                self._last_focused[self.focused] = now
+                self._last_seen[self.focused] = now
+                if self.focused in self._applied:
+                    changed = self._apply({name: limit for name, limit in self._applied.items() if name != self.focused})
+        if changed: self._notify()
+
+    def refresh(self, now=None):
+        """
+        Re-reads the visible applications and limits or releases what changed.
+        Runs every `interval` seconds once started (and does nothing unless started); `now` overrides the clock.
+        """
+        apps = self.source.apps()
+        now = self._clock() if now is None else now
+        with self._lock:
+            # `close()` may have released everything while the applications were being read.
+            if not self._running: return
+            if self.focused is not None: self._last_focused[self.focused] = now
+            for app in apps.values():
+                if app.get('name'): self._last_seen[app['name'].lower()] = now
+            for name in [n for n, seen in self._last_seen.items() if now - seen > self.release_delay]:
+                del self._last_seen[name]
+                self._last_focused.pop(name, None)
+            changed = self._apply(self._desired(now))
+        if changed: self._notify()
+
+    def _desired(self, now):
+        """`{name: limit}` that should be limited at `now` (called with `_lock` held)."""
+        settings = self._settings
+        desired = {}
+        for name in self._last_seen:
+            if name == self.focused or name in settings['ignore']: continue
+            if now - self._last_focused.get(name, float("-inf")) <= settings['inactivity_threshold']: continue
+            desired[name] = settings['limits'].get(name, settings['limit_percentage'])
+        return desired
+
+    def _apply(self, desired):
+        """Hands the limiter only the differences between `desired` and what is applied. Returns True if any."""
+        released = [name for name in self._applied if name not in desired]
+        changed = [(name, limit) for name, limit in desired.items() if self._applied.get(name) != limit]
+        for name in released:
+            self.limiter.remove_group(GROUP_PREFIX + name)
+            del self._applied[name]
+            logger.info(f"🔓 Released {name}.")
+        for name, limit in changed:
+            # A new group starts limiting; an existing one only has its limit changed.
+            self.limiter.add_group(GROUP_PREFIX + name, process_name=name, include_children=False, limit_percentage=limit)
+            if name not in self._applied: self.limiter.start_group(GROUP_PREFIX + name)
+            self._applied[name] = limit
+            logger.info(f"🔒 Limited {name} by {limit}%.")
+        return bool(released or changed)
+
+    def _notify(self):
+        if self._on_change is None: return
+        try: self._on_change(self.get_limited())
+        except Exception as e: logger.error(f"❌ Auto-saver listener failed: {e}")
@@ -0,0 +1,48 @@
+"""
+Engine backends for cpulimiter.
+
+Every backend implements the small `Engine` interface (add / modify / remove /
+list), so `CpuLimiter` works the same way no matter which one is doing the work:
+
+- `WindowsEngine`: the native C++ engine (`limiter_engine.dll`).
+- `ThreadEngine`: a pure-Python Windows engine that suspends thread by thread (used when the DLL can't be loaded).
+- `CgroupEngine`: kernel-enforced cgroup v2 `cpu.max` limits on Linux, with no scheduler thread at all.
+- `SignalEngine`: a single-threaded SIGSTOP/SIGCONT duty-cycle engine for Linux and other POSIX systems.
+"""
+import os
+
+from .base import Engine, EngineStats, ProcessStats, DEFAULT_CYCLE_MS, logger
+from .cgroup import CgroupEngine
+from .scheduler import ScheduledEngine
+from .signals import SignalEngine
+from .threads import ThreadEngine
+
+
+def get_default_engine():
+    """Creates the best engine available on this platform."""
+    if os.name == "nt":
+        from .windows import WindowsEngine
+        try:
+            return WindowsEngine()
+        except RuntimeError as e:
+            logger.warning(f"C++ engine unavailable ({e}), falling back to the thread engine.")
+            return ThreadEngine()
+    if os.path.isdir("/proc"):
+        try:
+            return CgroupEngine()
+        except OSError as e:
+            logger.info(f"cgroup v2 engine unavailable ({e}), falling back to signals.")
+    return SignalEngine()
+
+
+__all__ = [
+    "Engine",
+    "EngineStats",
+    "ProcessStats",
+    "CgroupEngine",
+    "ScheduledEngine",
+    "SignalEngine",
+    "ThreadEngine",
+    "get_default_engine",
+    "DEFAULT_CYCLE_MS",
+]
@@ -0,0 +1,136 @@
+import logging
+from collections import namedtuple
+
+logger = logging.getLogger("cpulimiter")
+
+# The duty cycle used by every engine unless told otherwise. This must stay
+# consistent with the C++ engine's `g_default_cycle_ms`.
+DEFAULT_CYCLE_MS = 200.0
+MIN_CYCLE_MS = 2.0
+
+
+# Per-process counters, as returned by `Engine.get_process_stats()`:
+# - cycles: completed suspend/resume cycles (cgroup: enforcement periods)
+# - suspended_s: total time spent suspended (cgroup: throttled time)
+# - failed_suspends: suspend calls that failed (the process is dropped after one)
+# - since_last_change_s: seconds since the last suspend/resume (None if unknown)
+# - configured_duty / measured_duty: fraction of time suspended, as set and as observed
+ProcessStats = namedtuple("ProcessStats", "pid limit period_ms cycles suspended_s failed_suspends since_last_change_s configured_duty measured_duty")
+
+# Engine-wide counters, as returned by `Engine.get_engine_stats()`. Lateness is how long
+# after its deadline a state change ran; lock hold is how long each tick held the engine lock.
+EngineStats = namedtuple("EngineStats", "managed ticks lateness_avg_ms lateness_p99_ms lock_hold_avg_us lock_hold_max_us failed_suspends")
+
+
+def _split_item(item):
+    """Unpacks a batch item: `(pid, limit)` or `(pid, limit, period_ms)`."""
+    if len(item) == 2: return item[0], item[1], None
+    return item[0], item[1], item[2]
+
+
+def _duty_times(limit_percentage, cycle_ms=DEFAULT_CYCLE_MS):
+    """Splits a cycle into (suspend_ms, resume_ms), clamped like the C++ engine."""
+    suspend_ms = cycle_ms * (limit_percentage / 100.0)
+    resume_ms = cycle_ms - suspend_ms
+    if resume_ms < 1: resume_ms = 1
+    if suspend_ms < 1: suspend_ms = 1
+    return suspend_ms, resume_ms
+
+
+class Engine:
+    """
+    The interface `CpuLimiter` talks to.
+
+    It mirrors the functions exported by the C++ engine (`AddProcess`,
+    `ModifyProcessLimit`, `RemoveProcess` and `GetManagedPids`) so that every
+    backend can be swapped in without changing the limiter itself.
+
+    `period_ms` is the length of one suspend/resume cycle. Short periods give
+    shorter pauses (good for latency-sensitive services), long periods mean
+    fewer context switches and limiter wakeups (good for batch jobs).
+    """
+    name = "base"
+
+    def __init__(self, period_ms=DEFAULT_CYCLE_MS):
+        self.default_period_ms = float(period_ms)
+        self._groups = {}
+
+    def set_default_period(self, period_ms):
+        """Sets the period used by processes added without an explicit `period_ms`."""
+        self.default_period_ms = max(MIN_CYCLE_MS, float(period_ms))
+
+    def add_process(self, pid, limit, period_ms=None):
+        """Starts limiting `pid`. Adding an already managed PID is a no-op."""
+        raise NotImplementedError
+
+    def modify_process_limit(self, pid, limit, period_ms=None):
+        """Changes the limit (and, if given, the period) of a managed PID. Unknown PIDs are ignored."""
+        raise NotImplementedError
+
+    def remove_process(self, pid):
+        """Stops limiting `pid` and makes sure it is left running."""
+        raise NotImplementedError
+
+    # --- Batch API ---
+    # Engines override these to do the whole batch in one call / lock acquisition.
+    def add_many(self, items):
+        """Adds every `(pid, limit)` or `(pid, limit, period_ms)` item in `items`."""
+        for item in items: self.add_process(*_split_item(item))
+
+    def modify_many(self, items):
+        """Changes every `(pid, limit)` or `(pid, limit, period_ms)` item in `items`."""
+        for item in items: self.modify_process_limit(*_split_item(item))
+
+    def remove_many(self, pids):
+        """Removes every PID in `pids`."""
+        for pid in pids: self.remove_process(pid)
+
+    # --- Groups ---
+    # A group is a set of processes limited as one unit (e.g. a process tree).
+    # Engines that can, switch every member in the same tick or put them under
+    # one kernel budget. This fallback limits each member on its own.
+    def add_group(self, group_id, pids, limit, period_ms=None):
+        """Starts limiting `pids` as the group `group_id`."""
+        if group_id in self._groups: return
+        self._groups[group_id] = {"pids": set(pids), "limit": limit, "period_ms": period_ms}
+        self.add_many([(pid, limit, period_ms) for pid in pids])
+
+    def modify_group_limit(self, group_id, limit, period_ms=None):
+        """Changes the limit (and, if given, the period) shared by a group."""
+        group = self._groups.get(group_id)
+        if group is None: return
+        group["limit"] = limit
+        if period_ms is not None: group["period_ms"] = period_ms
+        self.modify_many([(pid, limit, period_ms) for pid in group["pids"]])
+
+    def set_group_members(self, group_id, pids):
+        """Replaces a group's members. Leaving processes are resumed, joining ones are limited."""
+        group = self._groups.get(group_id)
+        if group is None: return
+        pids = set(pids)
+        self.remove_many(group["pids"] - pids)
+        self.add_many([(pid, group["limit"], group["period_ms"]) for pid in pids - group["pids"]])
+        group["pids"] = pids
+
+    def remove_group(self, group_id):
+        """Stops limiting every member of a group."""
+        group = self._groups.pop(group_id, None)
+        if group is not None: self.remove_many(group["pids"])
+
+    def get_managed_pids(self):
+        """Returns the list of PIDs the engine is currently limiting."""
+        raise NotImplementedError
+
+    # --- Stats ---
+    # Cheap enough to poll every second: engines only copy their counters under the lock.
+    def get_process_stats(self):
+        """Returns a `ProcessStats` for every managed PID (empty if the engine keeps no counters)."""
+        return []
+
+    def get_engine_stats(self):
+        """Returns the engine's `EngineStats`, or None if it keeps no counters."""
+        return None
+
+    def shutdown(self):
+        """Resumes every managed process and releases the engine's resources."""
+        raise NotImplementedError
@@ -0,0 +1,289 @@
+import os
+import threading
+import time
+
+from .base import Engine, EngineStats, ProcessStats, _split_item, logger
+from ..proctable import process_create_time, same_process
+
+CGROUP_ROOT = "/sys/fs/cgroup"
+DEFAULT_PERIOD_MS = 100.0  # The kernel's own default `cpu.max` period.
+MIN_QUOTA_US = 1000  # The smallest quota/period the kernel accepts in `cpu.max`.
+MAX_PERIOD_US = 1000000
+
+
+def _write(path, value):
+    with open(path, "w") as f:
+        f.write(str(value))
+
+
+def _read_cpu_stat(path):
+    """The counters in `<path>/cpu.stat` as a dict (empty if unreadable)."""
+    stats = {}
+    try:
+        with open(os.path.join(path, "cpu.stat")) as f:
+            for line in f:
+                key, _, value = line.partition(" ")
+                if value.strip().isdigit(): stats[key] = int(value)
+    except OSError:
+        pass
+    return stats
+
+
+class CgroupEngine(Engine):
+    """
+    Linux engine that lets the kernel enforce the limit through cgroup v2 `cpu.max`.
+
+    Each target is moved into its own cgroup under `<root>/<group_name>` (or, with
+    `shared=True`, into one cgroup per limit value that all targets with that limit
+    share) and the cgroup's quota/period is set from `limit_percentage` and `period_ms`
+    (clamped to the 1 ms - 1 s range the kernel accepts). There is no
+    userspace timer loop at all: after `add_process` returns, the engine never wakes up.
+    Groups get one cgroup for all their members, so they share a single kernel-enforced
+    budget, and children forked by a member are born inside it.
+
+    `cgroup.procs` only takes bare PIDs, so each target's start time is recorded when it
+    is added and checked before it is moved again: a PID that now belongs to another
+    process is dropped instead of dragging that process between cgroups.
+
+    `root` can point at any directory laid out like a cgroup v2 mount, which makes it
+    easy to exercise the engine against a fake cgroupfs tree. Raises `OSError` if the
+    hierarchy is missing, has no `cpu` controller, or isn't writable.
+    """
+    name = "cgroup"
+
+    def __init__(self, root=CGROUP_ROOT, group_name="cpulimiter", shared=False, period_ms=DEFAULT_PERIOD_MS):
+        super().__init__(period_ms)
+        self.root = root
+        self.base = os.path.join(root, group_name)
+        self.shared = shared
+        self._managed = {}  # pid -> {"cgroup": path, "origin": path, "limit": int, "period_ms": float, "create_time": float}
+        self._members = {}  # cgroup path -> set of pids
+        self._group_info = {}  # group id -> {"cgroup": path, "limit": int, "period_ms": float, "origin": path}
+        self._lock = threading.Lock()
+        self._failed = 0  # Targets that could not be moved into a cgroup
+        self._setup()
+
+    # --- Hierarchy helpers ---
+    def _setup(self):
+        with open(os.path.join(self.root, "cgroup.controllers")) as f:
+            if "cpu" not in f.read().split():
+                raise OSError(f"The cpu controller is not available in {self.root}.")
+        _write(os.path.join(self.root, "cgroup.subtree_control"), "+cpu")
+        os.makedirs(self.base, exist_ok=True)
+        _write(os.path.join(self.base, "cgroup.subtree_control"), "+cpu")
+
+    def _cpu_max(self, limit, period_ms):
+        period_us = min(MAX_PERIOD_US, max(MIN_QUOTA_US, int(period_ms * 1000)))
+        if limit <= 0: return f"max {period_us}"
+        quota = int(period_us * (100 - limit) / 100.0)
+        return f"{max(MIN_QUOTA_US, quota)} {period_us}"
+
+    def _origin_of(self, pid):
+        """The cgroup `pid` lives in right now, so it can be put back on removal."""
+        try:
+            with open(f"/proc/{pid}/cgroup") as f:
+                for line in f:
+                    if line.startswith("0::"):
+                        return os.path.join(self.root, line[3:].strip().lstrip("/"))
+        except OSError:
+            pass
+        return self.root
+
+    def _cgroup_for(self, pid, limit, period_ms):
+        name = f"limit-{limit}-{int(period_ms)}ms" if self.shared else f"pid-{pid}"
+        return os.path.join(self.base, name)
+
+    def _enter(self, pid, limit, period_ms, path=None):
+        if path is None: path = self._cgroup_for(pid, limit, period_ms)
+        os.makedirs(path, exist_ok=True)
+        _write(os.path.join(path, "cpu.max"), self._cpu_max(limit, period_ms))
+        _write(os.path.join(path, "cgroup.procs"), pid)
+        self._members.setdefault(path, set()).add(pid)
+        return path
+
+    def _leave(self, pid, info):
+        if info["create_time"] is not None and same_process(pid, info["create_time"]):  # Never move a process that reused the PID.
+            try:
+                _write(os.path.join(info["origin"], "cgroup.procs"), pid)
+            except OSError:
+                pass  # The process has exited, or its old cgroup is gone.
+        self._release(pid, info["cgroup"], info["period_ms"])
+
+    def _release(self, pid, path, period_ms):
+        """Forgets that `pid` is in `path`, and removes the cgroup once nothing needs it."""
+        members = self._members.get(path, set())
+        members.discard(pid)
+        # A group's cgroup outlives its explicit members: forked children may still be inside.
+        if members or any(g["cgroup"] == path for g in self._group_info.values()): return
+        self._members.pop(path, None)
+        try:
+            os.rmdir(path)
+        except OSError:
+            # Still populated (the process could not be moved out), so at least unthrottle it.
+            try: _write(os.path.join(path, "cpu.max"), self._cpu_max(0, period_ms))
+            except OSError: pass
+
+    # --- Engine interface ---
+    def _add_locked(self, pid, limit, period_ms=None):
+        if pid in self._managed: return
+        if period_ms is None: period_ms = self.default_period_ms
+        create_time = process_create_time(pid)
+        if create_time is None:
+            logger.warning(f"⚠️ PID {pid} exited before it could be limited; it is not managed.")
+            return
+        origin = self._origin_of(pid)
+        try:
+            path = self._enter(pid, limit, period_ms)
+        except OSError as e:
+            logger.error(f"❌ Could not move PID {pid} into a cgroup: {e}")
+            self._failed += 1
+            return
+        self._managed[pid] = {"cgroup": path, "origin": origin, "limit": limit, "period_ms": period_ms, "create_time": create_time, "added_at": time.monotonic()}
+
+    def _modify_locked(self, pid, limit, period_ms=None):
+        info = self._managed.get(pid)
+        if info is None: return
+        if period_ms is None: period_ms = info["period_ms"]
+        try:
+            if self.shared:
+                # Other targets share the cgroup, so move the process straight into the one for
+                # its new limit: it never passes through its unthrottled origin on the way.
+                path = self._cgroup_for(pid, limit, period_ms)
+                if path != info["cgroup"]:
+                    if not same_process(pid, info["create_time"]):
+                        self._leave(pid, self._managed.pop(pid))  # Exited, or the PID was reused.
+                        return
+                    self._enter(pid, limit, period_ms, path)
+                    self._release(pid, info["cgroup"], info["period_ms"])
+                    info["cgroup"] = path
+            else:
+                _write(os.path.join(info["cgroup"], "cpu.max"), self._cpu_max(limit, period_ms))
+            info["limit"], info["period_ms"] = limit, period_ms
+        except OSError as e:
+            logger.error(f"❌ Could not change the cgroup limit of PID {pid}: {e}")
+
+    def _remove_locked(self, pid):
+        info = self._managed.pop(pid, None)
+        if info is not None: self._leave(pid, info)
+
+    def add_process(self, pid, limit, period_ms=None):
+        with self._lock: self._add_locked(pid, limit, period_ms)
+
+    def modify_process_limit(self, pid, limit, period_ms=None):
+        with self._lock: self._modify_locked(pid, limit, period_ms)
+
+    def remove_process(self, pid):
+        with self._lock: self._remove_locked(pid)
+
+    def add_many(self, items):
+        with self._lock:
+            for item in items: self._add_locked(*_split_item(item))
+
+    def modify_many(self, items):
+        with self._lock:
+            for item in items: self._modify_locked(*_split_item(item))
+
+    def remove_many(self, pids):
+        with self._lock:
+            for pid in pids: self._remove_locked(pid)
+
+    # --- Groups: one cgroup, one shared budget ---
+    def _group_path(self, group_id):
+        safe = "".join(c if c.isalnum() or c in "-_." else "_" for c in str(group_id))
+        return os.path.join(self.base, f"group-{safe}")
+
+    def _join_group(self, group_id, pid):
+        group = self._group_info[group_id]
+        if pid in self._managed: return
+        create_time = process_create_time(pid)
+        if create_time is None: return  # Exited since the group was resolved.
+        origin = self._origin_of(pid)
+        try:
+            self._enter(pid, group["limit"], group["period_ms"], group["cgroup"])
+        except OSError as e:
+            logger.error(f"❌ Could not move PID {pid} into the cgroup of group {group_id}: {e}")
+            self._failed += 1
+            return
+        group.setdefault("origin", origin)
+        self._managed[pid] = {"cgroup": group["cgroup"], "origin": origin, "limit": group["limit"], "period_ms": group["period_ms"], "group": group_id, "create_time": create_time, "added_at": time.monotonic()}
+
+    def add_group(self, group_id, pids, limit, period_ms=None):
+        with self._lock:
+            if group_id in self._group_info: return
+            if period_ms is None: period_ms = self.default_period_ms
+            self._group_info[group_id] = {"cgroup": self._group_path(group_id), "limit": limit, "period_ms": period_ms}
+            for pid in pids: self._join_group(group_id, pid)
+
+    def modify_group_limit(self, group_id, limit, period_ms=None):
+        with self._lock:
+            group = self._group_info.get(group_id)
+            if group is None: return
+            group["limit"] = limit
+            if period_ms is not None: group["period_ms"] = period_ms
+            for info in self._managed.values():
+                if info.get("group") == group_id: info["limit"], info["period_ms"] = limit, group["period_ms"]
+            try:
+                _write(os.path.join(group["cgroup"], "cpu.max"), self._cpu_max(limit, group["period_ms"]))
+            except OSError as e:
+                logger.error(f"❌ Could not change the cgroup limit of group {group_id}: {e}")
+
+    def set_group_members(self, group_id, pids):
+        with self._lock:
+            group = self._group_info.get(group_id)
+            if group is None: return
+            pids = set(pids)
+            current = [p for p, info in self._managed.items() if info.get("group") == group_id]
+            for pid in current:
+                if pid not in pids: self._leave(pid, self._managed.pop(pid))
+            for pid in pids: self._join_group(group_id, pid)
+
+    def remove_group(self, group_id):
+        with self._lock:
+            group = self._group_info.pop(group_id, None)
+            if group is None: return
+            for pid in [p for p, info in self._managed.items() if info.get("group") == group_id]:
+                self._leave(pid, self._managed.pop(pid))
+            # Children forked inside the group's cgroup were never added explicitly; move them out too.
+            try:
+                with open(os.path.join(group["cgroup"], "cgroup.procs")) as f:
+                    stragglers = [int(line) for line in f if line.strip()]
+            except (OSError, ValueError):
+                stragglers = []
+            for pid in stragglers:
+                # Just listed in the group's own cgroup, so the PID is theirs as of now.
+                self._leave(pid, {"cgroup": group["cgroup"], "origin": group.get("origin", self.root), "period_ms": group["period_ms"], "create_time": process_create_time(pid)})
+
+    def get_managed_pids(self):
+        with self._lock:
+            for pid in [p for p, info in self._managed.items() if not same_process(p, info["create_time"])]:
+                self._leave(pid, self._managed.pop(pid))
+            return list(self._managed)
+
+    def get_process_stats(self):
+        """
+        Built from each cgroup's `cpu.stat`: cycles are enforcement periods and suspended
+        time is the time the cgroup spent throttled. Targets sharing a cgroup share its counters.
+        """
+        with self._lock:
+            rows = [(pid, info["cgroup"], info["limit"], info["period_ms"], info["added_at"]) for pid, info in self._managed.items()]
+        now, cache, stats = time.monotonic(), {}, []
+        for pid, path, limit, period_ms, added_at in rows:
+            if path not in cache: cache[path] = _read_cpu_stat(path)
+            counters = cache[path]
+            suspended = counters.get("throttled_usec", 0) / 1e6
+            elapsed = now - added_at
+            stats.append(ProcessStats(pid, limit, period_ms, counters.get("nr_periods", 0), suspended, 0, None, limit / 100.0, min(1.0, suspended / elapsed) if elapsed > 0 else 0.0))
+        return stats
+
+    def get_engine_stats(self):
+        """The kernel does the scheduling, so there are no ticks, lateness or lock hold times to report."""
+        with self._lock:
+            return EngineStats(len(self._managed), 0, 0.0, 0.0, 0.0, 0.0, self._failed)
+
+    def shutdown(self):
+        with self._lock:
+            for pid, info in list(self._managed.items()):
+                self._leave(pid, info)
+            self._managed.clear()
+            try: os.rmdir(self.base)
+            except OSError: pass
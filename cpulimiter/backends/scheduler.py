@@ -0,0 +1,476 @@
+import atexit
+import heapq
+from array import array
+import itertools
+import selectors
+import socket
+import threading
+import time
+
+from .base import Engine, EngineStats, ProcessStats, DEFAULT_CYCLE_MS, MIN_CYCLE_MS, _duty_times, _split_item, logger
+
+LATENESS_WINDOW = 1024  # Lateness samples kept for the p99 (a power of two)
+GOLDEN_RATIO_CONJUGATE = 0.6180339887498949  # Successive multiples (mod 1) stay evenly spread
+_SUSPEND, _RESUME = "suspend", "resume"  # Kinds of queued calls
+
+
+class _Entry:
+    """
+    Scheduling state of one unit (the Python twin of the C++ `ProcessInfo`).
+
+    A unit is either a single process (`key` is its PID) or a group of processes
+    (`key` is `("group", group_id)`) whose members are suspended and resumed together.
+    """
+    __slots__ = ("key", "members", "limit", "period_ms", "suspend_s", "resume_s", "is_suspended", "next_state_change_time", "token", "phase",
+                 "added_at", "last_change", "suspended_at", "suspended_s", "cycles", "failed_suspends")
+
+    def __init__(self, key, limit, period_ms, now):
+        self.key = key
+        self.members = {}  # pid -> process handle (see `ScheduledEngine._open_handle`)
+        self.is_suspended = False
+        self.next_state_change_time = 0.0
+        self.token = 0
+        self.phase = 0.0  # Where in the cycle this unit suspends, as a fraction of its period
+        self.period_ms = period_ms
+        self.set_limit(limit)
+        # Stats
+        self.added_at = self.last_change = self.suspended_at = now
+        self.suspended_s = 0.0
+        self.cycles = 0
+        self.failed_suspends = 0
+
+    @property
+    def is_group(self):
+        return isinstance(self.key, tuple)
+
+    def set_limit(self, limit, period_ms=None):
+        if period_ms is not None: self.period_ms = max(MIN_CYCLE_MS, float(period_ms))
+        self.limit = limit
+        suspend_ms, resume_ms = _duty_times(limit, self.period_ms)
+        self.suspend_s = suspend_ms / 1000.0
+        self.resume_s = resume_ms / 1000.0
+
+
+class ScheduledEngine(Engine):
+    """
+    A duty-cycle engine driven by a single scheduler thread.
+
+    Every managed process (or group of processes sharing one duty cycle) sits in a
+    min-heap keyed on the time of its next state change, so a wakeup only touches
+    the processes that are actually due, and throttling hundreds of processes
+    still costs exactly one thread.
+    Exits are event driven: if the platform can hand out a waitable handle for a
+    process (a pidfd on Linux), the scheduler sleeps on it and drops the process
+    the moment it exits instead of polling every entry on every tick.
+
+    Units are spread over the cycle instead of all suspending at the moment they are
+    added: each one gets a phase from a golden-ratio sequence, so however many units
+    there are, their suspend windows interleave and the number of runnable targets
+    stays steady instead of swinging between none and all of them. Pass
+    `stagger=False` to suspend every unit as soon as it is added or modified.
+
+    The lock only guards bookkeeping. Suspend and resume calls, which can be slow for
+    processes with many threads, are queued while it is held and made by the scheduler
+    thread after releasing it, in the order they were queued. Control calls (add,
+    modify, remove) therefore never wait for the scheduler's system calls, however
+    many processes it manages. Handles are closed by the scheduler thread too, after
+    every call queued for them.
+
+    Every member is pinned to the exact process that was added through a handle
+    opened once, when it joins. Suspend and resume go through that handle, so
+    if the process exits and its PID is reused, the new process is never touched.
+
+    Subclasses provide the platform specific `_suspend` / `_resume` calls and,
+    optionally, `_open_handle` / `_handle_fd` / `_close_handle`.
+    """
+    name = "scheduled"
+
+    def __init__(self, period_ms=DEFAULT_CYCLE_MS, clock=time.monotonic, stagger=True):
+        super().__init__(period_ms)
+        self._clock = clock
+        self._stagger = stagger
+        self._epoch = clock()  # Phases are measured from here
+        self._phase_slots = itertools.count()
+        self._entries = {}  # pid or ("group", id) -> _Entry
+        self._owner = {}  # pid -> key of the entry it belongs to
+        self._heap = []
+        self._tokens = itertools.count(1)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._should_stop = False
+        self._exit_hook = False  # `shutdown` registered with atexit (once, not on every restart)
+        self._ops = []  # (_SUSPEND or _RESUME, pid, handle) calls queued for the scheduler thread
+        self._watch_changes = []  # (register?, fd, pid, handle) applied by the scheduler thread only
+        self._selector = None
+        self._wake_r = self._wake_w = None
+        # Stats
+        self._ticks = 0
+        self._lateness = array("d", bytes(8 * LATENESS_WINDOW))  # Ring buffer of the latest samples (s)
+        self._lateness_count = 0
+        self._lateness_sum = 0.0
+        self._lock_hold_sum = 0.0
+        self._lock_hold_max = 0.0
+        self._failed_suspends = 0
+
+    # --- Platform hooks ---
+    def _suspend(self, pid, handle):
+        """Pauses `pid`. Returns False if the process can't be (or is no longer) suspended."""
+        raise NotImplementedError
+
+    def _resume(self, pid, handle):
+        """Resumes `pid`. Returns False if the process is gone."""
+        raise NotImplementedError
+
+    def _open_handle(self, pid):
+        """
+        Pins the process currently running as `pid` (e.g. opens a pidfd), or returns None if
+        there is none; it is then not attached. Without a way to pin it, the handle is the PID.
+        """
+        return pid
+
+    def _handle_fd(self, handle):
+        """A file descriptor that becomes readable when the handle's process exits, or None."""
+        return None
+
+    def _close_handle(self, handle):
+        pass
+
+    # --- Scheduling core (always called with `_lock` held) ---
+    def _schedule(self, entry, when):
+        entry.next_state_change_time = when
+        entry.token = next(self._tokens)
+        heapq.heappush(self._heap, (when, entry.token, entry.key))
+
+    def _new_entry(self, key, limit, period_ms):
+        entry = _Entry(key, limit, self._period(period_ms), self._clock())
+        if self._stagger: entry.phase = (next(self._phase_slots) * GOLDEN_RATIO_CONJUGATE) % 1.0
+        self._entries[key] = entry
+        return entry
+
+    def _next_suspend(self, entry, now):
+        """The first moment from `now` on when `entry` is at its phase of the cycle."""
+        if not self._stagger: return now
+        cycle = entry.period_ms / 1000.0
+        return now + (entry.phase * cycle - (now - self._epoch)) % cycle
+
+    def _attach(self, entry, pid):
+        """Makes `pid` a member of `entry`. A process belongs to at most one entry."""
+        if pid in self._owner:
+            return False
+        handle = self._open_handle(pid)
+        if handle is None:
+            # Gone already: signalling the bare PID could reach whatever process reuses it.
+            logger.info(f"PID {pid} exited before it could be limited; it is not managed.")
+            return False
+        fd = None if handle is None else self._handle_fd(handle)
+        if fd is not None:
+            self._watch_changes.append((True, fd, pid, handle))
+        entry.members[pid] = handle
+        self._owner[pid] = entry.key
+        # A process joining a group mid-cycle takes on the group's current phase.
+        if entry.is_suspended: self._ops.append((_SUSPEND, pid, handle))
+        return True
+
+    def _detach(self, entry, pid, resume):
+        """Removes `pid` from `entry`, resuming it first if requested and needed."""
+        handle = entry.members.pop(pid, None)
+        if self._owner.get(pid) == entry.key:
+            del self._owner[pid]
+        if resume and entry.is_suspended:
+            self._ops.append((_RESUME, pid, handle))
+        if handle is not None:
+            # Closed by the scheduler thread, after the calls queued for it (and unregistering its fd).
+            self._watch_changes.append((False, self._handle_fd(handle), pid, handle))
+
+    def _forget(self, entry):
+        """Removes an entry from the managed set and schedules its exit watches for cleanup."""
+        for pid in list(entry.members):
+            self._detach(entry, pid, resume=False)
+        if self._entries.get(entry.key) is entry:
+            del self._entries[entry.key]
+
+    def _mark_resumed(self, entry, now):
+        if entry.is_suspended:
+            entry.suspended_s += now - entry.suspended_at
+            entry.cycles += 1
+        entry.is_suspended = False
+        entry.last_change = now
+
+    def _drop(self, entry):
+        """Forgets an entry, resuming its processes first if we left them suspended."""
+        for pid in list(entry.members):
+            self._detach(entry, pid, resume=True)
+        entry.is_suspended = False
+        self._forget(entry)
+
+    def _run_due(self, now):
+        """
+        Advances every unit whose state change is due and queues its suspend/resume calls.
+        Returns the next deadline (or None).
+        """
+        heap, ops = self._heap, self._ops
+        lateness = self._lateness
+        while heap and heap[0][0] <= now:
+            when, token, key = heapq.heappop(heap)
+            entry = self._entries.get(key)
+            if entry is None or entry.token != token:
+                continue  # Stale heap item left behind by a modify/remove.
+            lateness[self._lateness_count & (LATENESS_WINDOW - 1)] = now - when
+            self._lateness_count += 1
+            self._lateness_sum += now - when
+
+            if entry.is_suspended:  # Time to RESUME
+                for pid, handle in entry.members.items(): ops.append((_RESUME, pid, handle))
+                self._mark_resumed(entry, now)
+                next_change = now + entry.resume_s
+            else:  # Time to SUSPEND
+                for pid, handle in entry.members.items(): ops.append((_SUSPEND, pid, handle))
+                entry.is_suspended = True
+                entry.suspended_at = entry.last_change = now
+                next_change = now + entry.suspend_s
+            if not entry.members and not entry.is_group:
+                self._forget(entry)
+                continue
+            self._schedule(entry, next_change)
+        return heap[0][0] if heap else None
+
+    def _execute(self, ops):
+        """Makes the queued calls (without the lock) and returns the ones that failed."""
+        failed = []
+        for op, pid, handle in ops:
+            if not (self._suspend(pid, handle) if op is _SUSPEND else self._resume(pid, handle)):
+                failed.append((op, pid, handle))
+        return failed
+
+    def _on_failed(self, op, pid, handle):
+        """Drops a member whose suspend or resume call failed, unless it already left."""
+        entry = self._entries.get(self._owner.get(pid))
+        if entry is None or entry.members.get(pid) is not handle:
+            return
+        if op is _SUSPEND:
+            # FAILED to suspend. This method won't work for this process,
+            # so stop wasting wakeups on it.
+            logger.warning(f"⚠️ Could not suspend PID {pid}; it is no longer managed.")
+            entry.failed_suspends += 1
+            self._failed_suspends += 1
+        self._detach(entry, pid, resume=False)
+        if not entry.members and not entry.is_group:
+            self._forget(entry)
+
+    def _tick(self, now):
+        """
+        One scheduler wakeup: advances the due units under the lock, then makes the queued
+        calls and closes released handles without it. Returns the next deadline (or None).
+        """
+        with self._lock:
+            acquired = time.perf_counter()
+            next_wakeup = self._run_due(now)
+            ops, self._ops = self._ops, []
+            watch_changes, self._watch_changes = self._watch_changes, []
+            held = time.perf_counter() - acquired
+        failed = self._execute(ops)
+        self._apply_watch_changes(watch_changes)
+        with self._lock:
+            acquired = time.perf_counter()
+            for call in failed: self._on_failed(*call)
+            self._ticks += 1
+            held += time.perf_counter() - acquired
+            self._lock_hold_sum += held
+            if held > self._lock_hold_max: self._lock_hold_max = held
+        return next_wakeup
+
+    def _on_exit(self, pid, handle):
+        """Called by the scheduler thread when a watched process has exited."""
+        entry = self._entries.get(self._owner.get(pid))
+        # The PID may already belong to a new process that was added after this one exited.
+        if entry is not None and entry.members.get(pid) is handle:
+            logger.info(f"PID {pid} exited; it is no longer managed.")
+            self._detach(entry, pid, resume=False)
+            if not entry.members and not entry.is_group:
+                self._forget(entry)
+
+    def _apply_watch_changes(self, changes):
+        """Syncs the selector with the exit watches added/removed since the last wakeup, and closes released handles."""
+        selector = self._selector
+        for register, fd, pid, handle in changes:
+            if register:
+                if selector is not None: selector.register(fd, selectors.EVENT_READ, (pid, handle))
+            else:
+                if fd is not None and selector is not None:
+                    try: selector.unregister(fd)
+                    except (KeyError, ValueError): pass
+                self._close_handle(handle)
+
+    # --- Scheduler thread ---
+    def _wake(self):
+        try: self._wake_w.send(b"\0")
+        except (BlockingIOError, OSError, AttributeError): pass
+
+    def _manager_loop(self):
+        selector = self._selector
+        while True:
+            with self._lock:
+                if self._should_stop: break
+            next_wakeup = self._tick(self._clock())
+            timeout = None if next_wakeup is None else max(0.0, next_wakeup - self._clock())
+            for key, _ in selector.select(timeout):
+                if key.data is None:
+                    try: self._wake_r.recv(4096)
+                    except (BlockingIOError, OSError): pass
+                else:
+                    with self._lock: self._on_exit(*key.data)
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        self._should_stop = False
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._wake_w.setblocking(False)
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self._wake_r, selectors.EVENT_READ, None)
+        self._thread = threading.Thread(target=self._manager_loop, name=f"cpulimiter-{self.name}", daemon=True)
+        self._thread.start()
+        if not self._exit_hook:
+            atexit.register(self.shutdown)
+            self._exit_hook = True
+        logger.info(f"✅ CPU Limiter Engine ({self.name}) Started.")
+
+    # --- Engine interface ---
+    def _period(self, period_ms):
+        return self.default_period_ms if period_ms is None else max(MIN_CYCLE_MS, float(period_ms))
+
+    def _add_locked(self, pid, limit, period_ms=None):
+        if pid in self._owner:
+            return
+        entry = self._new_entry(pid, limit, period_ms)
+        if not self._attach(entry, pid):
+            del self._entries[pid]
+            return
+        self._schedule(entry, self._next_suspend(entry, self._clock()))
+
+    def _modify_locked(self, key, limit, period_ms=None):
+        entry = self._entries.get(key)
+        if entry is None:
+            return
+        entry.set_limit(limit, period_ms)
+        now = self._clock()
+        # Apply the new limit from the next cycle, like the C++ engine does. The unit keeps its
+        # phase, so limits changed in one batch don't line the units up again.
+        if entry.is_suspended:
+            for pid, handle in entry.members.items(): self._ops.append((_RESUME, pid, handle))
+            self._mark_resumed(entry, now)
+        self._schedule(entry, self._next_suspend(entry, now))
+
+    def _remove_locked(self, key):
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._drop(entry)
+
+    def add_process(self, pid, limit, period_ms=None):
+        self.add_many([(pid, limit, period_ms)])
+
+    def modify_process_limit(self, pid, limit, period_ms=None):
+        self.modify_many([(pid, limit, period_ms)])
+
+    def remove_process(self, pid):
+        self.remove_many([pid])
+
+    def add_many(self, items):
+        with self._lock:
+            for item in items: self._add_locked(*_split_item(item))
+            if self._entries: self._ensure_started()
+        self._wake()
+
+    def modify_many(self, items):
+        with self._lock:
+            for item in items: self._modify_locked(*_split_item(item))
+        self._wake()
+
+    def remove_many(self, pids):
+        with self._lock:
+            for pid in pids: self._remove_locked(pid)
+        self._wake()
+
+    # --- Groups: every member shares one heap entry and is switched in the same tick ---
+    def add_group(self, group_id, pids, limit, period_ms=None):
+        key = ("group", group_id)
+        with self._lock:
+            if key in self._entries:
+                return
+            entry = self._new_entry(key, limit, period_ms)
+            for pid in pids: self._attach(entry, pid)
+            self._schedule(entry, self._next_suspend(entry, self._clock()))
+            self._ensure_started()
+        self._wake()
+
+    def modify_group_limit(self, group_id, limit, period_ms=None):
+        with self._lock:
+            self._modify_locked(("group", group_id), limit, period_ms)
+        self._wake()
+
+    def set_group_members(self, group_id, pids):
+        with self._lock:
+            entry = self._entries.get(("group", group_id))
+            if entry is None:
+                return
+            pids = set(pids)
+            for pid in [p for p in entry.members if p not in pids]:
+                self._detach(entry, pid, resume=True)
+            for pid in pids:
+                if pid not in entry.members: self._attach(entry, pid)
+        self._wake()
+
+    def remove_group(self, group_id):
+        with self._lock:
+            self._remove_locked(("group", group_id))
+        self._wake()
+
+    def get_managed_pids(self):
+        with self._lock:
+            return list(self._owner)
+
+    def get_process_stats(self):
+        rows = []
+        with self._lock:  # Only copy the counters while holding the lock.
+            now = self._clock()
+            for pid, key in self._owner.items():
+                entry = self._entries[key]
+                suspended = entry.suspended_s + (now - entry.suspended_at if entry.is_suspended else 0.0)
+                rows.append((pid, entry.limit, entry.period_ms, entry.cycles, suspended, entry.failed_suspends, now - entry.last_change, now - entry.added_at))
+        return [ProcessStats(pid, limit, period_ms, cycles, suspended, failed, since_change, limit / 100.0, suspended / elapsed if elapsed > 0 else 0.0)
+                for pid, limit, period_ms, cycles, suspended, failed, since_change, elapsed in rows]
+
+    def get_engine_stats(self):
+        with self._lock:
+            managed, ticks, count, total = len(self._owner), self._ticks, self._lateness_count, self._lateness_sum
+            hold_sum, hold_max, failed = self._lock_hold_sum, self._lock_hold_max, self._failed_suspends
+            samples = self._lateness[:min(count, LATENESS_WINDOW)]
+        samples = sorted(samples)
+        p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))] if samples else 0.0
+        return EngineStats(managed, ticks, 1000.0 * total / count if count else 0.0, 1000.0 * p99,
+                           1e6 * hold_sum / ticks if ticks else 0.0, 1e6 * hold_max, failed)
+
+    def shutdown(self):
+        with self._lock:
+            thread, self._thread = self._thread, None
+            self._should_stop = True
+        self._wake()
+        if thread is not None and thread is not threading.current_thread():
+            logger.info(f"Shutting down {self.name} Limiter Engine...")
+            thread.join(timeout=2)
+        with self._lock:
+            for entry in list(self._entries.values()):
+                self._drop(entry)
+            self._heap.clear()
+            ops, self._ops = self._ops, []
+            watch_changes, self._watch_changes = self._watch_changes, []
+        # The scheduler thread is gone: make its last calls (resuming everything) here.
+        self._execute(ops)
+        self._apply_watch_changes(watch_changes)
+        with self._lock:
+            if self._selector is not None:
+                self._selector.close()
+                self._wake_r.close()
+                self._wake_w.close()
+                self._selector = self._wake_r = self._wake_w = None
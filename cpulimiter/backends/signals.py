@@ -0,0 +1,72 @@
+import os
+import signal
+
+from .base import logger
+from .scheduler import ScheduledEngine
+from ..proctable import process_create_time, same_process
+
+_HAS_PIDFD = hasattr(os, "pidfd_open") and hasattr(signal, "pidfd_send_signal")
+
+
+class _Pinned:
+    """The exact process a member refers to: a pidfd, or else its PID and start time."""
+    __slots__ = ("pidfd", "create_time")
+
+    def __init__(self, pidfd, create_time):
+        self.pidfd = pidfd
+        self.create_time = create_time
+
+
+class SignalEngine(ScheduledEngine):
+    """
+    POSIX engine that pauses and resumes whole processes with SIGSTOP/SIGCONT.
+
+    This is the Linux counterpart of the C++ engine's `NtSuspendProcess` /
+    `NtResumeProcess` duty cycle. All processes share one scheduler thread, and
+    on Linux 5.3+ each target is held through a pidfd: exits are noticed without
+    polling, and signals sent through it can never reach a process that reused
+    the PID. Elsewhere the process's start time is checked before every signal.
+    """
+    name = "signals"
+
+    def _send(self, pid, handle, sig):
+        if handle is None:
+            raise ProcessLookupError(pid)  # Never pinned: the PID can't be trusted.
+        if handle.pidfd is not None:
+            signal.pidfd_send_signal(handle.pidfd, sig)
+        else:
+            if not same_process(pid, handle.create_time):
+                raise ProcessLookupError(pid)  # The PID now belongs to another process.
+            os.kill(pid, sig)
+
+    def _suspend(self, pid, handle):
+        try:
+            self._send(pid, handle, signal.SIGSTOP)
+            return True
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            logger.error(f"❌ Permission denied while suspending PID {pid}.")
+            return False
+
+    def _resume(self, pid, handle):
+        try:
+            self._send(pid, handle, signal.SIGCONT)
+            return True
+        except (ProcessLookupError, PermissionError):
+            return False
+
+    def _open_handle(self, pid):
+        if _HAS_PIDFD:
+            try:
+                return _Pinned(os.pidfd_open(pid), None)
+            except OSError:
+                pass
+        create_time = process_create_time(pid)
+        return None if create_time is None else _Pinned(None, create_time)
+
+    def _handle_fd(self, handle):
+        return handle.pidfd
+
+    def _close_handle(self, handle):
+        if handle.pidfd is not None: os.close(handle.pidfd)
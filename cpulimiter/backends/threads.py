@@ -0,0 +1,123 @@
+import ctypes
+import ctypes.wintypes
+import os
+import time
+
+import psutil
+
+from .base import DEFAULT_CYCLE_MS, logger
+from .scheduler import ScheduledEngine
+
+# Windows API constants
+THREAD_SUSPEND_RESUME = 0x0002
+PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+SYNCHRONIZE = 0x00100000
+STILL_ACTIVE = 259
+SUSPEND_FAILED = 0xFFFFFFFF
+
+THREAD_REFRESH_S = 1.0  # How stale a process's cached thread list may be when it is suspended.
+
+if os.name == "nt":
+    kernel32 = ctypes.windll.kernel32
+    OpenProcess = kernel32.OpenProcess
+    OpenProcess.argtypes = [ctypes.wintypes.DWORD, ctypes.wintypes.BOOL, ctypes.wintypes.DWORD]
+    OpenProcess.restype = ctypes.wintypes.HANDLE
+
+    GetExitCodeProcess = kernel32.GetExitCodeProcess
+    GetExitCodeProcess.argtypes = [ctypes.wintypes.HANDLE, ctypes.POINTER(ctypes.wintypes.DWORD)]
+    GetExitCodeProcess.restype = ctypes.wintypes.BOOL
+
+    OpenThread = kernel32.OpenThread
+    OpenThread.argtypes = [ctypes.wintypes.DWORD, ctypes.wintypes.BOOL, ctypes.wintypes.DWORD]
+    OpenThread.restype = ctypes.wintypes.HANDLE
+
+    SuspendThread = kernel32.SuspendThread
+    SuspendThread.argtypes = [ctypes.wintypes.HANDLE]
+    SuspendThread.restype = ctypes.wintypes.DWORD
+
+    ResumeThread = kernel32.ResumeThread
+    ResumeThread.argtypes = [ctypes.wintypes.HANDLE]
+    ResumeThread.restype = ctypes.wintypes.DWORD
+
+    CloseHandle = kernel32.CloseHandle
+    CloseHandle.argtypes = [ctypes.wintypes.HANDLE]
+    CloseHandle.restype = ctypes.wintypes.BOOL
+
+
+class _ThreadSet:
+    """A process handle (which pins the PID) and cached handles to the process's threads."""
+    __slots__ = ("process", "threads", "suspended", "refreshed_at")
+
+    def __init__(self, process):
+        self.process = process
+        self.threads = {}  # tid -> thread handle
+        self.suspended = []  # Handles this engine suspended and still has to resume
+        self.refreshed_at = None
+
+
+class ThreadEngine(ScheduledEngine):
+    """
+    Pure-Python Windows engine that suspends a process thread by thread.
+
+    This is the engine behind `limiter_legacy`, and the fallback when `limiter_engine.dll`
+    can't be loaded. It runs on the shared `ScheduledEngine` scheduler, so limiting
+    hundreds of processes still costs one thread. Thread handles are opened once and
+    cached; the thread list is re-read at most every `THREAD_REFRESH_S` seconds, and
+    only the threads that appeared or exited since then are opened or closed.
+    Resuming never enumerates: exactly the threads that were suspended are resumed.
+    """
+    name = "threads"
+
+    def __init__(self, period_ms=DEFAULT_CYCLE_MS, clock=time.monotonic, stagger=True):
+        if os.name != "nt": raise OSError("The thread engine is only available on Windows.")
+        super().__init__(period_ms, clock, stagger)
+
+    @staticmethod
+    def _alive(threads):
+        code = ctypes.wintypes.DWORD()
+        return bool(GetExitCodeProcess(threads.process, ctypes.byref(code))) and code.value == STILL_ACTIVE
+
+    def _refresh_threads(self, pid, threads):
+        """Syncs the cached thread handles with the process's current threads."""
+        current = {thread.id for thread in psutil.Process(pid).threads()}
+        cached = threads.threads
+        for tid in [t for t in cached if t not in current]:
+            CloseHandle(cached.pop(tid))
+        for tid in current:
+            if tid not in cached:
+                handle = OpenThread(THREAD_SUSPEND_RESUME, False, tid)
+                if handle: cached[tid] = handle
+        threads.refreshed_at = self._clock()
+
+    # --- Platform hooks ---
+    def _suspend(self, pid, handle):
+        if handle is None or not self._alive(handle):
+            return False  # Never opened, or exited (its PID may already belong to another process).
+        if handle.refreshed_at is None or self._clock() - handle.refreshed_at >= THREAD_REFRESH_S:
+            try:
+                self._refresh_threads(pid, handle)
+            except psutil.AccessDenied:
+                logger.error(f"❌ Permission denied while listing the threads of PID {pid}.")
+                return False
+            except psutil.Error:
+                return False
+        handle.suspended = [h for h in handle.threads.values() if SuspendThread(h) != SUSPEND_FAILED]
+        return bool(handle.suspended)
+
+    def _resume(self, pid, handle):
+        if handle is None:
+            return False
+        for h in handle.suspended: ResumeThread(h)
+        handle.suspended = []
+        return self._alive(handle)
+
+    def _open_handle(self, pid):
+        process = OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION | SYNCHRONIZE, False, pid)
+        return _ThreadSet(process) if process else None
+
+    def _close_handle(self, handle):
+        for h in handle.suspended: ResumeThread(h)
+        for h in handle.threads.values(): CloseHandle(h)
+        handle.threads.clear()
+        handle.suspended = []
+        CloseHandle(handle.process)
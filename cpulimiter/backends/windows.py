@@ -0,0 +1,178 @@
+import atexit
+import ctypes
+import ctypes.wintypes
+import os
+
+from .base import Engine, EngineStats, ProcessStats, DEFAULT_CYCLE_MS, _split_item, logger
+
+
+class _ProcessStats(ctypes.Structure):
+    """Mirror of the C++ `ProcessStats` struct."""
+    _fields_ = [("pid", ctypes.wintypes.DWORD), ("limit_percentage", ctypes.c_int), ("period_ms", ctypes.c_double),
+                ("cycles", ctypes.c_ulonglong), ("suspended_ms", ctypes.c_double), ("failed_suspends", ctypes.c_uint),
+                ("since_last_change_ms", ctypes.c_double), ("configured_duty", ctypes.c_double), ("measured_duty", ctypes.c_double)]
+
+
+class _EngineStats(ctypes.Structure):
+    """Mirror of the C++ `EngineStats` struct."""
+    _fields_ = [("managed", ctypes.c_int), ("ticks", ctypes.c_ulonglong), ("lateness_avg_ms", ctypes.c_double),
+                ("lateness_p99_ms", ctypes.c_double), ("lock_hold_avg_us", ctypes.c_double), ("lock_hold_max_us", ctypes.c_double),
+                ("failed_suspends", ctypes.c_ulonglong)]
+
+
+class WindowsEngine(Engine):
+    """Thin ctypes wrapper around `limiter_engine.dll` (the C++ engine)."""
+    name = "windows"
+
+    def __init__(self, period_ms=DEFAULT_CYCLE_MS):
+        super().__init__(period_ms)
+        self.dll = None
+        try:
+            dll_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'limiter_engine.dll')
+            if not os.path.exists(dll_path):
+                raise FileNotFoundError(f"limiter_engine.dll not found in the package directory.")
+
+            self.dll = ctypes.CDLL(dll_path)
+            self._configure_functions()
+            self._started = False
+            if period_ms != DEFAULT_CYCLE_MS: self.set_default_period(period_ms)
+            logger.info("✅ CPU Limiter Engine (C++) Loaded.")
+
+        except (FileNotFoundError, OSError) as e:
+            logger.critical("❌ CRITICAL ERROR: Could not load limiter_engine.dll.")
+            print(f"❌ CRITICAL ERROR: Could not load limiter_engine.dll. {e}")
+            raise RuntimeError(f"Engine loading failed: {e}. Ensure the 64-bit DLL is in the correct folder.")
+
+    def _configure_functions(self):
+        self.dll.StartLimiter.restype = None
+        self.dll.StopLimiter.restype = None
+        self.dll.AddProcess.argtypes = [ctypes.wintypes.DWORD, ctypes.c_int]
+        self.dll.AddProcess.restype = None
+        self.dll.RemoveProcess.argtypes = [ctypes.wintypes.DWORD]
+        self.dll.RemoveProcess.restype = None
+        self.dll.ModifyProcessLimit.argtypes = [ctypes.wintypes.DWORD, ctypes.c_int]
+        self.dll.ModifyProcessLimit.restype = None
+        self.dll.GetManagedPids.argtypes = [ctypes.POINTER(ctypes.wintypes.DWORD), ctypes.c_int]
+        self.dll.GetManagedPids.restype = ctypes.c_int
+        # Batch and period entry points. Older builds of the DLL don't export them,
+        # in which case the per-PID loop from `Engine` and the fixed 200 ms period are used.
+        self._has_batch_api = all(hasattr(self.dll, f) for f in ("AddProcesses", "ModifyProcessLimits", "RemoveProcesses"))
+        self._has_period_api = all(hasattr(self.dll, f) for f in ("AddProcessEx", "ModifyProcessLimitEx", "SetDefaultPeriod"))
+        if self._has_period_api:
+            self.dll.AddProcessEx.argtypes = [ctypes.wintypes.DWORD, ctypes.c_int, ctypes.c_double]
+            self.dll.AddProcessEx.restype = None
+            self.dll.ModifyProcessLimitEx.argtypes = [ctypes.wintypes.DWORD, ctypes.c_int, ctypes.c_double]
+            self.dll.ModifyProcessLimitEx.restype = None
+            self.dll.SetDefaultPeriod.argtypes = [ctypes.c_double]
+            self.dll.SetDefaultPeriod.restype = None
+        self._has_stats_api = all(hasattr(self.dll, f) for f in ("GetProcessStats", "GetEngineStats"))
+        if self._has_stats_api:
+            self.dll.GetProcessStats.argtypes = [ctypes.POINTER(_ProcessStats), ctypes.c_int]
+            self.dll.GetProcessStats.restype = ctypes.c_int
+            self.dll.GetEngineStats.argtypes = [ctypes.POINTER(_EngineStats)]
+            self.dll.GetEngineStats.restype = None
+        if self._has_batch_api:
+            pid_array, int_array, period_array = ctypes.POINTER(ctypes.wintypes.DWORD), ctypes.POINTER(ctypes.c_int), ctypes.POINTER(ctypes.c_double)
+            self.dll.AddProcesses.argtypes = [pid_array, int_array, period_array, ctypes.c_int]
+            self.dll.AddProcesses.restype = None
+            self.dll.ModifyProcessLimits.argtypes = [pid_array, int_array, period_array, ctypes.c_int]
+            self.dll.ModifyProcessLimits.restype = None
+            self.dll.RemoveProcesses.argtypes = [pid_array, ctypes.c_int]
+            self.dll.RemoveProcesses.restype = None
+        # Group members share one phase, so they are suspended and resumed in the same tick.
+        # Without these, groups fall back to `Engine`, which limits each member on its own cycle.
+        self._has_group_api = self._has_batch_api and all(hasattr(self.dll, f) for f in ("ReservePhase", "AddProcessesInPhase"))
+        if self._has_group_api:
+            self.dll.ReservePhase.restype = ctypes.c_double
+            self.dll.AddProcessesInPhase.argtypes = [pid_array, int_array, period_array, ctypes.c_int, ctypes.c_double]
+            self.dll.AddProcessesInPhase.restype = None
+
+    def _ensure_started(self):
+        """Starts the C++ manager thread when the first process is added."""
+        if self._started: return
+        self._started = True
+        self.dll.StartLimiter()
+        atexit.register(self.shutdown)
+        logger.info("✅ CPU Limiter Engine (C++) Started.")
+
+    def set_default_period(self, period_ms):
+        super().set_default_period(period_ms)
+        if self.dll and self._has_period_api: self.dll.SetDefaultPeriod(self.default_period_ms)
+    def add_process(self, pid, limit, period_ms=None):
+        if not self.dll: return
+        self._ensure_started()
+        if self._has_period_api: self.dll.AddProcessEx(pid, limit, period_ms or 0)
+        else: self.dll.AddProcess(pid, limit)
+    def modify_process_limit(self, pid, limit, period_ms=None):
+        if not self.dll: return
+        if self._has_period_api: self.dll.ModifyProcessLimitEx(pid, limit, period_ms or 0)
+        else: self.dll.ModifyProcessLimit(pid, limit)
+    def remove_process(self, pid):
+        if self.dll: self.dll.RemoveProcess(pid)
+    @staticmethod
+    def _to_arrays(items):
+        items = [_split_item(item) for item in items]
+        pids = (ctypes.wintypes.DWORD * len(items))(*[pid for pid, _, _ in items])
+        limits = (ctypes.c_int * len(items))(*[limit for _, limit, _ in items])
+        periods = (ctypes.c_double * len(items))(*[period or 0 for _, _, period in items])
+        return pids, limits, periods, len(items)
+    def add_many(self, items):
+        if not self.dll: return
+        self._ensure_started()
+        if not self._has_batch_api: return super().add_many(items)
+        self.dll.AddProcesses(*self._to_arrays(items))
+    def modify_many(self, items):
+        if not self.dll: return
+        if not self._has_batch_api: return super().modify_many(items)
+        self.dll.ModifyProcessLimits(*self._to_arrays(items))
+    def remove_many(self, pids):
+        if not self.dll: return
+        if not self._has_batch_api: return super().remove_many(pids)
+        pids = list(pids)
+        self.dll.RemoveProcesses((ctypes.wintypes.DWORD * len(pids))(*pids), len(pids))
+    def _add_members(self, group, pids):
+        if pids: self.dll.AddProcessesInPhase(*self._to_arrays([(pid, group["limit"], group["period_ms"]) for pid in pids]), group["phase"])
+    def add_group(self, group_id, pids, limit, period_ms=None):
+        if not self.dll: return
+        if not self._has_group_api: return super().add_group(group_id, pids, limit, period_ms)
+        if group_id in self._groups: return
+        self._ensure_started()
+        group = self._groups[group_id] = {"pids": set(pids), "limit": limit, "period_ms": period_ms, "phase": self.dll.ReservePhase()}
+        self._add_members(group, group["pids"])
+    def set_group_members(self, group_id, pids):
+        if not self.dll: return
+        if not self._has_group_api: return super().set_group_members(group_id, pids)
+        group = self._groups.get(group_id)
+        if group is None: return
+        pids = set(pids)
+        self.remove_many(group["pids"] - pids)
+        self._add_members(group, pids - group["pids"])
+        group["pids"] = pids
+    def get_managed_pids(self):
+        if not self.dll: return []
+        size = 1024
+        while True:
+            buffer = (ctypes.wintypes.DWORD * size)()
+            count = self.dll.GetManagedPids(buffer, size)
+            if count < size: return list(buffer[:count])
+            size *= 2
+    def get_process_stats(self):
+        if not self.dll or not self._has_stats_api: return []
+        size = 256
+        while True:
+            buffer = (_ProcessStats * size)()
+            total = self.dll.GetProcessStats(buffer, size)
+            if total <= size: break
+            size = total
+        return [ProcessStats(s.pid, s.limit_percentage, s.period_ms, s.cycles, s.suspended_ms / 1000.0, s.failed_suspends,
+                             s.since_last_change_ms / 1000.0, s.configured_duty, s.measured_duty) for s in buffer[:total]]
+    def get_engine_stats(self):
+        if not self.dll or not self._has_stats_api: return None
+        s = _EngineStats()
+        self.dll.GetEngineStats(ctypes.byref(s))
+        return EngineStats(s.managed, s.ticks, s.lateness_avg_ms, s.lateness_p99_ms, s.lock_hold_avg_us, s.lock_hold_max_us, s.failed_suspends)
+    def shutdown(self):
+        if self.dll:
+            logger.info("Shutting down C++ Limiter Engine...")
+            self.dll.StopLimiter()
+            self.dll = None
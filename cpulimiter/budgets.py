@@ -0,0 +1,115 @@
+"""
+Hierarchical CPU budgets: one total cap for a tier, shared among weighted children.
+
+    batch = Budget("batch", cap_percent=30, children=[
+        Budget("encode", weight=2, process_name="ffmpeg"),
+        Budget("index", weight=1, pid=1234),
+    ])
+    limiter.add_budget(batch)
+
+Caps are in percent of the whole host (all cores). Each leaf is a closed-loop
+group (see `CpuLimiter.add_group`). Every feedback interval, the measured demand
+of the leaves is split top-down with weighted max-min fairness: a child that
+needs less than its weighted share keeps only what it needs, and the rest is
+redistributed to its busier siblings by weight. Each leaf's group is then held at
+its share, so the tier as a whole uses its full cap whenever it has the work.
+"""
+INF = float("inf")
+
+
+class Budget:
+    """
+    A node of a budget tree. Leaves select processes like `add_group` does (`pid`,
+    with its descendants if `include_children`, and/or every process named `process_name`);
+    inner nodes have `children`. `weight` is the node's share relative to its siblings, and
+    `cap_percent` (percent of the host) optionally bounds it. The root must have a cap.
+    """
+    __slots__ = ("name", "cap_percent", "weight", "children", "pid", "process_name", "include_children", "period_ms")
+
+    def __init__(self, name, cap_percent=None, weight=1, children=(), pid=None, process_name=None, include_children=True, period_ms=None):
+        if "/" in name: raise ValueError("Budget names can't contain '/'.")
+        if weight <= 0: raise ValueError("A budget's weight must be positive.")
+        self.name = name
+        self.cap_percent = cap_percent
+        self.weight = weight
+        self.children = list(children)
+        self.pid = pid
+        self.process_name = process_name
+        self.include_children = include_children
+        self.period_ms = period_ms
+        if not self.children and not any([pid, process_name]): raise ValueError(f"Budget {name!r} needs children, a pid or a process_name.")
+        if self.children and any([pid, process_name]): raise ValueError(f"Budget {name!r} can't have both children and processes.")
+        if len({child.name for child in self.children}) != len(self.children): raise ValueError(f"Budget {name!r} has children with the same name.")
+
+    def leaves(self, prefix=""):
+        """`(path, leaf)` for every leaf, where `path` ("batch/encode") names the leaf's group."""
+        path = prefix + self.name
+        if not self.children:
+            yield path, self
+        for child in self.children:
+            yield from child.leaves(path + "/")
+
+    def __repr__(self):
+        return f"Budget({self.name!r}, cap_percent={self.cap_percent}, weight={self.weight}, children={len(self.children)})"
+
+
+def _water_fill(total, items):
+    """
+    Splits `total` among `(key, weight, demand)` items with weighted max-min fairness:
+    items demanding less than their weighted share get their demand, the rest share what is
+    left by weight. Returns the allocations and whatever is left once every demand is met.
+    """
+    alloc = {}
+    active = list(items)
+    remaining = total
+    while active:
+        share = remaining / sum(weight for _, weight, _ in active)
+        satisfied = [item for item in active if item[2] <= share * item[1]]
+        if not satisfied:
+            for key, weight, _ in active: alloc[key] = share * weight
+            return alloc, 0.0
+        for key, _, demand in satisfied:
+            alloc[key] = demand
+            remaining -= demand
+        active = [item for item in active if item[2] > share * item[1]]
+    return alloc, remaining
+
+
+def allocate(budget, demands, cpu_count):
+    """
+    Splits the budget tree's cap among its leaves. `demands` maps leaf paths to their
+    measured demand in percent of one core: None while unknown (the leaf may want
+    everything), and leaves that are missing want nothing.
+    Returns `{path: target_cpu_percent}`, also in percent of one core.
+    """
+    def cap(node):
+        return INF if node.cap_percent is None else node.cap_percent * cpu_count
+
+    demand_of = {}
+
+    def demand(node, path):
+        if not node.children:
+            value = demands.get(path, 0.0)
+            value = INF if value is None else value
+        else:
+            value = sum(demand(child, f"{path}/{child.name}") for child in node.children)
+        demand_of[path] = value = min(value, cap(node))
+        return value
+
+    targets = {}
+
+    def fill(node, path, amount):
+        amount = min(amount, cap(node))
+        if not node.children:
+            targets[path] = amount
+            return
+        children = [(f"{path}/{child.name}", child) for child in node.children]
+        alloc, left = _water_fill(amount, [(p, child.weight, demand_of[p]) for p, child in children])
+        if left > 0:  # Every demand is met: hand out the rest as headroom, up to each child's cap.
+            extra, _ = _water_fill(left, [(p, child.weight, cap(child) - alloc[p]) for p, child in children])
+            for p, _ in children: alloc[p] += extra[p]
+        for p, child in children: fill(child, p, alloc[p])
+
+    demand(budget, budget.name)
+    fill(budget, budget.name, cap(budget))
+    return targets
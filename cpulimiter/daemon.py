@@ -0,0 +1,258 @@
+"""
+The `cpulimiter` command: a long-lived daemon that limits processes as a config file says.
+
+    cpulimiter /etc/cpulimiter.toml
+    cpulimiter --check /etc/cpulimiter.toml     # validate and print the rules, then exit
+
+The config is TOML (Python 3.11+, or the `tomli` package) or JSON, by file extension:
+
+    period_ms = 100                 # default cycle length for every rule
+    ignore = ["sshd", "Xorg"]       # never limited, whatever the rules say
+    ignore_critical = true          # never limit the processes in utils.CRITICAL_PROCESSES
+
+    [limits]                        # shorthand: process name = limit_percentage
+    "ffmpeg" = 90
+
+    [[rules]]                       # the arguments of CpuLimiter.add_rule()
+    process_name = "python*"
+    cmdline = "*celery*worker*"
+    limit_percentage = 70
+    period_ms = 200
+
+    [[rules]]
+    process_name = "chrome*"
+    target_cpu_percent = 30
+
+The file is reloaded on SIGHUP and whenever it changes on disk. A reload only hands the
+limiter the differences: new rules are added, removed rules are dropped, changed ones are
+updated in place with `CpuLimiter.update_rule()`. Processes whose rule did not change are
+not touched at all, so they keep their place in the duty cycle. A config that fails to
+load is logged and the previous one stays in force.
+"""
+import argparse
+import json
+import logging
+import os
+import signal
+import sys
+import threading
+from collections import OrderedDict, namedtuple
+
+from .limiter import CpuLimiter, logger
+from .utils import CRITICAL_PROCESSES
+
+DEFAULT_WATCH_INTERVAL = 2.0  # Seconds between checks of the config file for changes
+
+# A rule is identified by what it matches; its spec is everything that can change in place.
+RuleKey = namedtuple("RuleKey", "process_name cmdline regex")
+RuleSpec = namedtuple("RuleSpec", "limit_percentage period_ms target_cpu_percent exclude")
+
+_TOP_LEVEL_KEYS = {"period_ms", "ignore", "ignore_critical", "limits", "rules"}
+_RULE_KEYS = {"process_name", "cmdline", "regex", "limit_percentage", "period_ms", "target_cpu_percent", "exclude"}
+
+
+def _toml():
+    try:
+        import tomllib
+        return tomllib
+    except ImportError:
+        pass
+    try:
+        import tomli
+        return tomli
+    except ImportError:
+        raise RuntimeError("TOML configs require Python 3.11+ or the tomli package (pip install cpulimiter[toml]); JSON configs work everywhere.") from None
+
+
+def load_config(path):
+    """Reads `path` (`.json`, TOML otherwise) and returns its rules as an ordered `{RuleKey: RuleSpec}`."""
+    if path.lower().endswith(".json"):
+        with open(path, "r", encoding="utf-8") as f: raw = json.load(f)
+    else:
+        with open(path, "rb") as f: raw = _toml().load(f)
+    return parse_config(raw)
+
+
+def _number(value, name, low, high):
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not low <= value <= high:
+        raise ValueError(f"'{name}' must be a number between {low} and {high}, got {value!r}.")
+    return value
+
+
+def _names(value, name):
+    """A list of process names; a bare string would otherwise become a set of characters."""
+    if not isinstance(value, (list, tuple)) or not all(isinstance(v, str) for v in value):
+        raise ValueError(f"{name} must be a list of process names, got {value!r}.")
+    return set(value)
+
+
+def parse_config(raw):
+    """Validates a loaded config and returns an ordered `{RuleKey: RuleSpec}`. Raises ValueError."""
+    if not isinstance(raw, dict): raise ValueError("The config must be a table/object.")
+    unknown = set(raw) - _TOP_LEVEL_KEYS
+    if unknown: raise ValueError(f"Unknown config keys: {sorted(unknown)}.")
+    period_ms = raw.get("period_ms")
+    if period_ms is not None: _number(period_ms, "period_ms", 1, 60000)
+    limits = raw.get("limits", {})
+    if not isinstance(limits, dict): raise ValueError("'limits' must map process names to limit percentages.")
+    ignore = _names(raw.get("ignore", []), "'ignore'")
+    if raw.get("ignore_critical", True): ignore |= CRITICAL_PROCESSES
+
+    entries = [{"process_name": name, "limit_percentage": limit} for name, limit in limits.items()]
+    entries.extend(raw.get("rules", ()))
+    specs = OrderedDict()
+    for i, entry in enumerate(entries):
+        where = f"rule {i + 1} ({entry.get('process_name') or entry.get('cmdline')!r})" if isinstance(entry, dict) else f"rule {i + 1}"
+        if not isinstance(entry, dict): raise ValueError(f"{where} must be a table/object.")
+        unknown = set(entry) - _RULE_KEYS
+        if unknown: raise ValueError(f"{where}: unknown keys {sorted(unknown)}.")
+        key = RuleKey(entry.get("process_name"), entry.get("cmdline"), bool(entry.get("regex", False)))
+        if not (key.process_name or key.cmdline): raise ValueError(f"{where}: needs a process_name or cmdline pattern.")
+        if key in specs: raise ValueError(f"{where} matches the same processes as an earlier rule.")
+        if "limit_percentage" in entry and "target_cpu_percent" in entry:
+            raise ValueError(f"{where}: set either limit_percentage or target_cpu_percent, not both.")
+        target = entry.get("target_cpu_percent")
+        if target is not None: _number(target, "target_cpu_percent", 0.1, 100 * (os.cpu_count() or 1))
+        rule_period = entry.get("period_ms", period_ms)
+        if rule_period is not None: _number(rule_period, "period_ms", 1, 60000)
+        exclude = ignore | _names(entry.get("exclude", []), f"{where}: 'exclude'")
+        specs[key] = RuleSpec(_number(entry.get("limit_percentage", 98), "limit_percentage", 0, 100), rule_period, target,
+                              frozenset(name.lower() for name in exclude))
+    return specs
+
+
+class Daemon:
+    """
+    Keeps a `CpuLimiter`'s rules in sync with the config file at `path`.
+    `reload()` can be called from any thread; `run()` blocks until `stop()` (or SIGTERM/SIGINT).
+    """
+
+    def __init__(self, path, limiter=None, watch_interval=DEFAULT_WATCH_INTERVAL):
+        self.path = path
+        self.limiter = limiter if limiter is not None else CpuLimiter()
+        self.watch_interval = watch_interval
+        self._applied = OrderedDict()  # RuleKey -> (Rule, RuleSpec) handed to the limiter
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._reload_requested = False
+        self._fingerprint = None
+
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+            return (st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
+
+    def reload(self):
+        """Loads the config and applies what changed. Returns False (and keeps the old rules) if it is invalid."""
+        fingerprint = self._stat()
+        try:
+            specs = load_config(self.path)
+        except (OSError, ValueError, RuntimeError) as e:
+            logger.error(f"❌ Could not load {self.path}: {e}")
+            return False
+        finally:
+            self._fingerprint = fingerprint  # Not retried until the file changes again.
+        with self._lock:
+            self._apply(specs)
+        return True
+
+    def _apply(self, specs):
+        """Hands the limiter only the differences between `specs` and what is applied."""
+        for key in [k for k in self._applied if k not in specs]:
+            rule, _ = self._applied.pop(key)
+            self.limiter.remove_rule(rule)
+            logger.info(f"➖ Removed {rule!r}.")
+        for key, spec in specs.items():
+            current = self._applied.get(key)
+            if current is None:
+                rule = self.limiter.add_rule(*key, **spec._asdict())
+                logger.info(f"➕ Added {rule!r}.")
+            elif current[1] != spec:
+                rule = current[0]
+                # A period removed from the config goes back to the engine's default.
+                period_ms = self.limiter.default_period_ms if spec.period_ms is None else spec.period_ms
+                self.limiter.update_rule(rule, spec.limit_percentage, period_ms, spec.target_cpu_percent, spec.exclude)
+                logger.info(f"🔄 Updated {rule!r}.")
+            else:
+                continue
+            self._applied[key] = (rule, spec)
+
+    def get_rules(self):
+        """`{RuleKey: RuleSpec}` of the rules applied right now."""
+        with self._lock:
+            return OrderedDict((key, spec) for key, (_, spec) in self._applied.items())
+
+    def run(self):
+        """
+        Loads the config and keeps it applied until stopped. Returns False at once if the
+        config can't be loaded. Signals are handled when called from the main thread.
+        """
+        if threading.current_thread() is threading.main_thread(): self._install_signal_handlers()
+        if not self.reload(): return False
+        try:
+            while True:
+                self._wakeup.wait(self.watch_interval)
+                self._wakeup.clear()
+                if self._stopping: return True
+                if self._reload_requested or self._stat() != self._fingerprint:
+                    self._reload_requested = False
+                    logger.info(f"🔁 Reloading {self.path}.")
+                    self.reload()
+        finally:
+            self.close()
+
+    def request_reload(self):
+        """Makes `run()` reload the config right away (what SIGHUP does)."""
+        self._reload_requested = True
+        self._wakeup.set()
+
+    def stop(self):
+        """Makes `run()` release everything and return."""
+        self._stopping = True
+        self._wakeup.set()
+
+    def close(self):
+        """Drops every rule and releases every process the daemon limited."""
+        with self._lock:
+            self._applied.clear()
+        self.limiter.shutdown()
+
+    def _install_signal_handlers(self):
+        signal.signal(signal.SIGTERM, lambda signum, frame: self.stop())
+        signal.signal(signal.SIGINT, lambda signum, frame: self.stop())
+        if hasattr(signal, "SIGHUP"): signal.signal(signal.SIGHUP, lambda signum, frame: self.request_reload())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="cpulimiter", description="Limit the CPU usage of processes as a TOML or JSON config file says.")
+    parser.add_argument("config", help="path to the config file (.toml or .json)")
+    parser.add_argument("--check", action="store_true", help="validate the config, print its rules and exit")
+    parser.add_argument("--watch-interval", type=float, default=DEFAULT_WATCH_INTERVAL, metavar="SECONDS",
+                        help=f"how often to check the config for changes (default: {DEFAULT_WATCH_INTERVAL})")
+    parser.add_argument("--log-level", default="INFO", choices=["DEBUG", "INFO", "WARNING", "ERROR"])
+    args = parser.parse_args(argv)
+
+    if args.check:
+        try:
+            specs = load_config(args.config)
+        except (OSError, ValueError, RuntimeError) as e:
+            print(f"{args.config}: {e}", file=sys.stderr)
+            return 1
+        for key, spec in specs.items():
+            limit = f"target {spec.target_cpu_percent}% CPU" if spec.target_cpu_percent is not None else f"limit {spec.limit_percentage}%"
+            pattern = ", ".join(f"{k}={v!r}" for k, v in key._asdict().items() if v)
+            print(f"{pattern}: {limit}, period {spec.period_ms or 'default'} ms, {len(spec.exclude)} excluded names")
+        return 0
+
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(args.log_level)
+    return 0 if Daemon(args.config, watch_interval=args.watch_interval).run() else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
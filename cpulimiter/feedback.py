@@ -0,0 +1,293 @@
+"""
+Closed-loop limiting: measure how much CPU a process really uses and adapt its duty cycle.
+
+A fixed `limit_percentage` is open-loop: the engine freezes the process for the
+same fraction of every cycle whether it was busy or idle. In "target" mode the
+`FeedbackLoop` samples each process's CPU time instead, and a `DutyController`
+turns the measurement into the limit handed to the engine. Processes that are
+under budget are not suspended at all.
+
+Budget trees (see `budgets.py`) are allocated here too: every interval, after the
+demands are measured and before the limits are picked, each leaf's target is set
+to its share of the tree's cap.
+"""
+import threading
+import time
+
+import psutil
+
+from .backends.base import logger
+from .budgets import allocate
+
+DEFAULT_INTERVAL = 0.5
+MAX_LIMIT = 99
+
+
+class DutyController:
+    """
+    Computes the limit (percentage of time suspended) that keeps a process near
+    `target_cpu_percent`, measured in percent of one core like psutil does.
+
+    Each update estimates the process's *demand* (what it would use if it were
+    never suspended) from the measured usage and the fraction of time it was
+    allowed to run, then picks the run fraction that scales that demand down to
+    the target. A small integral term removes the steady-state error left by
+    scheduling jitter. If demand is under the target, the limit is 0.
+    """
+
+    def __init__(self, target_cpu_percent, smoothing=0.5, gain=0.3):
+        self.target = float(target_cpu_percent)
+        self.smoothing = smoothing
+        self.gain = gain
+        self.limit = 0
+        self.demand = None
+        self._correction = 0.0
+
+    def update(self, measured_cpu_percent):
+        """Feeds one measurement taken over the last interval and returns the new limit."""
+        self.observe(measured_cpu_percent)
+        return self.decide(measured_cpu_percent)
+
+    def observe(self, measured_cpu_percent):
+        """Updates the demand estimate from one measurement (the first half of `update`)."""
+        run_fraction = 1.0 - self.limit / 100.0
+        demand = measured_cpu_percent / max(run_fraction, 0.01)
+        self.demand = demand if self.demand is None else self.demand + self.smoothing * (demand - self.demand)
+
+    def decide(self, measured_cpu_percent):
+        """Picks the limit for the current demand estimate and target (the second half of `update`)."""
+        if self.demand <= self.target:  # Under budget: let it run freely.
+            self.limit, self._correction = 0, 0.0
+            return self.limit
+
+        if self.limit > 0:
+            self._correction += self.gain * (self.target - measured_cpu_percent) / self.demand
+            self._correction = min(0.5, max(-0.5, self._correction))
+        run_fraction = min(1.0, max(1.0 - MAX_LIMIT / 100.0, self.target / self.demand + self._correction))
+        self.limit = int(round(100.0 * (1.0 - run_fraction)))
+        return self.limit
+
+
+class _Target:
+    """A closed-loop target: one process, or a group whose members' usage is summed."""
+    __slots__ = ("key", "open_process", "group_id", "controller", "period_ms", "processes", "last_cpu", "last_time", "throttled")
+
+    def __init__(self, key, target_cpu_percent, period_ms, pids, group_id=None, open_process=psutil.Process):
+        self.key = key
+        self.open_process = open_process
+        self.group_id = group_id
+        self.controller = DutyController(target_cpu_percent)
+        self.period_ms = period_ms
+        self.processes = {}
+        self.last_cpu = {}
+        self.last_time = None
+        self.throttled = False
+        self.set_members(pids)
+
+    def set_members(self, pids):
+        pids = set(pids)
+        for pid in [p for p in self.processes if p not in pids]:
+            del self.processes[pid]
+            self.last_cpu.pop(pid, None)
+        for pid in pids - set(self.processes):
+            try: self.processes[pid] = self.open_process(pid)
+            except psutil.Error: pass
+
+    def sample(self):
+        """Returns the CPU seconds used by members seen in both this and the previous sample."""
+        used, current = 0.0, {}
+        for pid, process in list(self.processes.items()):
+            try:
+                times = process.cpu_times()
+            except psutil.Error:
+                del self.processes[pid]
+                continue
+            current[pid] = times.user + times.system
+            if pid in self.last_cpu: used += current[pid] - self.last_cpu[pid]
+        self.last_cpu = current
+        return used
+
+
+class FeedbackLoop:
+    """
+    One background thread that runs a `DutyController` for every tracked process or group.
+
+    Every `interval` seconds it samples all targets, then hands the resulting
+    changes to the engine as one `add_many` / `modify_many` / `remove_many` batch.
+    A group's controller works on the summed usage of all its members, so they
+    share one CPU budget.
+    """
+
+    def __init__(self, engine, interval=DEFAULT_INTERVAL, clock=time.monotonic, open_process=psutil.Process):
+        self._engine = engine
+        self.interval = interval
+        self._clock = clock
+        self._open_process = open_process  # pid -> object with `cpu_times()`, like `psutil.Process`
+        self._targets = {}  # pid or ("group", id) -> _Target
+        self._budgets = {}  # root name -> Budget whose leaves are tracked as groups named by their path
+        self._cpu_count = psutil.cpu_count() or 1
+        self._cond = threading.Condition()
+        # Held from sampling until the engine has the resulting batch, and by `untrack*`, so a
+        # target can't be untracked between the two and then be added to the engine again.
+        self._apply_lock = threading.Lock()
+        self._thread = None
+        self._should_stop = False
+
+    def _track(self, key, target_cpu_percent, period_ms, pids, group_id=None):
+        with self._cond:
+            target = self._targets.get(key)
+            if target is not None:
+                target.controller.target = float(target_cpu_percent)
+                if period_ms != target.period_ms and target.throttled:
+                    if group_id is None: self._engine.modify_process_limit(key, target.controller.limit, period_ms)
+                    else: self._engine.modify_group_limit(group_id, target.controller.limit, period_ms)
+                target.period_ms = period_ms
+                return
+            target = _Target(key, target_cpu_percent, period_ms, pids, group_id, self._open_process)
+            if group_id is None and not target.processes:
+                logger.warning(f"⚠️ Cannot track PID {key}: it no longer exists or access was denied.")
+                return
+            self._targets[key] = target
+            self._ensure_started()
+            self._cond.notify()
+
+    def track(self, pid, target_cpu_percent, period_ms=None):
+        """Starts (or retargets) closed-loop limiting of `pid`."""
+        self._track(pid, target_cpu_percent, period_ms, [pid])
+
+    def track_group(self, group_id, pids, target_cpu_percent, period_ms=None):
+        """Starts (or retargets) closed-loop limiting of a group sharing one budget."""
+        self._track(("group", group_id), target_cpu_percent, period_ms, pids, group_id)
+
+    def set_group_members(self, group_id, pids):
+        with self._cond:
+            target = self._targets.get(("group", group_id))
+            if target is None: return
+            target.set_members(pids)
+            if target.throttled: self._engine.set_group_members(group_id, pids)
+
+    def untrack(self, pids):
+        """Stops closed-loop limiting of `pids` and leaves them running."""
+        to_remove = []
+        with self._apply_lock:
+            with self._cond:
+                for pid in pids:
+                    target = self._targets.pop(pid, None)
+                    if target is not None and target.throttled: to_remove.append(pid)
+            if to_remove: self._engine.remove_many(to_remove)
+
+    def untrack_group(self, group_id):
+        with self._apply_lock:
+            with self._cond:
+                target = self._targets.pop(("group", group_id), None)
+            if target is not None and target.throttled: self._engine.remove_group(group_id)
+
+    def set_budget(self, budget):
+        """Starts allocating a budget tree's cap among its leaves, whose groups must be tracked separately."""
+        with self._cond:
+            self._budgets[budget.name] = budget
+
+    def remove_budget(self, name):
+        with self._cond:
+            self._budgets.pop(name, None)
+
+    def get_budget_targets(self, name):
+        """`{leaf path: target_cpu_percent}` currently assigned to a budget tree's tracked leaves."""
+        with self._cond:
+            budget = self._budgets.get(name)
+            if budget is None: return {}
+            targets = ((path, self._targets.get(("group", path))) for path, _ in budget.leaves())
+            return {path: target.controller.target for path, target in targets if target is not None}
+
+    def _allocate_budgets(self):
+        """Retargets every budget leaf to its share of the tree's cap (called with `_cond` held)."""
+        for budget in self._budgets.values():
+            leaves = {path: self._targets.get(("group", path)) for path, _ in budget.leaves()}
+            # Leaves that aren't tracked need nothing; tracked ones not measured yet may need everything.
+            demands = {path: target.controller.demand for path, target in leaves.items() if target is not None}
+            for path, share in allocate(budget, demands, self._cpu_count).items():
+                if leaves[path] is not None: leaves[path].controller.target = share
+
+    def get_limit(self, key):
+        """The limit currently applied to a PID or `("group", id)` (0 while under budget), or None."""
+        with self._cond:
+            target = self._targets.get(key)
+            return None if target is None else target.controller.limit
+
+    def tracked_pids(self):
+        with self._cond:
+            return [key for key in self._targets if not isinstance(key, tuple)]
+
+    def shutdown(self):
+        with self._cond:
+            thread, self._thread = self._thread, None
+            self._should_stop = True
+            self._cond.notify()
+            groups = [t.group_id for t in self._targets.values() if t.group_id is not None]
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=2)
+        self.untrack(self.tracked_pids())
+        for group_id in groups: self.untrack_group(group_id)
+
+    def _sample(self):
+        """Runs every controller once and returns the engine changes it wants (called with `_cond` held)."""
+        to_add, to_modify, to_remove, group_calls, gone = [], [], [], [], []
+        now = self._clock()
+        measured = {}
+        for key, target in self._targets.items():
+            used = target.sample()
+            if target.group_id is None and not target.processes:
+                gone.append(key)
+                continue
+            if target.last_time is not None and now > target.last_time:
+                measured[key] = 100.0 * used / (now - target.last_time)
+                target.controller.observe(measured[key])
+            target.last_time = now
+        if self._budgets: self._allocate_budgets()
+        for key, target in self._targets.items():
+            if key in measured:
+                old_limit = target.controller.limit
+                limit = target.controller.decide(measured[key])
+                change = None
+                if limit > 0 and not target.throttled: change, target.throttled = "add", True
+                elif limit == 0 and target.throttled: change, target.throttled = "remove", False
+                elif limit != old_limit and target.throttled: change = "modify"
+                if change is None: pass
+                elif target.group_id is not None: group_calls.append((change, target.group_id, list(target.processes), limit, target.period_ms))
+                elif change == "add": to_add.append((key, limit, target.period_ms))
+                elif change == "remove": to_remove.append(key)
+                else: to_modify.append((key, limit, target.period_ms))
+        for key in gone:
+            if self._targets.pop(key).throttled: to_remove.append(key)
+        return to_add, to_modify, to_remove, group_calls
+
+    def _apply_group_change(self, change, group_id, pids, limit, period_ms):
+        if change == "add": self._engine.add_group(group_id, pids, limit, period_ms)
+        elif change == "remove": self._engine.remove_group(group_id)
+        else: self._engine.modify_group_limit(group_id, limit, period_ms)
+
+    def _ensure_started(self):
+        if self._thread is None:
+            self._should_stop = False
+            self._thread = threading.Thread(target=self._loop, name="cpulimiter-feedback", daemon=True)
+            self._thread.start()
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                if self._should_stop: return
+                if not self._targets: self._cond.wait()
+                else: self._cond.wait(self.interval)
+            self._step()
+
+    def _step(self):
+        """Samples every target once and hands the changes to the engine."""
+        with self._apply_lock:
+            with self._cond:
+                if self._should_stop: return
+                to_add, to_modify, to_remove, group_calls = self._sample()
+            # `_cond` is released so readers aren't blocked; `_apply_lock` keeps `untrack*` out.
+            if to_remove: self._engine.remove_many(to_remove)
+            if to_modify: self._engine.modify_many(to_modify)
+            if to_add: self._engine.add_many(to_add)
+            for call in group_calls: self._apply_group_change(*call)
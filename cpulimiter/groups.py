@@ -0,0 +1,68 @@
+"""
+Process groups: one CPU budget shared by a whole process tree, or by every process with a given name.
+
+Limiting each process of a 20-process browser or a `make -j32` build on its own
+gives the job 20-32x the intended budget. A group is limited as one unit instead,
+and its membership is kept current so that children forked later join it.
+"""
+import threading
+
+from .proctable import get_process_table
+
+DEFAULT_REFRESH_INTERVAL = 1.0
+
+
+def tree_pids(root_pid):
+    """`root_pid` and all of its descendants (empty if the root is gone)."""
+    table = get_process_table()
+    if table.info(root_pid) is None:
+        return []
+    return [root_pid] + table.descendants(root_pid)
+
+
+def pids_named(process_name):
+    """Every running process whose name matches `process_name` (case-insensitive)."""
+    return get_process_table().pids_named(process_name)
+
+
+class GroupRefresher:
+    """
+    One background thread that re-resolves the membership of every watched group.
+
+    `resolver` is called every `interval` seconds per group; when the set of PIDs it
+    returns changes, `on_change(group_name, pids)` is called with the new set.
+    """
+
+    def __init__(self, on_change, interval=DEFAULT_REFRESH_INTERVAL):
+        self._on_change = on_change
+        self.interval = interval
+        self._groups = {}  # name -> [resolver, last pids]
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def watch(self, group_name, resolver, pids):
+        with self._cond:
+            self._groups[group_name] = [resolver, set(pids)]
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="cpulimiter-groups", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def unwatch(self, group_name):
+        with self._cond:
+            self._groups.pop(group_name, None)
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                if not self._groups: self._cond.wait()
+                else: self._cond.wait(self.interval)
+                groups = [(name, state[0], state[1]) for name, state in self._groups.items()]
+            changes = []
+            for name, resolver, last in groups:
+                pids = set(resolver())
+                if pids != last: changes.append((name, pids))
+            with self._cond:
+                changes = [(name, pids) for name, pids in changes if name in self._groups]
+                for name, pids in changes: self._groups[name][1] = pids
+            for name, pids in changes: self._on_change(name, pids)
@@ -1,77 +1,112 @@
-import ctypes
-import ctypes.wintypes
-import atexit
 import psutil
-import pygetwindow as gw
-import win32process
+import functools
 import os
+import threading
+from collections import namedtuple
 import time
 import logging
 
+from .backends import Engine, get_default_engine
+from .budgets import allocate
+from .feedback import FeedbackLoop
+from .groups import GroupRefresher, tree_pids, pids_named
+from .proctable import get_process_table, process_create_time, same_process
+from .rules import Rule, RuleWatcher
+from .utils import _windows_api
+
 # --- Library Logger ---
 logger = logging.getLogger("cpulimiter")
 logger.setLevel(logging.ERROR)  # Only log errors by default
 logger.addHandler(logging.NullHandler())
 
-# --- C++ Engine Loader (Singleton) ---
-class _Engine:
-    def __init__(self):
-        self.dll = None
-        try:
-            dll_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'limiter_engine.dll')
-            if not os.path.exists(dll_path):
-                raise FileNotFoundError(f"limiter_engine.dll not found in the package directory.")
-
-            self.dll = ctypes.CDLL(dll_path)
-            self._configure_functions()
-            self.dll.StartLimiter()
-            atexit.register(self.shutdown)
-            logger.info("✅ CPU Limiter Engine (C++) Loaded and Started.")
-
-        except (FileNotFoundError, OSError) as e:
-            logger.critical("❌ CRITICAL ERROR: Could not load limiter_engine.dll.")
-            print(f"❌ CRITICAL ERROR: Could not load limiter_engine.dll. {e}")
-            raise RuntimeError(f"Engine loading failed: {e}. Ensure the 64-bit DLL is in the correct folder.")
-
-    def _configure_functions(self):
-        self.dll.StartLimiter.restype = None
-        self.dll.StopLimiter.restype = None
-        self.dll.AddProcess.argtypes = [ctypes.wintypes.DWORD, ctypes.c_int]
-        self.dll.AddProcess.restype = None
-        self.dll.RemoveProcess.argtypes = [ctypes.wintypes.DWORD]
-        self.dll.RemoveProcess.restype = None
-        self.dll.ModifyProcessLimit.argtypes = [ctypes.wintypes.DWORD, ctypes.c_int]
-        self.dll.ModifyProcessLimit.restype = None
-        self.dll.GetManagedPids.argtypes = [ctypes.POINTER(ctypes.wintypes.DWORD), ctypes.c_int]
-        self.dll.GetManagedPids.restype = ctypes.c_int
-
-    def add_process(self, pid, limit):
-        if self.dll: self.dll.AddProcess(pid, limit)
-    def modify_process_limit(self, pid, limit):
-        if self.dll: self.dll.ModifyProcessLimit(pid, limit)
-    def remove_process(self, pid):
-        if self.dll: self.dll.RemoveProcess(pid)
-    def shutdown(self):
-        if self.dll:
-            logger.info("Shutting down C++ Limiter Engine...")
-            self.dll.StopLimiter()
-            self.dll = None
+# --- Engine (Singleton) ---
+# The best backend for this platform: the C++ engine on Windows, cgroups or signals elsewhere.
+# Created on first use, so importing the library never loads a DLL or starts a thread.
+engine = None
+_engine_lock = threading.Lock()
+
+# Delivered to listeners (see `CpuLimiter.add_listener`). `kind` is "attached" when a rule
+# started limiting a new process, or "exited" when a managed process went away.
+LimiterEvent = namedtuple("LimiterEvent", "kind pid rule")
+
+def _get_engine():
+    global engine
+    with _engine_lock:
+        if engine is None:
+            engine = get_default_engine()
+        return engine
+
+def set_default_period(period_ms):
+    """
+    Sets the global default duty-cycle period (in milliseconds) of the shared engine.
+    Processes added without an explicit `period_ms` use it. The built-in default is 200 ms.
+    """
+    _get_engine().set_default_period(period_ms)
 
-engine = _Engine()
+def _writer(method):
+    """
+    Runs a `CpuLimiter` method that changes the managed state under the write lock.
+    When the outermost change is done, the state version is bumped (readers rebuild their
+    snapshot on their next call), and the events it raised are sent to the listeners after
+    the lock is released.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        events = None
+        try:
+            with self._lock:
+                self._write_depth += 1
+                try:
+                    return method(self, *args, **kwargs)
+                finally:
+                    self._write_depth -= 1
+                    if self._write_depth == 0:
+                        self._version += 1
+                        events, self._pending_events = self._pending_events, []
+        finally:
+            if events: self._dispatch(events)
+    return wrapper
 
 class CpuLimiter:
     """
     Manages and applies CPU limits to one or more processes.
     This class maintains 100% backward compatibility with the original pure-Python API,
-    while using a high-performance C++ backend for its core logic.
+    while delegating the actual limiting to a pluggable engine backend
+    (the C++ engine on Windows, a SIGSTOP/SIGCONT scheduler on Linux).
+    Pass `engine=` to use a specific backend instead of the shared default one.
+
+    Thread safety: every method may be called from any thread. Methods that change
+    what is managed are serialized by one lock (process lookups for `add()` run before
+    it is taken). Read-only calls such as `get_active()` and `get_groups()` return copies
+    from an immutable snapshot of the state, which is only rebuilt (under the lock) by the
+    first read after a change; until then reads don't take the lock. Changes themselves
+    never copy the state, so they cost the same however many processes are managed.
+    Event listeners are called once the lock is released.
     """
-    def __init__(self, processes_to_limit: dict = None):
+    def __init__(self, processes_to_limit: dict = None, engine: Engine = None):
         # --- FIX: REMOVED THE UNNECESSARY CALL TO `engine.is_loaded()` ---
         # The program will have already crashed if the engine failed to load,
         # so this check was redundant and caused the error.
-        
+
+        self._engine = engine if engine is not None else _get_engine()
         self._process_info = {}
+        # Secondary indexes over `_process_info`, kept in sync by `_insert_info` / `_delete_info`
+        self._pids_by_name = {}  # lower-case process_name -> set of pids
+        self._pids_by_title = {}  # lower-case window_title_contains -> set of pids
         self._active_pids = set()
+        self._feedback = None  # Created on first use by target_cpu_percent processes
+        self._groups = {}  # group name -> group info dict
+        self._active_groups = set()
+        self._group_refresher = None
+        self._budgets = {}  # root name -> Budget
+        self._rule_watcher = None
+        self._listeners = []
+        # Serializes every change to the managed state, including those made by background watchers.
+        self._lock = threading.RLock()
+        self._write_depth = 0  # Nesting of `_writer` methods on the thread holding the lock
+        self._pending_events = []  # Raised by the change in progress, sent once it is done
+        self._version = 0  # Bumped after every change
+        self._view = (-1, None)  # (version, snapshot) read by get_active() / get_groups()
 
         if processes_to_limit:
             for identifier, limit in processes_to_limit.items():
@@ -81,8 +116,9 @@ class CpuLimiter:
             self.start_all()
 
     def _find_pids_by_name(self, process_name):
-        return [p.pid for p in psutil.process_iter(['pid', 'name']) if p.info['name'].lower() == process_name.lower()]
+        return get_process_table().pids_named(process_name)
     def _find_pids_by_window_title(self, title_substring):
+        gw, win32process = _windows_api()
         pids = set()
         for window in gw.getAllWindows():
             if window.visible and title_substring.lower() in window.title.lower():
@@ -91,87 +127,452 @@ class CpuLimiter:
                 pids.add(pid)
         return list(pids)
 
-    def add(self, pid=None, process_name=None, window_title_contains=None, limit_percentage=98):
-        """Adds a process to be managed. If the process is already managed, this modifies its limit."""
+    def add(self, pid=None, process_name=None, window_title_contains=None, limit_percentage=98, period_ms=None, target_cpu_percent=None):
+        """
+        Adds a process to be managed. If the process is already managed, this modifies its limit.
+        `period_ms` sets the length of its suspend/resume cycle (defaults to the engine's period):
+        short periods mean shorter pauses, long periods mean fewer wakeups and context switches.
+        `target_cpu_percent` switches to closed-loop mode instead of `limit_percentage`: the
+        process's real CPU usage is measured and its duty cycle adapted to hold it near the target
+        (in percent of one core). It is not suspended at all while it stays under the target.
+        """
         if not any([pid, process_name, window_title_contains]): raise ValueError("Must provide an identifier.")
         target_pids = []
         if pid: target_pids.append(pid)
         if process_name: target_pids.extend(self._find_pids_by_name(process_name))
         if window_title_contains: target_pids.extend(self._find_pids_by_window_title(window_title_contains))
-        for p in set(target_pids):
+        self._add_pids(set(target_pids), process_name, window_title_contains, limit_percentage, period_ms, target_cpu_percent)
+
+    @_writer
+    def _add_pids(self, target_pids, process_name, window_title_contains, limit_percentage, period_ms, target_cpu_percent):
+        self._prune_reused([p for p in target_pids if p in self._process_info])
+        to_modify, to_restart = [], []
+        for p in target_pids:
             # If the process is already managed, this call will modify its limit.
             if p in self._process_info:
-                self._process_info[p]['limit_percentage'] = limit_percentage
+                info = self._process_info[p]
+                switches_mode = (info['target_cpu_percent'] is None) != (target_cpu_percent is None)
+                # Switching between fixed and closed-loop mode restarts the process under the new mode.
+                if switches_mode and p in self._active_pids:
+                    self._stop_pids([p])
+                    to_restart.append(p)
+                info = self._update_info(p, limit_percentage=limit_percentage, target_cpu_percent=target_cpu_percent, period_ms=info['period_ms'] if period_ms is None else period_ms)
                 # If it's actively being limited, apply the new limit immediately.
                 if p in self._active_pids:
-                    engine.modify_process_limit(p, limit_percentage)
+                    if target_cpu_percent is not None: self._get_feedback().track(p, target_cpu_percent, info['period_ms'])
+                    else: to_modify.append((p, limit_percentage, period_ms))
             else:
                 # Otherwise, add it as a new managed process.
-                self._process_info[p] = { "pid": p, "process_name": process_name, "window_title_contains": window_title_contains, "limit_percentage": limit_percentage }
+                self._insert_info({ "pid": p, "process_name": process_name, "window_title_contains": window_title_contains, "limit_percentage": limit_percentage, "period_ms": period_ms, "target_cpu_percent": target_cpu_percent, "rule": None, "create_time": process_create_time(p) })
+        if to_modify: self._engine.modify_many(to_modify)
+        if to_restart: self._start_pids(to_restart)
 
+    @_writer
     def remove(self, pid=None, process_name=None, window_title_contains=None):
         """Stops limiting and completely removes a process from management."""
-        pids_to_remove = self._get_pids_for_criteria(pid, process_name, window_title_contains)
-        for p in pids_to_remove:
-            if p in self._process_info:
-                if p in self._active_pids:
-                    engine.remove_process(p)
-                    self._active_pids.remove(p)
-                del self._process_info[p]
+        pids_to_remove = [p for p in self._get_pids_for_criteria(pid, process_name, window_title_contains) if p in self._process_info]
+        self._stop_pids(pids_to_remove)
+        for p in pids_to_remove: self._delete_info(p)
 
+    @_writer
     def start(self, pid=None, process_name=None, window_title_contains=None):
         """Starts limiting a specific process/group that has been added."""
-        pids_to_start = self._get_pids_for_criteria(pid, process_name, window_title_contains)
-        for p in pids_to_start:
-            if p in self._process_info and p not in self._active_pids:
-                limit = self._process_info[p]['limit_percentage']
-                engine.add_process(p, limit)
-                self._active_pids.add(p)
+        self._start_pids(self._get_pids_for_criteria(pid, process_name, window_title_contains))
 
+    @_writer
     def stop(self, pid=None, process_name=None, window_title_contains=None):
         """Stops limiting a specific process/group but keeps it in the added list."""
-        pids_to_stop = self._get_pids_for_criteria(pid, process_name, window_title_contains)
-        for p in pids_to_stop:
-            if p in self._active_pids:
-                engine.remove_process(p)
-                self._active_pids.remove(p)
+        self._stop_pids(self._get_pids_for_criteria(pid, process_name, window_title_contains))
 
+    @_writer
     def modify_limit(self, pid=None, process_name=None, window_title_contains=None, new_limit_percentage=98):
         """Modifies the CPU limit for a specific, actively limited process/group."""
-        pids_to_modify = self._get_pids_for_criteria(pid, process_name, window_title_contains)
+        pids_to_modify = self._prune_reused(self._get_pids_for_criteria(pid, process_name, window_title_contains))
+        to_modify, to_restart = [], []
         for p in pids_to_modify:
             if p in self._active_pids:
-                # Update the limit in the C++ engine
-                engine.modify_process_limit(p, new_limit_percentage)
+                info = self._process_info[p]
+                # A closed-loop process switches back to a fixed limit.
+                if info['target_cpu_percent'] is not None:
+                    self._stop_pids([p])
+                    to_restart.append(p)
+                else: to_modify.append((p, new_limit_percentage))
                 # Update the limit in the Python state
-                self._process_info[p]['limit_percentage'] = new_limit_percentage
+                self._update_info(p, limit_percentage=new_limit_percentage, target_cpu_percent=None)
                 logger.info(f"✅ Modified limit for PID {p} to {100 - new_limit_percentage}% CPU.")
             else:
                 logger.warning(f"⚠️ Cannot modify PID {p}: it is not being actively limited. Use start() first.")
+        # Update the limits in the engine, all in one call
+        if to_modify: self._engine.modify_many(to_modify)
+        if to_restart: self._start_pids(to_restart)
+
+    @_writer
+    def set_period(self, pid=None, process_name=None, window_title_contains=None, period_ms=None):
+        """Changes the duty-cycle period of a process/group. Actively limited processes pick it up immediately."""
+        if period_ms is None: raise ValueError("Must provide period_ms.")
+        to_modify = []
+        for p in self._prune_reused(self._get_pids_for_criteria(pid, process_name, window_title_contains)):
+            info = self._update_info(p, period_ms=period_ms)
+            if p not in self._active_pids: continue
+            if info['target_cpu_percent'] is not None: self._get_feedback().track(p, info['target_cpu_percent'], period_ms)
+            else: to_modify.append((p, info['limit_percentage'], period_ms))
+        if to_modify: self._engine.modify_many(to_modify)
+
+    @property
+    def default_period_ms(self):
+        """The period of processes added without an explicit `period_ms` (the engine's default)."""
+        return self._engine.default_period_ms
+
+    # --- Groups ---
+    @_writer
+    def add_group(self, group_name, pid=None, process_name=None, include_children=True, limit_percentage=98, period_ms=None, target_cpu_percent=None):
+        """
+        Adds a group of processes that are limited as ONE unit, e.g. a whole browser or build.
+        The group is `pid` (plus all its descendants, if `include_children`) and/or every process
+        named `process_name`. Its membership is refreshed in the background, so children forked
+        later join the group automatically.
+
+        With `limit_percentage`, all members are suspended and resumed together in the same engine
+        tick (on Windows only with a DLL that exports `AddProcessesInPhase`; see the README). With `target_cpu_percent`, the members' *combined* usage is measured and held near the
+        target, so the whole group shares one CPU budget. If the group already exists, its limits are updated.
+        """
+        if not any([pid, process_name]): raise ValueError("Must provide a pid or process_name.")
+        info = self._groups.get(group_name)
+        if info is not None:
+            was_active = group_name in self._active_groups
+            if was_active: self.stop_group(group_name)
+            info.update(limit_percentage=limit_percentage, target_cpu_percent=target_cpu_percent)
+            if period_ms is not None: info['period_ms'] = period_ms
+            if was_active: self.start_group(group_name)
+            return
+        self._groups[group_name] = { "group_name": group_name, "pid": pid, "process_name": process_name, "include_children": include_children, "limit_percentage": limit_percentage, "period_ms": period_ms, "target_cpu_percent": target_cpu_percent, "members": set() }
+
+    def _resolve_group(self, info):
+        pids = set()
+        if info['pid']:
+            if info['include_children']: pids.update(tree_pids(info['pid']))
+            elif psutil.pid_exists(info['pid']): pids.add(info['pid'])
+        if info['process_name']: pids.update(pids_named(info['process_name']))
+        return pids
+
+    @_writer
+    def _on_group_change(self, group_name, pids):
+        """Called by the group refresher when a group's membership changes."""
+        info = self._groups.get(group_name)
+        if info is None or group_name not in self._active_groups: return
+        info['members'] = set(pids)
+        if info['target_cpu_percent'] is not None: self._get_feedback().set_group_members(group_name, pids)
+        else: self._engine.set_group_members(group_name, pids)
+
+    @_writer
+    def start_group(self, group_name):
+        """Starts limiting a group that has been added."""
+        info = self._groups.get(group_name)
+        if info is None or group_name in self._active_groups: return
+        info['members'] = self._resolve_group(info)
+        if info['target_cpu_percent'] is not None:
+            self._get_feedback().track_group(group_name, info['members'], info['target_cpu_percent'], info['period_ms'])
+        else:
+            self._engine.add_group(group_name, info['members'], info['limit_percentage'], info['period_ms'])
+        self._active_groups.add(group_name)
+        if self._group_refresher is None: self._group_refresher = GroupRefresher(self._on_group_change)
+        self._group_refresher.watch(group_name, lambda: self._resolve_group(info), info['members'])
+
+    @_writer
+    def stop_group(self, group_name):
+        """Stops limiting a group but keeps it in the added list."""
+        if group_name not in self._active_groups: return
+        self._group_refresher.unwatch(group_name)
+        self._active_groups.discard(group_name)
+        if self._groups[group_name]['target_cpu_percent'] is not None: self._get_feedback().untrack_group(group_name)
+        else: self._engine.remove_group(group_name)
+
+    @_writer
+    def remove_group(self, group_name):
+        """Stops limiting a group and removes it from management."""
+        self.stop_group(group_name)
+        self._groups.pop(group_name, None)
+
+    def get_groups(self):
+        """Returns a list of all added groups, with their current members."""
+        return [dict(info, members=set(info['members'])) for info in self._snapshot()["groups"]]
 
+    # --- Budgets ---
+    @_writer
+    def add_budget(self, budget):
+        """
+        Limits a `Budget` tree: its root's `cap_percent` of the host is shared by its leaves, by
+        weight, and re-split from their measured usage every feedback interval, so the share of
+        an idle leaf goes to its busy siblings. Each leaf becomes a closed-loop group named by its
+        path (e.g. "batch/encode"). Adding a budget with the name of an existing one replaces it.
+        """
+        if budget.cap_percent is None: raise ValueError("The root of a budget tree needs a cap_percent.")
+        self.remove_budget(budget.name)
+        shares = allocate(budget, {path: None for path, _ in budget.leaves()}, psutil.cpu_count() or 1)  # Weighted shares until usage is measured.
+        for path, leaf in budget.leaves():
+            self.add_group(path, pid=leaf.pid, process_name=leaf.process_name, include_children=leaf.include_children, period_ms=leaf.period_ms, target_cpu_percent=shares[path])
+            self.start_group(path)
+        self._budgets[budget.name] = budget
+        self._get_feedback().set_budget(budget)
+
+    @_writer
+    def remove_budget(self, name):
+        """Stops limiting a budget tree and removes its leaf groups."""
+        budget = self._budgets.pop(name, None)
+        if budget is None: return
+        self._get_feedback().remove_budget(name)
+        for path, _ in budget.leaves(): self.remove_group(path)
+
+    def get_budgets(self):
+        """Returns `{name: {leaf path: target_cpu_percent}}`: the share each leaf is currently held at."""
+        with self._lock:
+            names = list(self._budgets)
+            feedback = self._get_feedback() if names else None
+        return {name: feedback.get_budget_targets(name) for name in names}
+
+    # --- Rules ---
+    def add_rule(self, process_name=None, cmdline=None, regex=False, limit_percentage=98, period_ms=None, target_cpu_percent=None, exclude=()):
+        """
+        Adds a persistent rule: every process matching it is limited as soon as it starts,
+        including the ones already running, and forgotten again when it exits.
+        `process_name` and `cmdline` are case-insensitive globs (e.g. `"ffmpeg"`, `"*worker*"`),
+        or regular expressions if `regex=True`. Processes named in `exclude` are never matched.
+        The other arguments work like in `add()`.
+        Returns the `Rule`, which can be passed to `update_rule()` and `remove_rule()`.
+        """
+        rule = Rule(process_name, cmdline, regex, limit_percentage, period_ms, target_cpu_percent, exclude)
+        with self._lock:
+            if self._rule_watcher is None: self._rule_watcher = RuleWatcher(self._on_rule_match, self._on_rule_exit)
+        self._rule_watcher.add(rule)
+        return rule
+
+    @_writer
+    def remove_rule(self, rule):
+        """Removes a rule and stops limiting the processes it attached."""
+        if self._rule_watcher is None: return
+        released = self._rule_watcher.remove(rule)
+        pids = [p for p in released if p in self._process_info and self._process_info[p]['rule'] is rule]
+        self._stop_pids(pids)
+        for p in pids: self._delete_info(p)
+
+    @_writer
+    def update_rule(self, rule, limit_percentage=None, period_ms=None, target_cpu_percent=None, exclude=None):
+        """
+        Changes a rule in place, without removing it. Arguments left as None keep their current
+        value; giving `limit_percentage` without `target_cpu_percent` switches a closed-loop rule
+        to a fixed limit. Processes it already limits are only touched if their settings actually
+        change, and keep their phase in the cycle; processes that became excluded are released.
+        """
+        if self._rule_watcher is None or rule not in self._rule_watcher.rules(): raise ValueError(f"{rule!r} is not an active rule.")
+        if exclude is not None:
+            released = self._rule_watcher.set_exclude(rule, exclude)
+            pids = [p for p in released if p in self._process_info and self._process_info[p]['rule'] is rule]
+            self._stop_pids(pids)
+            for p in pids: self._delete_info(p)
+        if target_cpu_percent is None and limit_percentage is None: target_cpu_percent = rule.target_cpu_percent
+        if limit_percentage is None: limit_percentage = rule.limit_percentage
+        new_period = rule.period_ms if period_ms is None else period_ms
+        if (limit_percentage, new_period, target_cpu_percent) == (rule.limit_percentage, rule.period_ms, rule.target_cpu_percent): return
+        rule.limit_percentage, rule.period_ms, rule.target_cpu_percent = limit_percentage, new_period, target_cpu_percent
+        attached = {p for p, info in self._process_info.items() if info['rule'] is rule}
+        # A period of None leaves each process's own period alone.
+        if attached: self._add_pids(attached, rule.process_name, None, limit_percentage, period_ms, target_cpu_percent)
+
+    def get_rules(self):
+        """Returns the list of active rules."""
+        return [] if self._rule_watcher is None else self._rule_watcher.rules()
+
+    @_writer
+    def _on_rule_match(self, rule, pids):
+        """Called by the rule watcher with new processes that match `rule`."""
+        # The watcher calls this outside its lock, so `rule` may have been removed since it
+        # matched. `remove_rule` and `update_rule` take this lock too, so checking here is final.
+        if rule not in self._rule_watcher.rules(): return
+        if rule.exclude:  # `update_rule` may have excluded some of them since, too.
+            table = get_process_table()
+            pids = [p for p in pids if (table.name_of(p) or "").lower() not in rule.exclude]
+        new_pids = [p for p in pids if p not in self._process_info]
+        for p in new_pids:
+            self._insert_info({ "pid": p, "process_name": rule.process_name, "window_title_contains": None, "limit_percentage": rule.limit_percentage, "period_ms": rule.period_ms, "target_cpu_percent": rule.target_cpu_percent, "rule": rule, "create_time": process_create_time(p) })
+        self._start_pids(new_pids)
+        self._emit("attached", [p for p in new_pids if p in self._active_pids], rule)
+
+    @_writer
+    def _on_rule_exit(self, pids):
+        """Called by the rule watcher with rule-attached processes that have exited."""
+        self._forget_pids([p for p in pids if p in self._process_info and self._process_info[p]['rule'] is not None])
+
+    # --- Events ---
+    def add_listener(self, callback):
+        """
+        Calls `callback(event)` with a `LimiterEvent` whenever a rule attaches a process or a
+        managed process exits. Callbacks run on the thread that made the change (usually a background
+        watcher), after the limiter's lock is released, so they may call back into the limiter.
+        """
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners: self._listeners.remove(callback)
+
+    def _emit(self, kind, pids, rule=None):
+        """Queues events; they are sent when the change raising them is done (see `_writer`)."""
+        self._pending_events.extend(LimiterEvent(kind, p, rule) for p in pids)
+
+    def _dispatch(self, events):
+        for callback in list(self._listeners):
+            for event in events:
+                try: callback(event)
+                except Exception as e: logger.error(f"❌ Event listener failed: {e}")
+
+    def prune_exited(self):
+        """
+        Forgets every managed process that has exited (or whose PID was reused) and returns their PIDs.
+        Uses the shared process table, so it costs one dictionary lookup per managed process.
+        """
+        return self._prune_exited(get_process_table().processes())
+
+    @_writer
+    def _prune_exited(self, running):
+        gone = []
+        for p, info in self._process_info.items():
+            current = running.get(p)
+            if current is None or (info['create_time'] is not None and not same_process(p, info['create_time'], current[2])): gone.append(p)
+        if gone: self._forget_pids(gone)
+        return gone
+
+    @_writer
     def start_all(self):
-        """Starts limiting all processes that have been added."""
-        for p in list(self._process_info.keys()): self.start(pid=p)
+        """Starts limiting all processes and groups that have been added."""
+        self._start_pids(list(self._process_info.keys()))
+        for group_name in list(self._groups): self.start_group(group_name)
 
+    @_writer
     def stop_all(self):
-        """Stops limiting all active processes."""
-        for p in list(self._active_pids): self.stop(pid=p)
+        """Stops limiting all active processes and groups."""
+        self._stop_pids(list(self._active_pids))
+        for group_name in list(self._active_groups): self.stop_group(group_name)
 
+    @_writer
     def shutdown(self):
-        """A convenient alias for stop_all()."""
+        """Removes every rule and budget and stops limiting all processes and groups."""
+        for rule in self.get_rules(): self.remove_rule(rule)
+        for name in list(self._budgets): self.remove_budget(name)
         self.stop_all()
 
+    def _get_feedback(self):
+        """Call with `self._lock` held, so two threads can't each create a loop."""
+        if self._feedback is None: self._feedback = FeedbackLoop(self._engine)
+        return self._feedback
+
+    def _insert_info(self, info):
+        self._process_info[info['pid']] = info
+        for index, key in ((self._pids_by_name, info['process_name']), (self._pids_by_title, info['window_title_contains'])):
+            if key: index.setdefault(key.lower(), set()).add(info['pid'])
+
+    def _delete_info(self, pid):
+        info = self._process_info.pop(pid)
+        for index, key in ((self._pids_by_name, info['process_name']), (self._pids_by_title, info['window_title_contains'])):
+            if not key: continue
+            pids = index.get(key.lower())
+            if pids is not None:
+                pids.discard(pid)
+                if not pids: del index[key.lower()]
+
+    def _update_info(self, pid, **changes):
+        """
+        Replaces a process's info dict instead of changing it in place (copy-on-write),
+        so snapshots taken by readers never see a half-applied change.
+        """
+        info = self._process_info[pid] = dict(self._process_info[pid], **changes)
+        return info
+
+    def _prune_reused(self, pids):
+        """
+        Drops managed entries whose process has exited or whose PID now belongs to another
+        process (checked by start time), and returns the PIDs in `pids` that are still valid.
+        """
+        valid, stale = [], []
+        for p in pids:
+            info = self._process_info.get(p)
+            if info is None: continue
+            if info['create_time'] is not None and not same_process(p, info['create_time']): stale.append(p)
+            else: valid.append(p)
+        if stale:
+            logger.warning(f"⚠️ PIDs {stale} exited or were reused by other processes; they are no longer managed.")
+            self._forget_pids(stale)
+        return valid
+
+    def _forget_pids(self, pids):
+        """Stops and forgets processes that no longer exist, and tells the listeners."""
+        rules = {p: self._process_info[p]['rule'] for p in pids}
+        self._stop_pids(pids)
+        for p in pids:
+            self._delete_info(p)
+            self._emit("exited", [p], rules[p])
+
+    def _start_pids(self, pids):
+        """Hands every added-but-inactive PID in `pids` to the engine in a single batch."""
+        to_start = self._prune_reused([p for p in pids if p in self._process_info and p not in self._active_pids])
+        if not to_start: return
+        fixed = []
+        for p in to_start:
+            info = self._process_info[p]
+            if info['target_cpu_percent'] is not None: self._get_feedback().track(p, info['target_cpu_percent'], info['period_ms'])
+            else: fixed.append((p, info['limit_percentage'], info['period_ms']))
+        if fixed: self._engine.add_many(fixed)
+        self._active_pids.update(to_start)
+
+    def _stop_pids(self, pids):
+        """Removes every active PID in `pids` from the engine in a single batch."""
+        to_stop = [p for p in pids if p in self._active_pids]
+        if not to_stop: return
+        closed_loop = [p for p in to_stop if self._process_info[p]['target_cpu_percent'] is not None]
+        if closed_loop: self._get_feedback().untrack(closed_loop)
+        if len(closed_loop) < len(to_stop): self._engine.remove_many([p for p in to_stop if self._process_info[p]['target_cpu_percent'] is None])
+        self._active_pids.difference_update(to_stop)
+
+    def _snapshot(self):
+        """
+        An immutable view of the managed state, shared by all readers until the next change.
+        Writers only bump `_version`; the first reader to find the view stale rebuilds it under
+        the lock, so a burst of changes costs one copy of the state instead of one per change.
+        """
+        version, snapshot = self._view
+        if version == self._version: return snapshot
+        with self._lock:
+            version, snapshot = self._view
+            if version == self._version: return snapshot  # Another reader rebuilt it meanwhile
+            # Info dicts are never changed in place (see `_update_info`), so shallow copies are enough.
+            groups = tuple(dict(info, members=frozenset(info['members']), active=name in self._active_groups) for name, info in self._groups.items())
+            snapshot = {
+                "active": tuple(info for pid, info in self._process_info.items() if pid in self._active_pids),
+                "groups": groups,
+                "managed": frozenset(self._active_pids).union(*[info['members'] for info in groups]),
+            }
+            self._view = (self._version, snapshot)
+            return snapshot
+
     def get_active(self):
-        """Returns a list of actively limited processes."""
-        return [info for pid, info in self._process_info.items() if pid in self._active_pids]
+        """Returns a list of actively limited processes (copies; changing them has no effect)."""
+        return [dict(info) for info in self._snapshot()["active"]]
+
+    def get_stats(self):
+        """
+        Returns what the engine measured, as `{"engine": EngineStats or None, "processes": {pid: ProcessStats}, "managed": frozenset}`.
+        `managed` is every PID this limiter actively limits (including group members); only those are listed.
+        See `cpulimiter.backends.ProcessStats` / `EngineStats` for the fields.
+        """
+        managed = self._snapshot()["managed"]
+        processes = {s.pid: s for s in self._engine.get_process_stats() if s.pid in managed}
+        return {"engine": self._engine.get_engine_stats(), "processes": processes, "managed": managed}
 
     def _get_pids_for_criteria(self, pid=None, process_name=None, window_title_contains=None):
-        """Helper to find PIDs matching the given criteria from the managed list."""
+        """
+        Helper to find PIDs matching the given criteria from the managed list.
+        Names and titles are looked up in the secondary indexes, case-insensitively like `_find_pids_by_name`.
+        """
         if pid: return [pid] if pid in self._process_info else []
-        found_pids = []
-        for p, info in self._process_info.items():
-            match = False
-            if process_name and info["process_name"] == process_name: match = True
-            if window_title_contains and info["window_title_contains"] == window_title_contains: match = True
-            if match: found_pids.append(p)
-        return found_pids
\ No newline at end of file
+        found_pids = set()
+        if process_name: found_pids.update(self._pids_by_name.get(process_name.lower(), ()))
+        if window_title_contains: found_pids.update(self._pids_by_title.get(window_title_contains.lower(), ()))
+        return list(found_pids)
\ No newline at end of file
@@ -1,122 +1,18 @@
-import ctypes
-import ctypes.wintypes
-import threading
-import time
-import psutil
-import pygetwindow as gw
-import win32process
-import os
-
-# Windows API constants
-THREAD_SUSPEND_RESUME = 0x0002
-THREAD_QUERY_INFORMATION = 0x0040
-
-# Windows API functions
-kernel32 = ctypes.windll.kernel32
-OpenThread = kernel32.OpenThread
-OpenThread.argtypes = [ctypes.wintypes.DWORD, ctypes.wintypes.BOOL, ctypes.wintypes.DWORD]
-OpenThread.restype = ctypes.wintypes.HANDLE
-
-SuspendThread = kernel32.SuspendThread
-SuspendThread.argtypes = [ctypes.wintypes.HANDLE]
-SuspendThread.restype = ctypes.wintypes.DWORD
-
-ResumeThread = kernel32.ResumeThread
-ResumeThread.argtypes = [ctypes.wintypes.HANDLE]
-ResumeThread.restype = ctypes.wintypes.DWORD
-
-CloseHandle = kernel32.CloseHandle
-CloseHandle.argtypes = [ctypes.wintypes.HANDLE]
-CloseHandle.restype = ctypes.wintypes.BOOL
-
-class _ProcessLimiter:
-    """Internal class to limit a single process. This contains the original core logic."""
-    def __init__(self, pid, limit_percentage):
-        self.pid = pid
-        self.limit_percentage = limit_percentage
-        self.active = False
-        self.thread = None
-        self.stop_event = threading.Event()
-        self._thread_handles = {}
-        self._last_thread_update = 0
-
-    def start(self):
-        if not self.active:
-            self.active = True
-            self.stop_event.clear()
-            self.thread = threading.Thread(target=self._limit_loop)
-            self.thread.daemon = True
-            self.thread.start()
-
-    def stop(self):
-        if self.active:
-            self.active = False
-            self.stop_event.set()
-            self._resume_all_threads()
-            if self.thread:
-                self.thread.join(timeout=2)
-
-    def _get_thread_ids(self):
-        try:
-            process = psutil.Process(self.pid)
-            return [thread.id for thread in process.threads()]
-        except (psutil.NoSuchProcess, psutil.AccessDenied):
-            return []
-
-    def _get_or_create_handle(self, tid):
-        if tid not in self._thread_handles:
-            handle = OpenThread(THREAD_SUSPEND_RESUME, False, tid)
-            if handle:
-                self._thread_handles[tid] = handle
-        return self._thread_handles.get(tid)
-
-    def _cleanup_handles(self):
-        for handle in self._thread_handles.values():
-            CloseHandle(handle)
-        self._thread_handles.clear()
-
-    def _suspend_all_threads(self):
-        for tid in self._get_thread_ids():
-            handle = self._get_or_create_handle(tid)
-            if handle:
-                SuspendThread(handle)
-
-    def _resume_all_threads(self):
-        for tid in self._get_thread_ids():
-            handle = self._get_or_create_handle(tid)
-            if handle:
-                ResumeThread(handle)
-
-    def _limit_loop(self):
-        cycle_time = 15.0
-        suspend_time = cycle_time * (self.limit_percentage / 100.0)
-        resume_time = cycle_time - suspend_time
-
-        while self.active and not self.stop_event.is_set():
-            try:
-                current_time = time.time()
-                if current_time - self._last_thread_update > 30:
-                    self._cleanup_handles()
-                    self._last_thread_update = current_time
-                
-                self._suspend_all_threads()
-                self.stop_event.wait(suspend_time)
-
-                if not self.active:
-                    break
-                    
-                self._resume_all_threads()
-                self.stop_event.wait(resume_time)
-                
-            except Exception:
-                break
-        
-        self._resume_all_threads()
-        self._cleanup_handles()
+from .backends.threads import ThreadEngine
+from .proctable import get_process_table
+from .utils import _windows_api
+
+# The legacy limiter suspends thread by thread, which is expensive, so it uses a long cycle by default.
+DEFAULT_PERIOD_MS = 15000
 
 class CpuLimiter:
-    """Manages and applies CPU limits to one or more processes."""
-    def __init__(self, processes_to_limit: dict = None):
+    """
+    Manages and applies CPU limits to one or more processes.
+
+    Every process is throttled by one shared `ThreadEngine` scheduler thread,
+    which suspends and resumes the process's threads through cached handles.
+    """
+    def __init__(self, processes_to_limit: dict = None, engine=None):
         """
         Initializes the CpuLimiter.
 
@@ -126,9 +22,12 @@ class CpuLimiter:
                                                  the limit percentage. If provided, automatically
                                                  adds and starts limiting these processes.
                                                  Example: {"chrome.exe": 95, 1234: 90}
+            engine (Engine, optional): The engine doing the throttling. Defaults to a `ThreadEngine`
+                                       with a 15 second cycle, created when limiting first starts.
         """
-        self._limiters = {}  # Stores {pid: _ProcessLimiter object}
+        self._engine = engine
         self._process_info = {} # Stores {pid: info dict}
+        self._active_pids = set()
 
         if processes_to_limit:
             for identifier, limit in processes_to_limit.items():
@@ -141,14 +40,29 @@ class CpuLimiter:
                     self.add(window_title_contains=identifier, limit_percentage=limit)
             self.start_all()
 
+    def _get_engine(self):
+        if self._engine is None:
+            self._engine = ThreadEngine(DEFAULT_PERIOD_MS)
+        return self._engine
+
+    def _start_pids(self, pids):
+        pids = [p for p in pids if p in self._process_info and p not in self._active_pids]
+        if not pids: return
+        self._get_engine().add_many([(p, self._process_info[p]["limit_percentage"], self._process_info[p]["period_ms"] or DEFAULT_PERIOD_MS) for p in pids])
+        self._active_pids.update(pids)
+
+    def _stop_pids(self, pids):
+        pids = [p for p in pids if p in self._active_pids]
+        if not pids: return
+        self._engine.remove_many(pids)
+        self._active_pids.difference_update(pids)
+
     def _find_pids_by_name(self, process_name):
-        pids = []
-        for proc in psutil.process_iter(['pid', 'name']):
-            if proc.info['name'] == process_name:
-                pids.append(proc.info['pid'])
-        return pids
+        table = get_process_table()
+        return [pid for pid in table.pids_named(process_name) if table.name_of(pid) == process_name]
 
     def _find_pids_by_window_title(self, title_substring):
+        gw, win32process = _windows_api()
         pids = []
         for window in gw.getAllWindows():
             if window.visible and title_substring in window.title:
@@ -160,8 +74,8 @@ class CpuLimiter:
                     continue
         return pids
 
-    def add(self, pid=None, process_name=None, window_title_contains=None, limit_percentage=98):
-        """Adds a process to be limited."""
+    def add(self, pid=None, process_name=None, window_title_contains=None, limit_percentage=98, period_ms=None):
+        """Adds a process to be limited. `period_ms` overrides the 15 second default cycle."""
         if not any([pid, process_name, window_title_contains]):
             raise ValueError("Must provide a pid, process_name, or window_title_contains.")
 
@@ -174,47 +88,37 @@ class CpuLimiter:
             target_pids.extend(self._find_pids_by_window_title(window_title_contains))
         
         for p in set(target_pids):
-            if p not in self._limiters:
+            if p not in self._process_info:
                 self._process_info[p] = {
                     "pid": p,
                     "process_name": process_name,
                     "window_title_contains": window_title_contains,
-                    "limit_percentage": limit_percentage
+                    "limit_percentage": limit_percentage,
+                    "period_ms": period_ms
                 }
-                self._limiters[p] = _ProcessLimiter(p, limit_percentage)
 
     def remove(self, pid=None, process_name=None, window_title_contains=None):
         """Removes a process from the limiter."""
-        pids_to_remove = self._get_pids_for_criteria(pid, process_name, window_title_contains)
+        pids_to_remove = [p for p in self._get_pids_for_criteria(pid, process_name, window_title_contains) if p in self._process_info]
+        self._stop_pids(pids_to_remove)
         for p in pids_to_remove:
-            if p in self._limiters:
-                self._limiters[p].stop()
-                del self._limiters[p]
-                del self._process_info[p]
+            del self._process_info[p]
 
     def start(self, pid=None, process_name=None, window_title_contains=None):
         """Starts limiting a specific process/group that has been added."""
-        pids_to_start = self._get_pids_for_criteria(pid, process_name, window_title_contains)
-        for p in pids_to_start:
-            if p in self._limiters:
-                self._limiters[p].start()
+        self._start_pids(self._get_pids_for_criteria(pid, process_name, window_title_contains))
 
     def stop(self, pid=None, process_name=None, window_title_contains=None):
         """Stops limiting a specific process/group."""
-        pids_to_stop = self._get_pids_for_criteria(pid, process_name, window_title_contains)
-        for p in pids_to_stop:
-            if p in self._limiters:
-                self._limiters[p].stop()
+        self._stop_pids(self._get_pids_for_criteria(pid, process_name, window_title_contains))
 
     def start_all(self):
         """Starts limiting all added processes."""
-        for limiter in self._limiters.values():
-            limiter.start()
+        self._start_pids(list(self._process_info))
 
     def stop_all(self):
         """Stops limiting all added processes."""
-        for limiter in self._limiters.values():
-            limiter.stop()
+        self._stop_pids(list(self._active_pids))
 
     def shutdown(self):
         """A convenient alias for stop_all()."""
@@ -222,7 +126,7 @@ class CpuLimiter:
 
     def get_active(self):
         """Returns a list of actively limited processes."""
-        return [info for pid, info in self._process_info.items() if self._limiters[pid].active]
+        return [info for pid, info in self._process_info.items() if pid in self._active_pids]
 
     def _get_pids_for_criteria(self, pid=None, process_name=None, window_title_contains=None):
         """Helper to find PIDs matching the given criteria from the managed list."""
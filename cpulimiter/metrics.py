@@ -0,0 +1,134 @@
+"""
+Optional OpenMetrics (Prometheus) exporter for a `CpuLimiter`.
+
+    from cpulimiter import CpuLimiter
+    from cpulimiter import metrics
+
+    limiter = CpuLimiter({"chrome.exe": 90})
+    metrics.start_http_server(limiter, port=9105)   # scrape http://host:9105/metrics
+    text = metrics.render(limiter)                   # or embed the text in your own endpoint
+
+Everything is built from `CpuLimiter.get_stats()`, which only copies the engine's
+counters under its lock, so a scrape never delays throttling. CPU usage is read
+from the OS afterwards, without holding any lock.
+"""
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import psutil
+
+from .proctable import get_process_table
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+DEFAULT_PORT = 9105
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _labels(pid, name, group=None):
+    group = "" if group is None else f',group="{_escape(group)}"'
+    return f'{{pid="{pid}",name="{_escape(name)}"{group}}}'
+
+
+def _cpu_seconds(pid):
+    try:
+        times = psutil.Process(pid).cpu_times()
+        return times.user + times.system
+    except psutil.Error:
+        return None
+
+
+def collect(limiter):
+    """
+    Pull function: returns the metrics as a list of `(name, type, help, samples)`, where
+    `samples` is a list of `(labels, value)`. Counters are named without the `_total` suffix.
+    """
+    stats = limiter.get_stats()
+    table = get_process_table()
+    # Single processes, then the members of every active group (AutoSaver, budgets and
+    # `add_group` limit through groups), each with the settings of what limits it.
+    targets = [(info['pid'], info['process_name'], None, info) for info in limiter.get_active()]
+    listed = {pid for pid, _, _, _ in targets}  # A process limited on its own isn't in the engine's group too.
+    for group in limiter.get_groups():
+        if not group['active']: continue
+        members = sorted(pid for pid in group['members'] if pid not in listed)
+        listed.update(members)
+        targets.extend((pid, group['process_name'], group['group_name'], group) for pid in members)
+    per_process = {
+        "limit": [], "target": [], "cpu": [], "cycles": [], "suspended": [], "failed": [], "duty": [],
+    }
+    for pid, process_name, group, info in targets:
+        labels = _labels(pid, table.name_of(pid) or process_name or "", group)
+        if info['target_cpu_percent'] is not None: per_process["target"].append((labels, info['target_cpu_percent']))
+        else: per_process["limit"].append((labels, info['limit_percentage']))
+        cpu = _cpu_seconds(pid)
+        if cpu is not None: per_process["cpu"].append((labels, cpu))
+        s = stats["processes"].get(pid)
+        if s is None: continue
+        per_process["cycles"].append((labels, s.cycles))
+        per_process["suspended"].append((labels, s.suspended_s))
+        per_process["failed"].append((labels, s.failed_suspends))
+        per_process["duty"].append((labels, s.measured_duty))
+
+    families = [
+        ("cpulimiter_managed_processes", "gauge", "Processes actively managed by the limiter, including group members.", [("", len(stats["managed"]))]),
+        ("cpulimiter_process_limit_percent", "gauge", "Configured limit: percentage of each cycle the process is suspended.", per_process["limit"]),
+        ("cpulimiter_process_target_cpu_percent", "gauge", "Configured closed-loop CPU target, in percent of one core.", per_process["target"]),
+        ("cpulimiter_process_cpu_seconds", "counter", "CPU time used by the process.", per_process["cpu"]),
+        ("cpulimiter_process_suspend_cycles", "counter", "Completed suspend/resume cycles.", per_process["cycles"]),
+        ("cpulimiter_process_suspended_seconds", "counter", "Time the process spent suspended.", per_process["suspended"]),
+        ("cpulimiter_process_failed_suspends", "counter", "Suspend calls that failed.", per_process["failed"]),
+        ("cpulimiter_process_measured_duty_ratio", "gauge", "Observed fraction of time suspended.", per_process["duty"]),
+    ]
+    engine = stats["engine"]
+    if engine is not None:
+        families += [
+            ("cpulimiter_engine_ticks", "counter", "Engine scheduler wakeups.", [("", engine.ticks)]),
+            ("cpulimiter_engine_lateness_avg_seconds", "gauge", "Average delay between a state change's deadline and when it ran.", [("", engine.lateness_avg_ms / 1000.0)]),
+            ("cpulimiter_engine_lateness_p99_seconds", "gauge", "99th percentile of the recent state change delays.", [("", engine.lateness_p99_ms / 1000.0)]),
+            ("cpulimiter_engine_lock_hold_avg_seconds", "gauge", "Average time a tick held the engine lock.", [("", engine.lock_hold_avg_us / 1e6)]),
+            ("cpulimiter_engine_lock_hold_max_seconds", "gauge", "Longest time a tick held the engine lock.", [("", engine.lock_hold_max_us / 1e6)]),
+            ("cpulimiter_engine_failed_suspends", "counter", "Suspend calls that failed, over all processes.", [("", engine.failed_suspends)]),
+        ]
+    return families
+
+
+def render(limiter):
+    """Returns the limiter's metrics in the OpenMetrics text format."""
+    lines = []
+    for name, kind, help_text, samples in collect(limiter):
+        lines.append(f"# TYPE {name} {kind}")
+        lines.append(f"# HELP {name} {help_text}")
+        suffix = "_total" if kind == "counter" else ""
+        for labels, value in samples:
+            lines.append(f"{name}{suffix}{labels} {value}")
+    lines.append("# EOF")
+    return "\n".join(lines) + "\n"
+
+
+def start_http_server(limiter, port=DEFAULT_PORT, addr=""):
+    """
+    Serves `render(limiter)` at `http://addr:port/metrics` from a background thread.
+    Returns the server; call `server.shutdown()` to stop it.
+    """
+    class _Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/", "/metrics"):
+                self.send_error(404)
+                return
+            body = render(limiter).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # Scrapes would flood stderr otherwise.
+
+    server = ThreadingHTTPServer((addr, port), _Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="cpulimiter-metrics", daemon=True).start()
+    return server
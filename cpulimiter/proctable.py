@@ -0,0 +1,183 @@
+"""
+A shared, incrementally updated index of the process table.
+
+Looking a process up by name used to mean a full `psutil.process_iter` scan,
+which on a host with thousands of processes costs far more than the limiting
+itself. `ProcessTable` keeps `name -> PIDs` and `PID -> (name, ppid, start time)`
+dictionaries instead and brings them up to date at most every `max_age` seconds:
+
+- On Linux by diffing the PID directories in `/proc` against the index, so only
+  processes that appeared since the last refresh are read. A PID directory gets a
+  new inode number when the PID is reused, which the diff treats as a new process.
+- Elsewhere by taking a fresh `psutil` snapshot.
+
+Lookups are then plain dictionary hits.
+"""
+import os
+import threading
+import time
+
+import psutil
+
+PROC = "/proc"
+DEFAULT_MAX_AGE = 0.25  # Seconds an index may be stale before a lookup refreshes it.
+COMM_LEN = 15  # The kernel truncates `comm` to this many characters.
+CREATE_TIME_TOLERANCE = 0.01  # Seconds; start times from /proc and psutil differ by rounding.
+
+
+class ProcessTable:
+    """Name and parent indexes over the running processes. Thread safe."""
+
+    def __init__(self, max_age=DEFAULT_MAX_AGE, proc_root=PROC):
+        self.max_age = max_age
+        self._proc_root = proc_root
+        self._incremental = os.path.isdir(proc_root) and os.path.exists(os.path.join(proc_root, "self", "stat"))
+        self._by_pid = {}  # pid -> (name, ppid, create_time)
+        self._by_name = {}  # lower-case name -> set of pids
+        self._children = {}  # ppid -> set of pids
+        self._inodes = {}  # pid -> inode of its /proc directory
+        self._lock = threading.Lock()
+        self._refreshed_at = None
+        if self._incremental:
+            self._clock_ticks = os.sysconf("SC_CLK_TCK")
+            self._boot_time = psutil.boot_time()
+
+    # --- Index maintenance (called with `_lock` held) ---
+    def _insert(self, pid, name, ppid, create_time):
+        self._by_pid[pid] = (name, ppid, create_time)
+        self._by_name.setdefault(name.lower(), set()).add(pid)
+        self._children.setdefault(ppid, set()).add(pid)
+
+    def _delete(self, pid):
+        self._inodes.pop(pid, None)
+        name, ppid, _ = self._by_pid.pop(pid)
+        for index, key in ((self._by_name, name.lower()), (self._children, ppid)):
+            pids = index.get(key)
+            if pids is not None:
+                pids.discard(pid)
+                if not pids: del index[key]
+
+    def _read_stat(self, pid):
+        """(name, ppid, create_time) of `pid` from `/proc/<pid>/stat`, or None if it is gone."""
+        try:
+            with open(f"{self._proc_root}/{pid}/stat", "rb") as f:
+                data = f.read().decode("utf-8", "replace")
+        except OSError:
+            return None
+        # The name is wrapped in parentheses and may itself contain spaces or ')'.
+        open_paren, close_paren = data.find("("), data.rfind(")")
+        name = data[open_paren + 1:close_paren]
+        fields = data[close_paren + 2:].split()
+        ppid, start_ticks = int(fields[1]), int(fields[19])
+        if len(name) >= COMM_LEN:
+            try: name = psutil.Process(pid).name()  # Resolves the full name from the executable.
+            except psutil.Error: pass
+        return name, ppid, self._boot_time + start_ticks / self._clock_ticks
+
+    def _refresh_incremental(self):
+        current = {}
+        with os.scandir(self._proc_root) as entries:
+            for entry in entries:
+                if entry.name.isdigit(): current[int(entry.name)] = entry.inode()
+        inodes = self._inodes
+        for pid in [p for p in self._by_pid if current.get(p) != inodes[p]]:
+            self._delete(pid)  # Exited, or the PID now belongs to another process.
+        for pid, inode in current.items():
+            if pid not in self._by_pid:
+                stat = self._read_stat(pid)
+                if stat is not None:
+                    self._insert(pid, *stat)
+                    inodes[pid] = inode
+
+    def _refresh_snapshot(self):
+        self._by_pid, self._by_name, self._children, self._inodes = {}, {}, {}, {}
+        for proc in psutil.process_iter(['pid', 'name', 'ppid', 'create_time']):
+            info = proc.info
+            if info['name'] is None: continue
+            self._insert(info['pid'], info['name'], info['ppid'], info['create_time'])
+
+    def refresh(self, force=False):
+        """Brings the index up to date, unless it was refreshed less than `max_age` seconds ago."""
+        with self._lock:
+            self._refresh_locked(force)
+
+    def _refresh_locked(self, force=False):
+        now = time.monotonic()
+        if not force and self._refreshed_at is not None and now - self._refreshed_at < self.max_age:
+            return
+        if self._incremental: self._refresh_incremental()
+        else: self._refresh_snapshot()
+        self._refreshed_at = now
+
+    # --- Lookups ---
+    def pids_named(self, process_name):
+        """PIDs of every process named `process_name` (case-insensitive)."""
+        with self._lock:
+            self._refresh_locked()
+            return list(self._by_name.get(process_name.lower(), ()))
+
+    def info(self, pid):
+        """`(name, ppid, create_time)` of `pid`, or None if it isn't running."""
+        with self._lock:
+            self._refresh_locked()
+            return self._by_pid.get(pid)
+
+    def name_of(self, pid):
+        info = self.info(pid)
+        return None if info is None else info[0]
+
+    def descendants(self, pid):
+        """All children of `pid`, recursively."""
+        with self._lock:
+            self._refresh_locked()
+            found, stack = [], [pid]
+            while stack:
+                for child in self._children.get(stack.pop(), ()):
+                    if child != pid and child not in found:
+                        found.append(child)
+                        stack.append(child)
+            return found
+
+    def names(self):
+        """`{pid: name}` for every running process."""
+        with self._lock:
+            self._refresh_locked()
+            return {pid: info[0] for pid, info in self._by_pid.items()}
+
+    def processes(self):
+        """`{pid: (name, ppid, create_time)}` for every running process."""
+        with self._lock:
+            self._refresh_locked()
+            return dict(self._by_pid)
+
+
+def process_create_time(pid):
+    """The start time of the process running as `pid` right now, or None if there is none.
+    Together with the PID it identifies a process even after the PID is reused."""
+    try:
+        return psutil.Process(pid).create_time()
+    except psutil.Error:
+        return None
+
+
+_shared_table = None
+_shared_lock = threading.Lock()
+
+
+def get_process_table():
+    """The process table shared by the whole library (created on first use)."""
+    global _shared_table
+    with _shared_lock:
+        if _shared_table is None:
+            _shared_table = ProcessTable()
+        return _shared_table
+
+
+def same_process(pid, create_time, current=None):
+    """
+    True if `pid` still runs the process that started at `create_time`. `current` is its
+    start time now, if already known. Start times are compared with a small tolerance,
+    since /proc and psutil round them differently.
+    """
+    if current is None: current = process_create_time(pid)
+    return current is not None and abs(current - create_time) <= CREATE_TIME_TOLERANCE
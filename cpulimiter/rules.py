@@ -0,0 +1,168 @@
+"""
+Auto-attach rules: limit processes matching a name or command-line pattern as soon as they start.
+
+A `Rule` describes which processes it wants (a glob or regular expression on the
+process name and/or its command line) and how to limit them. One `RuleWatcher`
+thread serves every rule: on each tick it refreshes the shared process table,
+and only processes that appeared since the previous tick are matched against
+the rules, so the cost does not grow with the number of rules times processes.
+"""
+import fnmatch
+import re
+import threading
+
+import psutil
+
+from .proctable import get_process_table
+
+DEFAULT_WATCH_INTERVAL = 0.25
+
+
+class Rule:
+    """
+    A persistent limit for every process matching `process_name` and/or `cmdline`.
+
+    Patterns are case-insensitive globs (`"ffmpeg"`, `"python*"`, `"*celery*worker*"`),
+    or regular expressions searched for in the name / command line if `regex=True`.
+    When both are given, a process must match both. Processes named in `exclude`
+    (case-insensitive, exact names) never match.
+    """
+    __slots__ = ("process_name", "cmdline", "regex", "limit_percentage", "period_ms", "target_cpu_percent", "exclude", "_name_match", "_cmdline_match")
+
+    def __init__(self, process_name=None, cmdline=None, regex=False, limit_percentage=98, period_ms=None, target_cpu_percent=None, exclude=()):
+        if not any([process_name, cmdline]): raise ValueError("Must provide a process_name or cmdline pattern.")
+        self.process_name = process_name
+        self.cmdline = cmdline
+        self.regex = regex
+        self.limit_percentage = limit_percentage
+        self.period_ms = period_ms
+        self.target_cpu_percent = target_cpu_percent
+        self.exclude = frozenset(name.lower() for name in exclude)
+        self._name_match = self._compile(process_name)
+        self._cmdline_match = self._compile(cmdline)
+
+    def _compile(self, pattern):
+        if pattern is None: return None
+        if self.regex: return re.compile(pattern).search
+        return re.compile(fnmatch.translate(pattern), re.IGNORECASE).match
+
+    def matches(self, name, get_cmdline):
+        """True if a process named `name` matches. `get_cmdline()` is only called when needed."""
+        if self.exclude and name.lower() in self.exclude:
+            return False
+        if self._name_match is not None and not self._name_match(name):
+            return False
+        if self._cmdline_match is not None:
+            cmdline = get_cmdline()
+            if cmdline is None or not self._cmdline_match(cmdline): return False
+        return True
+
+    def __repr__(self):
+        pattern = ", ".join(f"{k}={getattr(self, k)!r}" for k in ("process_name", "cmdline") if getattr(self, k))
+        return f"Rule({pattern}, regex={self.regex})"
+
+
+def _read_cmdline(pid):
+    try: return " ".join(psutil.Process(pid).cmdline())
+    except psutil.Error: return None
+
+
+class RuleWatcher:
+    """
+    One background thread that applies every rule to newly started processes.
+
+    `on_match(rule, pids)` is called with the new processes each rule claimed (a
+    process is claimed by the first rule, in order of addition, that matches it)
+    and `on_exit(pids)` with claimed processes that have exited.
+    Callbacks run on the watcher thread, outside its lock.
+    """
+
+    def __init__(self, on_match, on_exit, interval=DEFAULT_WATCH_INTERVAL):
+        self._on_match = on_match
+        self._on_exit = on_exit
+        self.interval = interval
+        self._rules = []
+        self._seen = {}  # pid -> create_time of every process already matched against the rules
+        self._claimed = {}  # pid -> (rule, create_time)
+        self._cond = threading.Condition()
+        self._thread = None
+        self._rescan = False
+
+    def add(self, rule):
+        with self._cond:
+            self._rules.append(rule)
+            self._rescan = True  # Processes that are already running get the new rule too.
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="cpulimiter-rules", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def remove(self, rule):
+        """Removes `rule` and returns the PIDs it had claimed."""
+        with self._cond:
+            if rule in self._rules: self._rules.remove(rule)
+            pids = [pid for pid, (owner, _) in self._claimed.items() if owner is rule]
+            for pid in pids:
+                del self._claimed[pid]
+                self._seen.pop(pid, None)  # Released processes may match another rule.
+            return pids
+
+    def set_exclude(self, rule, exclude):
+        """
+        Replaces `rule`'s excluded names and returns the PIDs it had claimed that are now excluded.
+        Processes that are no longer excluded are matched again on the next tick.
+        """
+        exclude = frozenset(name.lower() for name in exclude)
+        table = get_process_table()
+        with self._cond:
+            if exclude - rule.exclude:
+                pids = [pid for pid, (owner, _) in self._claimed.items() if owner is rule and (table.name_of(pid) or "").lower() in exclude]
+            else:
+                pids = []
+            for pid in pids:
+                del self._claimed[pid]
+                self._seen.pop(pid, None)  # Released processes may match another rule.
+            if rule.exclude - exclude:
+                self._rescan = True
+                self._cond.notify()
+            rule.exclude = exclude
+            return pids
+
+    def rules(self):
+        with self._cond:
+            return list(self._rules)
+
+    def _scan(self):
+        """
+        Diffs the process table against the last scan (called with `_cond` held).
+        Processes are identified by (pid, create_time), so a reused PID counts as
+        an exit followed by a new process.
+        """
+        running = get_process_table().processes()
+        if self._rescan:
+            self._seen = {pid: create_time for pid, (_, create_time) in self._claimed.items()}
+            self._rescan = False
+        exited = [pid for pid, (_, create_time) in self._claimed.items() if pid not in running or running[pid][2] != create_time]
+        for pid in exited: del self._claimed[pid]
+        matches = {}
+        seen = {}
+        for pid, (name, _, create_time) in running.items():
+            seen[pid] = create_time
+            if self._seen.get(pid) == create_time: continue
+            for rule in self._rules:
+                if rule.matches(name, lambda: _read_cmdline(pid)):
+                    self._claimed[pid] = (rule, create_time)
+                    matches.setdefault(rule, []).append(pid)
+                    break
+        self._seen = seen
+        return matches, exited
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                if not self._rules: self._cond.wait()
+                matches, exited = self._scan()
+            if exited: self._on_exit(exited)
+            for rule, pids in matches.items(): self._on_match(rule, pids)
+            with self._cond:
+                if not self._rescan: self._cond.wait(self.interval)
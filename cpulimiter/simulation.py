@@ -0,0 +1,265 @@
+"""
+Deterministic simulation of the scheduling engine, on a virtual clock.
+
+The real scheduler (`ScheduledEngine`: deadlines in a heap, suspend/resume
+transitions, exit handling) runs unchanged against simulated processes, so a
+policy can be checked in milliseconds of wall time, on any platform, with exact
+and repeatable results:
+
+    from cpulimiter.simulation import Simulation
+
+    sim = Simulation(period_ms=200)
+    worker = sim.spawn(demand=1.0)          # busy on one core
+    sim.engine.add_process(worker.pid, 70)  # suspended 70% of each cycle
+    sim.run(10.0)
+    print(sim.report().processes[worker.pid].suspended_fraction)   # ~0.7
+
+Closed-loop targets and budget trees run the real `FeedbackLoop` on the same
+clock (see `Simulation.feedback`). Processes use CPU as a fluid: a process with a
+`demand` of 0.5 uses half a core whenever it is not suspended.
+"""
+import bisect
+import heapq
+import itertools
+import random
+from array import array
+from collections import namedtuple
+
+import psutil
+
+from .backends.base import DEFAULT_CYCLE_MS
+from .backends.scheduler import ScheduledEngine
+from .feedback import DEFAULT_INTERVAL, FeedbackLoop
+
+FIRST_PID = 1000
+
+_CpuTimes = namedtuple("_CpuTimes", "user system")
+
+# What `Simulation.report()` measured for one process, over the reported window.
+# `suspended_fraction` is the achieved duty cycle; pause lengths are those of completed pauses.
+ProcessReport = namedtuple("ProcessReport", "pid limit cpu_percent suspended_fraction pauses pause_avg_ms pause_p50_ms pause_p99_ms pause_max_ms")
+
+# `Simulation.report()`: the window's length, the engine's wakeups in it, their average lateness
+# over the whole run, and a `ProcessReport` per PID.
+SimulationReport = namedtuple("SimulationReport", "duration wakeups lateness_avg_ms processes")
+
+
+class SimProcess:
+    """
+    A simulated process. `demand` is how many cores it would use if never suspended.
+    Suspends nest like `SuspendThread` does: the process runs while its suspend count is 0.
+    """
+    __slots__ = ("pid", "demand", "_clock", "alive", "started_at", "exited_at", "_cpu", "_running_since", "_suspend_count", "_suspended_at", "pauses")
+
+    def __init__(self, pid, demand, clock):
+        now = clock()
+        self.pid = pid
+        self.demand = demand
+        self._clock = clock
+        self.alive = True
+        self.started_at = now
+        self.exited_at = None
+        self._cpu = 0.0
+        self._running_since = now
+        self._suspend_count = 0
+        self._suspended_at = None
+        self.pauses = []  # (start, end) of every completed pause
+
+    @property
+    def is_suspended(self):
+        return self._suspend_count > 0
+
+    def cpu_seconds(self, now):
+        running = self.alive and not self.is_suspended
+        return self._cpu + (self.demand * (now - self._running_since) if running else 0.0)
+
+    def cpu_times(self):
+        """Like `psutil.Process.cpu_times()`, for the `FeedbackLoop`."""
+        if not self.alive: raise psutil.NoSuchProcess(self.pid)
+        return _CpuTimes(self.cpu_seconds(self._clock()), 0.0)
+
+    def suspend(self, now):
+        if not self.alive: return False
+        if self._suspend_count == 0:
+            self._cpu += self.demand * (now - self._running_since)
+            self._suspended_at = now
+        self._suspend_count += 1
+        return True
+
+    def resume(self, now):
+        if not self.alive: return False
+        if self._suspend_count == 0: return True
+        self._suspend_count -= 1
+        if self._suspend_count == 0:
+            self.pauses.append((self._suspended_at, now))
+            self._running_since = now
+        return True
+
+    def exit(self, now):
+        if not self.alive: return
+        if self.is_suspended: self.pauses.append((self._suspended_at, now))
+        else: self._cpu += self.demand * (now - self._running_since)
+        self.alive = False
+        self.exited_at = now
+
+
+class SimEngine(ScheduledEngine):
+    """A `ScheduledEngine` whose clock, thread and system calls belong to a `Simulation`."""
+    name = "simulated"
+
+    def __init__(self, sim, period_ms=DEFAULT_CYCLE_MS, stagger=True):
+        self._sim = sim
+        super().__init__(period_ms, clock=lambda: sim.now, stagger=stagger)
+
+    def _open_handle(self, pid):
+        process = self._sim.processes.get(pid)
+        return process if process is not None and process.alive else None
+
+    def _suspend(self, pid, handle):
+        return handle is not None and handle.suspend(self._sim.now)
+
+    def _resume(self, pid, handle):
+        return handle is not None and handle.resume(self._sim.now)
+
+    def _ensure_started(self):
+        pass  # `Simulation.run` is the scheduler thread.
+
+    def _wake(self):
+        self._sim._woken = True
+
+
+class _SimFeedbackLoop(FeedbackLoop):
+    def _ensure_started(self):
+        pass  # `Simulation` calls `_step()` every interval instead.
+
+
+class Simulation:
+    """
+    Runs a `SimEngine` against `SimProcess`es on a virtual clock.
+
+    The engine is ticked exactly when it asked to be woken (plus a random delay of up to
+    `wakeup_latency` seconds, drawn from a generator seeded with `seed`), and right after
+    every control call, like the real scheduler thread that control calls wake up.
+    Process exits are delivered to the engine the moment they happen, like a pidfd would.
+    """
+
+    def __init__(self, period_ms=DEFAULT_CYCLE_MS, stagger=True, wakeup_latency=0.0, seed=0, cpu_count=1, feedback_interval=DEFAULT_INTERVAL):
+        self.now = 0.0
+        self.processes = {}  # pid -> SimProcess, including exited ones
+        self.engine = SimEngine(self, period_ms, stagger)
+        self.wakeup_latency = wakeup_latency
+        self.cpu_count = cpu_count
+        self.feedback_interval = feedback_interval
+        self._random = random.Random(seed)
+        self._pids = itertools.count(FIRST_PID)
+        self._timers = []  # (when, seq, callback, interval or None)
+        self._seq = itertools.count()
+        self._deadline = None  # When the engine wants its next tick
+        self._tick_times = array("d")
+        self._woken = False
+        self._feedback = None
+
+    # --- Processes ---
+    def spawn(self, demand=1.0, exit_at=None, pid=None):
+        """Starts a simulated process (reusing `pid` if given) and returns it. It exits at `exit_at`, if set."""
+        pid = next(self._pids) if pid is None else pid
+        process = self.processes[pid] = SimProcess(pid, demand, lambda: self.now)
+        if exit_at is not None: self.at(exit_at, lambda: self.exit(process))
+        return process
+
+    def exit(self, process):
+        """Ends a process and tells the engine, like the exit watch of a real one would."""
+        process.exit(self.now)
+        with self.engine._lock:
+            self.engine._on_exit(process.pid, process)
+        self._woken = True
+
+    def runnable(self):
+        """How many live processes are not suspended right now."""
+        return sum(1 for p in self.processes.values() if p.alive and not p.is_suspended)
+
+    # --- Timers ---
+    def at(self, when, callback):
+        """Calls `callback()` at virtual time `when`."""
+        heapq.heappush(self._timers, (max(when, self.now), next(self._seq), callback, None))
+
+    def every(self, interval, callback, start=None):
+        """Calls `callback()` every `interval` seconds, from `start` (default: one interval from now)."""
+        heapq.heappush(self._timers, ((self.now + interval) if start is None else start, next(self._seq), callback, interval))
+
+    @property
+    def feedback(self):
+        """A `FeedbackLoop` on the virtual clock, for closed-loop targets and budgets (created on first use)."""
+        if self._feedback is None:
+            self._feedback = _SimFeedbackLoop(self.engine, self.feedback_interval, clock=lambda: self.now, open_process=self._open_process)
+            self._feedback._cpu_count = self.cpu_count
+            self.every(self.feedback_interval, self._feedback._step)
+        return self._feedback
+
+    def _open_process(self, pid):
+        process = self.processes.get(pid)
+        if process is None or not process.alive: raise psutil.NoSuchProcess(pid)
+        return process
+
+    # --- Running ---
+    def _tick(self):
+        self._tick_times.append(self.now)
+        deadline = self.engine._tick(self.now)
+        if deadline is None or not self.wakeup_latency: self._deadline = deadline
+        else: self._deadline = deadline + self._random.uniform(0.0, self.wakeup_latency)
+
+    def run(self, duration):
+        """Advances the virtual clock by `duration` seconds."""
+        end = self.now + duration
+        while True:
+            if self._woken:  # A control call or an exit: the scheduler thread runs right away.
+                self._woken = False
+                self._tick()
+                continue
+            when = end
+            if self._deadline is not None: when = min(when, self._deadline)
+            if self._timers: when = min(when, self._timers[0][0])
+            self.now = max(self.now, when)
+            if self._deadline is not None and self._deadline <= self.now: self._tick()
+            while self._timers and self._timers[0][0] <= self.now:
+                _, _, callback, interval = heapq.heappop(self._timers)
+                callback()
+                if interval is not None: heapq.heappush(self._timers, (self.now + interval, next(self._seq), callback, interval))
+            if self.now >= end and not self._woken:
+                return
+
+    # --- Results ---
+    def report(self, since=0.0):
+        """Measures every process over `[since, now]` (clipped to its lifetime)."""
+        duration = self.now - since
+        with self.engine._lock:
+            limits = {pid: self.engine._entries[key].limit for pid, key in self.engine._owner.items()}
+        rows = {}
+        for pid, process in self.processes.items():
+            start, stop = max(since, process.started_at), process.exited_at if process.exited_at is not None else self.now
+            alive_s = stop - start
+            pauses = [(max(a, start), min(b, stop)) for a, b in process.pauses if b > start and a < stop]
+            suspended = sum(b - a for a, b in pauses)
+            if process.is_suspended and process.alive: suspended += stop - max(process._suspended_at, start)
+            lengths = sorted(1000.0 * (b - a) for a, b in process.pauses if b > start and a >= start)
+            cpu = self._cpu_between(process, start, stop)
+            rows[pid] = ProcessReport(
+                pid, limits.get(pid),
+                100.0 * cpu / alive_s if alive_s > 0 else 0.0,
+                suspended / alive_s if alive_s > 0 else 0.0,
+                len(lengths),
+                sum(lengths) / len(lengths) if lengths else 0.0,
+                lengths[len(lengths) // 2] if lengths else 0.0,
+                lengths[min(len(lengths) - 1, int(len(lengths) * 0.99))] if lengths else 0.0,
+                lengths[-1] if lengths else 0.0,
+            )
+        wakeups = len(self._tick_times) - bisect.bisect_left(self._tick_times, since)
+        return SimulationReport(duration, wakeups, self.engine.get_engine_stats().lateness_avg_ms, rows)
+
+    def _cpu_between(self, process, start, stop):
+        """CPU seconds `process` used in `[start, stop]`: its demand times the time it ran."""
+        ran = stop - start
+        for a, b in process.pauses:
+            if b > start and a < stop: ran -= min(b, stop) - max(a, start)
+        if process.is_suspended and process.alive: ran -= stop - max(process._suspended_at, start)
+        return process.demand * max(0.0, ran)
@@ -1,36 +1,148 @@
-import pygetwindow as gw
-import win32process
+import threading
+from collections import namedtuple
+
 import psutil
 
+from .proctable import get_process_table
+
+_window_modules = None
+
+def _windows_api():
+    """
+    `(pygetwindow, win32process)`, imported on first use: they are optional (Windows only)
+    and slow to import, and most programs never enumerate windows.
+    """
+    global _window_modules
+    if _window_modules is None:
+        try:
+            import pygetwindow
+            import win32process
+        except ImportError:
+            raise RuntimeError("This function requires pygetwindow and pywin32 (Windows only).") from None
+        _window_modules = (pygetwindow, win32process)
+    return _window_modules
+
+# Returned by `AppTracker.changes()`. `added` and `changed` (a new window title) map PIDs to
+# `{'name', 'title'}` like `get_active_app_pids()`; `removed` is the set of PIDs without a visible window anymore.
+AppChanges = namedtuple("AppChanges", "added changed removed")
+
+
+class WindowCache:
+    """
+    Caches window -> PID and PID -> (name, create_time), so polling the visible windows
+    costs one enumeration and no process lookups once the windows are known. Thread safe.
+
+    Entries are validated without touching the processes: a window can only exist while its
+    process runs, so a PID that still owns a window seen in the previous enumeration can't
+    have been reused. A window that is new, or belongs to a PID whose known windows are all
+    gone, is checked against the cached create time. Windows and PIDs that disappear from
+    an enumeration are evicted.
+    """
+
+    def __init__(self):
+        self._pid_of = {}  # hwnd -> pid
+        self._processes = {}  # pid -> (name, create_time)
+        self._lock = threading.Lock()
+
+    def _process_name(self, pid, known):
+        """The name of `pid` (called with `_lock` held). `known`: the PID owns a window that is still open."""
+        cached = self._processes.get(pid)
+        try:
+            if cached is not None and known: return cached[0]
+            process = psutil.Process(pid)
+            if cached is not None and process.create_time() == cached[1]: return cached[0]
+            self._processes[pid] = cached = (process.name(), process.create_time())
+            return cached[0]
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            self._processes.pop(pid, None)
+            return None
+
+    def _pid(self, win32process, hwnd, live_pids):
+        pid = self._pid_of.get(hwnd)
+        if pid is None:
+            _, pid = win32process.GetWindowThreadProcessId(hwnd)
+            self._pid_of[hwnd] = pid
+            return pid, False
+        return pid, pid in live_pids
+
+    def apps(self):
+        """`{pid: {'name', 'title'}}` for every process with a visible, titled window."""
+        gw, win32process = _windows_api()
+        windows = [(window._hWnd, window.title) for window in gw.getAllWindows() if window.visible and window.title]
+        with self._lock:
+            # PIDs that still own a window from the previous enumeration are known to be the same processes.
+            live_pids = {self._pid_of[hwnd] for hwnd, _ in windows if hwnd in self._pid_of}
+            active_apps = {}
+            seen = set()
+            for hwnd, title in windows:
+                seen.add(hwnd)
+                pid, known = self._pid(win32process, hwnd, live_pids)
+                if pid in active_apps: continue
+                name = self._process_name(pid, known)
+                if name is not None: active_apps[pid] = {'name': name, 'title': title}
+            for hwnd in [h for h in self._pid_of if h not in seen]: del self._pid_of[hwnd]
+            pids = set(self._pid_of.values())
+            for pid in [p for p in self._processes if p not in pids]: del self._processes[pid]
+            return active_apps
+
+    def window_info(self, hwnd, title):
+        """`{'pid', 'name', 'title'}` of the window `hwnd`, or None if its process is gone."""
+        _, win32process = _windows_api()
+        with self._lock:
+            known = hwnd in self._pid_of  # The window is open now, so a cached PID is still its process.
+            pid, _ = self._pid(win32process, hwnd, ())
+            name = self._process_name(pid, known)
+        return None if name is None else {'pid': pid, 'name': name, 'title': title}
+
+    def clear(self):
+        with self._lock:
+            self._pid_of.clear()
+            self._processes.clear()
+
+
+class AppTracker:
+    """
+    Incremental view of the visible applications: `changes()` returns only what changed
+    since its previous call (everything, the first time), so a polling loop has nothing
+    to do when nothing happened. Each tracker keeps its own baseline.
+    """
+
+    def __init__(self, cache=None):
+        self._cache = cache if cache is not None else get_window_cache()
+        self._apps = {}
+
+    def changes(self):
+        apps = self._cache.apps()
+        last = self._apps
+        added = {pid: info for pid, info in apps.items() if pid not in last}
+        changed = {pid: info for pid, info in apps.items() if pid in last and last[pid] != info}
+        removed = {pid for pid in last if pid not in apps}
+        self._apps = apps
+        return AppChanges(added, changed, removed)
+
+    def apps(self):
+        """The applications as of the last `changes()` call."""
+        return dict(self._apps)
+
+
+_shared_cache = None
+_shared_lock = threading.Lock()
+
+def get_window_cache():
+    """The window cache shared by the whole library (created on first use)."""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = WindowCache()
+        return _shared_cache
+
 def get_active_app_pids():
     """
     Gets the PID and Name for applications with a visible window.
     This mimics the simple view of the Windows Task Manager.
+    Process names are cached (see `WindowCache`), so only new windows cost a process lookup.
     """
-    active_apps = {}
-    
-    for window in gw.getAllWindows():
-        if window.visible and window.title:
-            
-            # Get the window's handle (HWND)
-            hwnd = window._hWnd
-            
-            # From the handle, get the Process ID (PID)
-            _, pid = win32process.GetWindowThreadProcessId(hwnd)
-            
-            if pid not in active_apps:
-                try:
-                    # Get the process name from the PID for a cleaner output
-                    process_name = psutil.Process(pid).name()
-                    active_apps[pid] = {
-                        'name': process_name,
-                        'title': window.title
-                    }
-                except (psutil.NoSuchProcess, psutil.AccessDenied):
-                    # Handle cases where the process ends before we can get its name
-                    continue
-
-    return active_apps
+    return get_window_cache().apps()
 
 
 def get_active_window_info():
@@ -38,19 +150,13 @@ def get_active_window_info():
     Gets information about the currently active (foreground) window.
     Returns a dictionary with 'pid', 'name', and 'title', or None if no active window.
     """
+    gw, _ = _windows_api()
     try:
         active_window = gw.getActiveWindow()
         if active_window:
-            hwnd = active_window._hWnd
-            _, pid = win32process.GetWindowThreadProcessId(hwnd)
-            process_name = psutil.Process(pid).name()
-            return {
-                'pid': pid,
-                'name': process_name,
-                'title': active_window.title
-            }
-    except (gw.PyGetWindowException, psutil.NoSuchProcess, psutil.AccessDenied):
-        # Handle cases where window disappears or process is inaccessible
+            return get_window_cache().window_info(active_window._hWnd, active_window.title)
+    except gw.PyGetWindowException:
+        # Handle cases where window disappears
         return None
     return None
 
@@ -61,7 +167,6 @@ def emergency_resume_chrome():
     """
     import ctypes
     from ctypes import wintypes
-    import psutil
 
     # Load ntdll.dll to access NtResumeProcess
     ntdll = ctypes.WinDLL('ntdll')
@@ -70,8 +175,8 @@ def emergency_resume_chrome():
     NtResumeProcess.restype = wintypes.DWORD
 
     # Find all Chrome processes
-    chrome_pids = [p.pid for p in psutil.process_iter(['pid', 'name']) 
-                if 'chrome' in p.info['name'].lower()]
+    chrome_pids = [pid for pid, name in get_process_table().names().items()
+                if 'chrome' in name.lower()]
 
     print(f"Found {len(chrome_pids)} Chrome processes - attempting to force resume...")
 
@@ -103,85 +208,79 @@ def emergency_resume_chrome():
 
 
 
+# Processes that could crash Windows or severely disrupt it if suspended or terminated (lower-case names).
+CRITICAL_PROCESSES = {
+    # --- Existing Core System Processes ---
+    'system idle process',
+    'system',
+    'smss.exe',          # Session Manager Subsystem
+    'csrss.exe',         # Client/Server Runtime Subsystem
+    'wininit.exe',       # Windows Initialization Process
+    'winlogon.exe',      # Windows Logon Application
+    'lsass.exe',         # Local Security Authority Subsystem Service
+    'services.exe',      # Service Control Manager
+    'svchost.exe',       # Service Host (hosts many Windows services)
+    'dwm.exe',           # Desktop Window Manager
+    'explorer.exe',      # Windows Shell (Taskbar, Desktop, etc.) - killing this is highly disruptive
+
+    # --- New additions from your list and common critical processes ---
+
+    # System Processes (core to Windows OS, drivers, security, etc.)
+    'registry',          # Pseudo-process for kernel registry access (critical!)
+    'lsaiso.exe',        # Local Security Authority Isolated process (security critical)
+    'fontdrvhost.exe',   # Font Driver Host (essential for rendering text)
+    'wudfhost.exe',      # Windows User-Mode Driver Framework Host (for many drivers)
+    'runtimebroker.exe', # Windows process for UWP apps, permissions (essential for modern apps)
+    'taskhostw.exe',     # Windows Host Process for Background Tasks
+    'dashost.exe',       # Device Association Framework Provider Host
+    'conhost.exe',       # Console Window Host (for command prompt, PowerShell, many apps)
+    'nlsvc.exe',         # Network Location Awareness Service (network profiles)
+    'wlanext.exe',       # WLAN AutoConfig Extensibility Module (Wi-Fi management)
+    'securityhealthservice.exe', # Windows Security Center service
+    'wsccommunicator.exe', # Windows Security Center Communicator
+    'wmiprvse.exe',      # WMI Provider Host (Windows Management Instrumentation - many apps rely on it)
+    'vmmem',             # Hyper-V/WSL2 VM process (killing it kills the VM, which is often not desired)
+    'startmenuexperiencehost.exe', # Start Menu process (killing breaks Start Menu)
+    'comppkgsrv.exe',    # Component Package Server (Windows updates/servicing)
+    'ctfmon.exe',        # CTF Loader (input method editor, language bar)
+    'sgrmbroker.exe',    # System Guard Runtime Monitor Broker (Windows security)
+    'settingsynchost.exe', # Windows Settings Sync Host
+    'uhssvc.exe',        # Update Health Tools Service (Windows updates)
+    'searchapp.exe',     # Windows Search Application (for desktop search)
+    'sihost.exe',        # Shell Infrastructure Host (important for shell extensions, desktop)
+    'shellexperiencehost.exe', # Hosts parts of Windows shell (notifications, action center)
+    'rundll32.exe',      # Executes DLL functions (often used by system processes, risky to kill)
+    'audiodg.exe',       # Windows Audio Device Graph Isolation (essential for audio)
+    'dllhost.exe',       # COM Surrogate (hosts COM+ objects, essential for various apps)
+    'textinputhost.exe', # Input Method Editor (IME) Host (keyboard input)
+
+    # Security Software Components (BitDefender in your case - vital for protection)
+    # While not directly Windows, killing these leaves your system vulnerable and can trigger self-protection.
+    'bduserhost.exe',
+    'bdservicehost.exe',
+    'bdparentalservice.exe',
+    'bdntwrk.exe',
+    'bdagent.exe',
+    'bdredline.exe',
+
+    # Graphics Card Related (NVIDIA in your case - critical for display functionality)
+    # Killing these can result in a black screen, unrecoverable display issues without reboot.
+    'nvdisplay.container.exe',
+    'nvcontainer.exe',
+    'nvbroadcast.container.exe',
+    'nvidia web helper.exe', # Often associated with NVIDIA services
+    'cmd.exe', 
+}
+
+
 def get_non_critical_processes():
     """
     Gets PID and Name for running processes, ignoring critical system ones
     that could crash Windows or severely disrupt its functionality if terminated.
     """
-
-
-    CRITICAL_PROCESSES = {
-        # --- Existing Core System Processes ---
-        'system idle process',
-        'system',
-        'smss.exe',          # Session Manager Subsystem
-        'csrss.exe',         # Client/Server Runtime Subsystem
-        'wininit.exe',       # Windows Initialization Process
-        'winlogon.exe',      # Windows Logon Application
-        'lsass.exe',         # Local Security Authority Subsystem Service
-        'services.exe',      # Service Control Manager
-        'svchost.exe',       # Service Host (hosts many Windows services)
-        'dwm.exe',           # Desktop Window Manager
-        'explorer.exe',      # Windows Shell (Taskbar, Desktop, etc.) - killing this is highly disruptive
-
-        # --- New additions from your list and common critical processes ---
-
-        # System Processes (core to Windows OS, drivers, security, etc.)
-        'registry',          # Pseudo-process for kernel registry access (critical!)
-        'lsaiso.exe',        # Local Security Authority Isolated process (security critical)
-        'fontdrvhost.exe',   # Font Driver Host (essential for rendering text)
-        'wudfhost.exe',      # Windows User-Mode Driver Framework Host (for many drivers)
-        'runtimebroker.exe', # Windows process for UWP apps, permissions (essential for modern apps)
-        'taskhostw.exe',     # Windows Host Process for Background Tasks
-        'dashost.exe',       # Device Association Framework Provider Host
-        'conhost.exe',       # Console Window Host (for command prompt, PowerShell, many apps)
-        'nlsvc.exe',         # Network Location Awareness Service (network profiles)
-        'wlanext.exe',       # WLAN AutoConfig Extensibility Module (Wi-Fi management)
-        'securityhealthservice.exe', # Windows Security Center service
-        'wsccommunicator.exe', # Windows Security Center Communicator
-        'wmiprvse.exe',      # WMI Provider Host (Windows Management Instrumentation - many apps rely on it)
-        'vmmem',             # Hyper-V/WSL2 VM process (killing it kills the VM, which is often not desired)
-        'startmenuexperiencehost.exe', # Start Menu process (killing breaks Start Menu)
-        'comppkgsrv.exe',    # Component Package Server (Windows updates/servicing)
-        'ctfmon.exe',        # CTF Loader (input method editor, language bar)
-        'sgrmbroker.exe',    # System Guard Runtime Monitor Broker (Windows security)
-        'settingsynchost.exe', # Windows Settings Sync Host
-        'uhssvc.exe',        # Update Health Tools Service (Windows updates)
-        'searchapp.exe',     # Windows Search Application (for desktop search)
-        'sihost.exe',        # Shell Infrastructure Host (important for shell extensions, desktop)
-        'shellexperiencehost.exe', # Hosts parts of Windows shell (notifications, action center)
-        'rundll32.exe',      # Executes DLL functions (often used by system processes, risky to kill)
-        'audiodg.exe',       # Windows Audio Device Graph Isolation (essential for audio)
-        'dllhost.exe',       # COM Surrogate (hosts COM+ objects, essential for various apps)
-        'textinputhost.exe', # Input Method Editor (IME) Host (keyboard input)
-
-        # Security Software Components (BitDefender in your case - vital for protection)
-        # While not directly Windows, killing these leaves your system vulnerable and can trigger self-protection.
-        'bduserhost.exe',
-        'bdservicehost.exe',
-        'bdparentalservice.exe',
-        'bdntwrk.exe',
-        'bdagent.exe',
-        'bdredline.exe',
-
-        # Graphics Card Related (NVIDIA in your case - critical for display functionality)
-        # Killing these can result in a black screen, unrecoverable display issues without reboot.
-        'nvdisplay.container.exe',
-        'nvcontainer.exe',
-        'nvbroadcast.container.exe',
-        'nvidia web helper.exe', # Often associated with NVIDIA services
-        'cmd.exe', 
-    }
-
     user_procs = {}
-    for proc in psutil.process_iter(['pid', 'name']):
-        try:
-            # Convert the process name to lowercase for case-insensitive comparison
-            process_name_lower = proc.info['name'].lower()
-            
-            # Check if the process name is in our CRITICAL_PROCESSES set
-            if process_name_lower not in CRITICAL_PROCESSES:
-                user_procs[proc.info['pid']] = {'name': proc.info['name']}
-        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-            pass # Ignore processes that disappear, are denied access, or are zombies
+    for pid, name in get_process_table().names().items():
+        # Check if the process name is in our CRITICAL_PROCESSES set (case-insensitive)
+        if name.lower() not in CRITICAL_PROCESSES:
+            user_procs[pid] = {'name': name}
     return user_procs
@@ -3,7 +3,7 @@ import sys
 import ctypes
 import time
 import threading
-from cpulimiter import CpuLimiter, get_active_app_pids, get_active_window_info
+from cpulimiter import AutoSaver, get_active_app_pids
 
 from PIL import Image, ImageDraw, ImageFont
 import pystray
@@ -396,72 +396,29 @@ class App(ctk.CTk):
             self.update_active_app_display(None)
             self.update_limited_list({})
 
+    def saver_settings(self):
+        threshold_text = self.threshold_options.get()
+        return dict(
+            limit_percentage=int(self.global_limit_slider.get()),
+            inactivity_threshold=int(threshold_text.split()[0]),
+            ignore=self.ignored_apps,
+            limits={name: rule['limit'] for name, rule in self.custom_rules.items() if rule['enabled']},
+        )
+
     def limiter_worker(self):
-        limiter = CpuLimiter()
-        last_active_time = {}
-        limited_app_names = {}
+        # The saver starts with the user's settings, so its first refresh already respects the ignore list.
+        saver = AutoSaver(on_change=lambda limited: self.after(0, self.update_limited_list, limited), **self.saver_settings())
+        saver.start()
 
         try:
             while self.is_running.get():
-                current_time = time.time()
-                
-                global_limit_strength = int(self.global_limit_slider.get())
-                global_limit_for_lib = global_limit_strength
-
-                threshold_text = self.threshold_options.get()
-                inactivity_threshold = int(threshold_text.split()[0])
-                
-                visible_apps_pids = get_active_app_pids()
-                active_window_info = get_active_window_info()
-                
-                active_app_name = None
-                if active_window_info and active_window_info['name']:
-                    active_app_name = active_window_info['name'].lower()
-                    last_active_time[active_app_name] = current_time
-                self.after(0, self.update_active_app_display, active_app_name)
-                
-                current_visible_app_names = {info['name'].lower() for info in visible_apps_pids.values()}
-                
-                for app_name in current_visible_app_names:
-                    is_active = (app_name == active_app_name)
-                    is_currently_managed = (app_name in limited_app_names)
-
-                    if app_name in self.ignored_apps:
-                        if is_currently_managed:
-                            limiter.stop(process_name=app_name)
-                            del limited_app_names[app_name]
-                        continue
-
-                    limit_to_apply_for_lib = global_limit_for_lib
-                    
-                    rule = self.custom_rules.get(app_name)
-                    if rule and rule['enabled']: limit_to_apply_for_lib = rule['limit']
-
-                    if is_active:
-                        if is_currently_managed:
-                            limiter.stop(process_name=app_name)
-                            del limited_app_names[app_name]
-                    else:
-                        time_since_active = current_time - last_active_time.get(app_name, 0)
-                        if time_since_active > inactivity_threshold:
-                            if not is_currently_managed or limited_app_names[app_name] != limit_to_apply_for_lib:
-                                limiter.add(process_name=app_name, limit_percentage=limit_to_apply_for_lib)
-                                limiter.start(process_name=app_name)
-                                limited_app_names[app_name] = limit_to_apply_for_lib
-                        elif is_currently_managed:
-                            limiter.stop(process_name=app_name)
-                            del limited_app_names[app_name]
-                
-                names_to_remove = {name for name in limited_app_names if name not in current_visible_app_names}
-                for app_name in names_to_remove:
-                    limiter.stop(process_name=app_name)
-                    del limited_app_names[app_name]
-
-                self.after(0, self.update_limited_list, limited_app_names)
+                self.after(0, self.update_active_app_display, saver.focused)
                 self.limiter_worker_event.wait(2.0)
                 self.limiter_worker_event.clear()
+                # Only what changed is applied; focus changes are handled by the saver as they happen.
+                saver.configure(**self.saver_settings())
         finally:
-            limiter.stop_all()
+            saver.close()
 
     def update_active_app_display(self, active_app_name):
         if not self.is_running.get():
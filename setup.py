@@ -8,7 +8,7 @@ setup(
     version="1.0.11",
     author="Ahmed Ashraf",
     author_email="your-email@example.com",
-    description="A simple, lightweight Python library for Windows to limit the CPU usage of any running process",
+    description="A simple, lightweight Python library for Windows and Linux to limit the CPU usage of any running process",
     long_description=long_description,
     long_description_content_type="text/markdown",
     url="https://github.com/Ahmed-Ashraf-dv/CPULimiter",
@@ -22,6 +22,7 @@ setup(
         "Intended Audience :: Developers",
         "License :: OSI Approved :: MIT License",
         "Operating System :: Microsoft :: Windows",
+        "Operating System :: POSIX :: Linux",
         "Programming Language :: Python :: 3",
         "Programming Language :: Python :: 3.7",
         "Programming Language :: Python :: 3.8",
@@ -34,9 +35,15 @@ setup(
     python_requires=">=3.7",
     install_requires=[
         "psutil>=5.8.0",
-        "pygetwindow>=0.0.9",
-        "pywin32>=227",
+        "pygetwindow>=0.0.9; sys_platform == 'win32'",
+        "pywin32>=227; sys_platform == 'win32'",
     ],
+    extras_require={
+        "toml": ["tomli>=1.1; python_version < '3.11'"],
+    },
+    entry_points={
+        "console_scripts": ["cpulimiter=cpulimiter.daemon:main"],
+    },
     keywords="cpu limiter throttle process windows performance",
 )
 
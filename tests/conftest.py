@@ -0,0 +1,99 @@
+"""
+Shared fixtures: an engine that only records what it was told, and a process table of
+made-up processes, so `CpuLimiter` can be tested without touching real processes.
+"""
+import itertools
+import threading
+
+import pytest
+
+from cpulimiter import proctable, rules
+from cpulimiter.backends import Engine
+
+FAKE_PID = 4_000_000  # Far above pid_max, so fake PIDs can never be real processes
+
+
+class RecordingEngine(Engine):
+    """Keeps the managed set as `{pid: (limit, period_ms)}` and a log of the calls that changed it."""
+    name = "recording"
+
+    def __init__(self):
+        super().__init__()
+        self.managed = {}
+        self.calls = []  # ("add" | "modify" | "remove", pid)
+        self._lock = threading.Lock()
+
+    def add_process(self, pid, limit, period_ms=None):
+        with self._lock:
+            self.calls.append(("add", pid))
+            self.managed.setdefault(pid, (limit, period_ms))
+
+    def modify_process_limit(self, pid, limit, period_ms=None):
+        with self._lock:
+            self.calls.append(("modify", pid))
+            if pid in self.managed: self.managed[pid] = (limit, self.managed[pid][1] if period_ms is None else period_ms)
+
+    def remove_process(self, pid):
+        with self._lock:
+            self.calls.append(("remove", pid))
+            self.managed.pop(pid, None)
+
+    def get_managed_pids(self):
+        with self._lock: return list(self.managed)
+
+    def shutdown(self):
+        with self._lock: self.managed.clear()
+
+
+@pytest.fixture
+def engine():
+    return RecordingEngine()
+
+
+class FakeProcessTable:
+    """Stands in for the shared `ProcessTable`; `spawn()` and `kill()` change what it reports."""
+
+    def __init__(self):
+        self._procs = {}  # pid -> (name, ppid, create_time)
+        self.cmdlines = {}
+        self._pids = itertools.count(FAKE_PID + 100_000)
+        self._lock = threading.Lock()
+
+    def spawn(self, name, cmdline=""):
+        pid = next(self._pids)
+        with self._lock:
+            self._procs[pid] = (name, 1, float(pid))
+            self.cmdlines[pid] = cmdline
+        return pid
+
+    def kill(self, pid):
+        with self._lock: self._procs.pop(pid, None)
+
+    def refresh(self, force=False): pass
+
+    def processes(self):
+        with self._lock: return dict(self._procs)
+
+    def info(self, pid):
+        with self._lock: return self._procs.get(pid)
+
+    def name_of(self, pid):
+        info = self.info(pid)
+        return None if info is None else info[0]
+
+    def names(self):
+        return {pid: info[0] for pid, info in self.processes().items()}
+
+    def pids_named(self, process_name):
+        return [pid for pid, name in self.names().items() if name.lower() == process_name.lower()]
+
+    def descendants(self, pid):
+        return []
+
+
+@pytest.fixture
+def process_table(monkeypatch):
+    table = FakeProcessTable()
+    monkeypatch.setattr(proctable, "_shared_table", table)
+    monkeypatch.setattr(rules, "_read_cmdline", lambda pid: table.cmdlines.get(pid))
+    return table
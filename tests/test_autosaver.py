@@ -0,0 +1,87 @@
+"""
+`AutoSaver` driven by a `FakeFocusSource` and a hand-set clock: which applications it limits,
+when it releases them, and what the limiter's engine is told.
+"""
+import pytest
+
+from cpulimiter import CpuLimiter
+from cpulimiter.autosaver import AutoSaver, FakeFocusSource
+
+THRESHOLD = 10.0
+RELEASE_DELAY = 5.0
+
+
+class _Desktop:
+    """Three applications, each running as one process of the fake process table."""
+
+    def __init__(self, process_table):
+        self.now = 0.0
+        self.pids = {name: process_table.spawn(name) for name in ("editor.exe", "player.exe", "browser.exe")}
+        self.source = FakeFocusSource({pid: {'name': name, 'title': name} for name, pid in self.pids.items()})
+
+    def focus(self, name, at):
+        self.now = at
+        self.source.focus(self.pids[name])
+
+    def close_windows(self, name):
+        self.source.set_apps({pid: app for pid, app in self.source.apps().items() if app['name'] != name})
+
+
+@pytest.fixture
+def desktop(process_table):
+    return _Desktop(process_table)
+
+
+@pytest.fixture
+def saver(engine, desktop):
+    limiter = CpuLimiter(engine=engine)
+    changes = []
+    saver = AutoSaver(limiter, desktop.source, limit_percentage=80, inactivity_threshold=THRESHOLD, release_delay=RELEASE_DELAY,
+                      interval=3600, limits={"Browser.exe": 50}, on_change=changes.append, clock=lambda: desktop.now)
+    saver.changes = changes
+    desktop.focus("editor.exe", at=0.0)
+    saver.start()
+    yield saver
+    saver.close()
+    limiter.shutdown()
+
+
+def _refresh(saver, desktop, at):
+    desktop.now = at
+    saver.refresh()
+    return saver.get_limited()
+
+
+def test_applications_are_limited_after_the_inactivity_threshold(saver, desktop, engine):
+    desktop.focus("browser.exe", at=5.0)
+    assert _refresh(saver, desktop, at=5.0) == {"player.exe": 80}  # The editor only lost the focus 0 s ago
+    assert _refresh(saver, desktop, at=5.0 + THRESHOLD) == {"player.exe": 80}
+    assert _refresh(saver, desktop, at=5.0 + THRESHOLD + 1) == {"player.exe": 80, "editor.exe": 80}
+    assert engine.managed == {desktop.pids["player.exe"]: (80, None), desktop.pids["editor.exe"]: (80, None)}
+    assert saver.changes[-1] == {"player.exe": 80, "editor.exe": 80}
+
+
+def test_focus_releases_at_once(saver, desktop, engine):
+    assert _refresh(saver, desktop, at=1.0) == {"player.exe": 80, "browser.exe": 50}
+    desktop.focus("browser.exe", at=2.0)  # No refresh needed
+    assert saver.get_limited() == {"player.exe": 80}
+    assert set(engine.managed) == {desktop.pids["player.exe"]}
+    assert saver.changes[-1] == {"player.exe": 80}
+
+
+def test_limit_is_held_for_the_release_delay_when_windows_disappear(saver, desktop, engine):
+    assert _refresh(saver, desktop, at=1.0) == {"player.exe": 80, "browser.exe": 50}
+    desktop.close_windows("player.exe")  # E.g. minimized to the tray
+    assert _refresh(saver, desktop, at=1.0 + RELEASE_DELAY) == {"player.exe": 80, "browser.exe": 50}
+    assert _refresh(saver, desktop, at=1.0 + RELEASE_DELAY + 1) == {"browser.exe": 50}
+    assert set(engine.managed) == {desktop.pids["browser.exe"]}
+
+
+def test_close_releases_everything(saver, desktop, engine):
+    assert _refresh(saver, desktop, at=1.0) == {"player.exe": 80, "browser.exe": 50}
+    saver.close()
+    assert saver.get_limited() == {}
+    assert engine.managed == {}
+    assert saver.limiter.get_groups() == []
+    assert saver.changes[-1] == {}
+    assert _refresh(saver, desktop, at=2.0) == {}  # A closed saver doesn't limit again
@@ -0,0 +1,75 @@
+"""
+`Daemon.reload()` hands the limiter only what changed in the config: checked with a recording
+engine, whose call log shows exactly which processes were touched.
+"""
+import json
+import queue
+
+import pytest
+
+from cpulimiter import CpuLimiter
+from cpulimiter.daemon import Daemon
+
+CONFIG = {
+    "ignore_critical": False,
+    "limits": {"encoder": 70},
+    "rules": [
+        {"process_name": "webserver", "limit_percentage": 50, "period_ms": 50},
+        {"process_name": "backup", "limit_percentage": 30},
+    ],
+}
+
+
+@pytest.fixture
+def daemon(engine, process_table, tmp_path):
+    daemon = Daemon(str(tmp_path / "limits.json"), limiter=CpuLimiter(engine=engine))
+    yield daemon
+    daemon.close()
+
+
+def _load(daemon, config):
+    with open(daemon.path, "w") as f: json.dump(config, f)
+    return daemon.reload()
+
+
+def _start(daemon, process_table):
+    """Applies CONFIG and waits until its three processes are attached."""
+    pids = {name: process_table.spawn(name) for name in ("encoder", "webserver", "backup")}
+    attached = queue.Queue()
+    daemon.limiter.add_listener(attached.put)
+    assert _load(daemon, CONFIG)
+    daemon.limiter._rule_watcher.interval = 0.01
+    for _ in pids: attached.get(timeout=2.0)
+    return pids
+
+
+def test_reload_only_applies_the_differences(daemon, engine, process_table):
+    pids = _start(daemon, process_table)
+    rules = {rule.process_name: rule for rule in daemon.limiter.get_rules()}
+    engine.calls.clear()
+
+    changed = dict(CONFIG, rules=[{"process_name": "webserver", "limit_percentage": 20}])  # No period any more; backup removed
+    assert _load(daemon, changed)
+
+    # The encoder is not touched at all (so it keeps its place in the cycle), the web server
+    # is modified in place, with the default period again, and the backup is released.
+    assert engine.calls == [("remove", pids["backup"]), ("modify", pids["webserver"])]
+    assert engine.managed == {pids["encoder"]: (70, None), pids["webserver"]: (20, daemon.limiter.default_period_ms)}
+    assert daemon.limiter.get_rules() == [rules["encoder"], rules["webserver"]]
+    assert (rules["webserver"].limit_percentage, rules["webserver"].period_ms) == (20, daemon.limiter.default_period_ms)
+
+
+@pytest.mark.parametrize("broken", [
+    {"limits": {"encoder": 150}},           # Out of range
+    {"rules": [{"limit_percentage": 50}]},  # No pattern
+    {"ignore": "sshd"},                     # Not a list
+])
+def test_invalid_config_keeps_the_previous_rules(daemon, engine, process_table, broken):
+    _start(daemon, process_table)
+    applied, rules = daemon.get_rules(), daemon.limiter.get_rules()
+    engine.calls.clear()
+
+    assert not _load(daemon, dict(CONFIG, **broken))
+    assert daemon.get_rules() == applied
+    assert daemon.limiter.get_rules() == rules
+    assert engine.calls == []
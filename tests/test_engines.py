@@ -0,0 +1,143 @@
+"""
+Engine tests that need no privileges: `CgroupEngine` against a fake cgroupfs tree in a
+temporary directory, and phase staggering on the simulation's virtual clock.
+"""
+import os
+import statistics
+
+import pytest
+
+from cpulimiter.backends import cgroup
+from cpulimiter.backends.cgroup import CgroupEngine
+from cpulimiter.simulation import Simulation
+
+PID = os.getpid()  # Alive for the whole test, so the engine never prunes it.
+
+
+@pytest.fixture
+def cgroupfs(tmp_path, monkeypatch):
+    """An empty cgroup v2 mount with the cpu controller available."""
+    (tmp_path / "cgroup.controllers").write_text("cpuset cpu io memory pids\n")
+    (tmp_path / "cgroup.subtree_control").write_text("")
+    real_rmdir = os.rmdir
+
+    def rmdir(path, *args, **kwargs):
+        # Like cgroupfs: removing a cgroup without children takes its control files with it.
+        if str(path).startswith(str(tmp_path)) and not any(entry.is_dir() for entry in os.scandir(path)):
+            for entry in os.scandir(path): os.unlink(entry.path)
+        real_rmdir(path, *args, **kwargs)
+    monkeypatch.setattr(os, "rmdir", rmdir)
+    return tmp_path
+
+
+def _read(path):
+    return path.read_text().strip()
+
+
+def test_cpu_max_follows_limit_and_period(cgroupfs):
+    engine = CgroupEngine(root=str(cgroupfs), period_ms=100)
+    assert _read(cgroupfs / "cgroup.subtree_control") == "+cpu"
+    unit = cgroupfs / "cpulimiter" / f"pid-{PID}"
+
+    engine.add_process(PID, 75)
+    assert _read(unit / "cpu.max") == "25000 100000"
+    assert _read(unit / "cgroup.procs") == str(PID)
+    assert engine.get_managed_pids() == [PID]
+
+    engine.modify_process_limit(PID, 50, period_ms=200)
+    assert _read(unit / "cpu.max") == "100000 200000"
+
+    engine.remove_process(PID)
+    assert not unit.exists()
+    assert engine.get_managed_pids() == []
+
+
+@pytest.mark.parametrize("limit, period_ms, expected", [
+    (0, 100, "max 100000"),           # Not limited at all
+    (99.9, 100, "1000 100000"),       # The quota never drops under the kernel's 1 ms minimum
+    (50, 5000, "500000 1000000"),     # Periods are clamped to 1 s
+    (50, 0.1, "1000 1000"),           # ... and to 1 ms
+])
+def test_cpu_max_is_clamped_to_what_the_kernel_accepts(cgroupfs, limit, period_ms, expected):
+    engine = CgroupEngine(root=str(cgroupfs))
+    assert engine._cpu_max(limit, period_ms) == expected
+
+
+def test_shared_modify_never_passes_through_the_origin(cgroupfs, monkeypatch):
+    engine = CgroupEngine(root=str(cgroupfs), shared=True, period_ms=100)
+    engine.add_process(PID, 50)
+    old, new = cgroupfs / "cpulimiter" / "limit-50-100ms", cgroupfs / "cpulimiter" / "limit-80-100ms"
+    assert _read(old / "cpu.max") == "50000 100000"
+
+    writes = []
+    real_write = cgroup._write
+    monkeypatch.setattr(cgroup, "_write", lambda path, value: (writes.append(path), real_write(path, value)))
+    engine.modify_process_limit(PID, 80)
+
+    # The new cgroup is throttled before the process enters it, and only cgroups of this engine are written.
+    assert writes == [str(new / "cpu.max"), str(new / "cgroup.procs")]
+    assert _read(new / "cpu.max") == "20000 100000"
+    assert not old.exists()
+
+
+def test_group_shares_one_cgroup(cgroupfs):
+    engine = CgroupEngine(root=str(cgroupfs), period_ms=100)
+    engine.add_group("build", [PID], 60)
+    group = cgroupfs / "cpulimiter" / "group-build"
+    assert _read(group / "cpu.max") == "40000 100000"
+    assert _read(group / "cgroup.procs") == str(PID)
+
+    engine.modify_group_limit("build", 90)
+    assert _read(group / "cpu.max") == "10000 100000"
+
+    engine.remove_group("build")
+    assert engine.get_managed_pids() == []
+
+
+@pytest.mark.parametrize("shared", [False, True])
+def test_reused_pid_is_dropped_without_moving_its_new_process(cgroupfs, monkeypatch, shared):
+    engine = CgroupEngine(root=str(cgroupfs), shared=shared, period_ms=100)
+    engine.add_process(PID, 50)
+    # The recorded start time no longer matches: as far as the engine can tell, PID now runs another process.
+    engine._managed[PID]["create_time"] -= 100
+
+    writes = []
+    real_write = cgroup._write
+    monkeypatch.setattr(cgroup, "_write", lambda path, value: (writes.append(path), real_write(path, value)))
+    engine.modify_process_limit(PID, 80)
+    engine.remove_process(PID)
+    assert not [path for path in writes if path.endswith("cgroup.procs")]
+    assert not (cgroupfs / "cpulimiter" / f"pid-{PID}").exists()
+
+    engine.add_process(PID, 50)
+    engine._managed[PID]["create_time"] -= 100
+    writes.clear()
+    assert engine.get_managed_pids() == []
+    assert not [path for path in writes if path.endswith("cgroup.procs")]
+
+
+def test_missing_cpu_controller_is_refused(tmp_path):
+    (tmp_path / "cgroup.controllers").write_text("io memory\n")
+    with pytest.raises(OSError):
+        CgroupEngine(root=str(tmp_path))
+
+
+def _runnable_variance(stagger, targets=20, limit=50, seconds=10.0):
+    """Variance of how many busy targets run at once, sampled every millisecond."""
+    sim = Simulation(period_ms=200, stagger=stagger)
+    sim.engine.add_many([(sim.spawn(demand=1.0).pid, limit) for _ in range(targets)])
+    samples = []
+    sim.every(0.001, lambda: samples.append(sim.runnable()))
+    sim.run(seconds)
+    return statistics.pvariance(samples[1000:]), statistics.mean(samples[1000:])
+
+
+def test_staggered_phases_keep_the_runnable_load_smooth():
+    lockstep, lockstep_mean = _runnable_variance(stagger=False)
+    staggered, staggered_mean = _runnable_variance(stagger=True)
+    # Both let half of the 20 targets run on average...
+    assert lockstep_mean == pytest.approx(10, abs=0.5)
+    assert staggered_mean == pytest.approx(10, abs=0.5)
+    # ...but in lockstep it is all or nothing (variance ~100), staggered it stays near 10.
+    assert lockstep > 90
+    assert staggered < 1
@@ -0,0 +1,41 @@
+"""
+The feedback loop on `Simulation`'s virtual clock: a tracked process settles at its target,
+and a budget tree hands what an idle leaf doesn't use to its busy siblings.
+"""
+import pytest
+
+from cpulimiter.budgets import Budget
+from cpulimiter.simulation import Simulation
+
+RUN_SECONDS = 30.0
+TOLERANCE = 2.0  # Percentage points
+
+
+@pytest.mark.parametrize("target", [5, 10, 30, 60])
+def test_closed_loop_settles_at_the_target(target):
+    sim = Simulation(100, cpu_count=4)
+    worker = sim.spawn(demand=1.0)
+    sim.feedback.track(worker.pid, target)
+    sim.run(RUN_SECONDS)
+    assert sim.report(since=RUN_SECONDS / 2).processes[worker.pid].cpu_percent == pytest.approx(target, abs=TOLERANCE)
+
+
+def test_idle_leaf_share_goes_to_busy_siblings():
+    sim = Simulation(100, cpu_count=4)
+    encode, index, idle = sim.spawn(demand=2.0), sim.spawn(demand=1.0), sim.spawn(demand=0.05)
+    budget = Budget("batch", cap_percent=25, children=[  # 100% of one core, weights 2:1:1
+        Budget("encode", weight=2, pid=encode.pid),
+        Budget("index", weight=1, pid=index.pid),
+        Budget("idle", weight=1, pid=idle.pid),
+    ])
+    for path, leaf in budget.leaves(): sim.feedback.track_group(path, [leaf.pid], 100)
+    sim.feedback.set_budget(budget)
+    sim.run(RUN_SECONDS)
+    used = {path: sim.report(since=RUN_SECONDS / 2).processes[leaf.pid].cpu_percent for path, leaf in budget.leaves()}
+
+    assert used["batch/idle"] == pytest.approx(5.0, abs=TOLERANCE)  # Only what it needs, not its 25% share
+    assert used["batch/encode"] > 50 + TOLERANCE and used["batch/index"] > 25 + TOLERANCE
+    assert used["batch/encode"] == pytest.approx(2 * used["batch/index"], abs=2 * TOLERANCE)  # The rest still goes 2:1
+    assert sum(used.values()) == pytest.approx(100, abs=TOLERANCE)
+    targets = sim.feedback.get_budget_targets("batch")
+    assert targets["batch/encode"] > 50 and targets["batch/index"] > 25
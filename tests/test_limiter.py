@@ -0,0 +1,87 @@
+"""
+`CpuLimiter` against a recording engine: the snapshot read by `get_active()` / `get_groups()`
+stays consistent with the engine while several threads change the managed set.
+"""
+import random
+import threading
+
+from cpulimiter import CpuLimiter
+
+from conftest import FAKE_PID
+
+PIDS = range(FAKE_PID, FAKE_PID + 200)
+
+
+def test_reads_see_every_finished_change(engine):
+    limiter = CpuLimiter(engine=engine)
+    limiter.add(pid=FAKE_PID, limit_percentage=50)
+    limiter.start(pid=FAKE_PID)
+    assert [info['limit_percentage'] for info in limiter.get_active()] == [50]
+
+    limiter.modify_limit(pid=FAKE_PID, new_limit_percentage=80)
+    assert [info['limit_percentage'] for info in limiter.get_active()] == [80]
+    limiter.stop(pid=FAKE_PID)
+    assert limiter.get_active() == []
+
+
+class _CountingDict(dict):
+    """Counts full walks over the managed entries (copying a dict subclass goes through `keys()`)."""
+    walks = 0
+
+    def __iter__(self): _CountingDict.walks += 1; return super().__iter__()
+    def keys(self): _CountingDict.walks += 1; return super().keys()
+    def items(self): _CountingDict.walks += 1; return super().items()
+    def values(self): _CountingDict.walks += 1; return super().values()
+
+
+def test_writes_never_walk_the_managed_set(engine):
+    limiter = CpuLimiter(engine=engine)
+    for pid in PIDS: limiter.add(pid=pid, limit_percentage=50)
+    limiter.start_all()
+    limiter._process_info = _CountingDict(limiter._process_info)
+    _CountingDict.walks = 0
+    for _ in range(10):
+        limiter.stop(pid=FAKE_PID)
+        limiter.start(pid=FAKE_PID)
+        limiter.modify_limit(pid=FAKE_PID, new_limit_percentage=60)
+    assert _CountingDict.walks == 0  # Each write is O(1)...
+    assert len(limiter.get_active()) == len(PIDS)
+    assert _CountingDict.walks == 1  # ...and the first read after them rebuilds the snapshot once,
+    limiter.get_active()
+    assert _CountingDict.walks == 1  # which later reads share.
+
+
+def test_snapshot_is_consistent_under_concurrent_writers(engine):
+    limiter = CpuLimiter(engine=engine)
+    stop, errors = threading.Event(), []
+
+    def write(seed):
+        rng = random.Random(seed)
+        while not stop.is_set():
+            pid, action = rng.choice(PIDS), rng.randrange(5)
+            if action == 0: limiter.add(pid=pid, limit_percentage=rng.randrange(10, 95))
+            elif action == 1: limiter.modify_limit(pid=pid, new_limit_percentage=rng.randrange(10, 95))
+            elif action == 2: limiter.stop(pid=pid)
+            elif action == 3: limiter.start(pid=pid)
+            else: limiter.remove(pid=pid)
+
+    def read():
+        while not stop.is_set():
+            try:
+                active = limiter.get_active()
+                pids = [info['pid'] for info in active]
+                assert len(pids) == len(set(pids))
+                assert all(10 <= info['limit_percentage'] < 95 for info in active)
+            except Exception as e:
+                errors.append(e)
+                return
+
+    threads = [threading.Thread(target=write, args=(i,)) for i in range(4)] + [threading.Thread(target=read) for _ in range(4)]
+    for t in threads: t.start()
+    stop.wait(1.0)
+    stop.set()
+    for t in threads: t.join()
+
+    assert errors == []
+    assert {info['pid'] for info in limiter.get_active()} == set(engine.get_managed_pids())
+    assert {info['pid']: info['limit_percentage'] for info in limiter.get_active()} == {pid: limit for pid, (limit, _) in engine.managed.items()}
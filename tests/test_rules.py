@@ -0,0 +1,109 @@
+"""
+Rules end to end: `add_rule` / `update_rule` / `remove_rule` on a `CpuLimiter` with a recording
+engine, while the real rule watcher scans a fake process table.
+"""
+import queue
+
+import pytest
+
+from cpulimiter import CpuLimiter
+from cpulimiter.rules import Rule
+
+TIMEOUT = 2.0
+
+
+@pytest.fixture
+def limiter(engine, process_table):
+    limiter = CpuLimiter(engine=engine)
+    yield limiter
+    limiter.shutdown()  # Leaves the watcher thread idle, before the real process table is back.
+
+
+@pytest.fixture
+def events(limiter):
+    received = queue.Queue()
+    limiter.add_listener(received.put)
+    return received
+
+
+def _add_rule(limiter, *args, **kwargs):
+    rule = limiter.add_rule(*args, **kwargs)
+    limiter._rule_watcher.interval = 0.01
+    return rule
+
+
+def _attached(pid, rule):
+    return ("attached", pid, rule)
+
+
+def _next(events, kind):
+    while True:
+        event = events.get(timeout=TIMEOUT)
+        if event.kind == kind: return event
+
+
+@pytest.mark.parametrize("rule, matching, other", [
+    (Rule(process_name="ffmpeg*"), ("FFmpeg.exe", ""), ("ffprobe", "")),
+    (Rule(cmdline="*celery*worker*"), ("python", "python -m celery worker -c 4"), ("python", "python -m celery beat")),
+    (Rule(cmdline=r"--jobs[= ]\d{2,}", regex=True), ("make", "make --jobs=16"), ("make", "make --jobs 8")),
+    (Rule(process_name="python*", cmdline="*worker*"), ("python3", "python3 worker.py"), ("node", "node worker.js")),
+    (Rule(process_name="chrome*", exclude=["Chrome_Helper"]), ("chrome", ""), ("chrome_helper", "")),
+])
+def test_rule_patterns(rule, matching, other):
+    assert rule.matches(matching[0], lambda: matching[1])
+    assert not rule.matches(other[0], lambda: other[1])
+
+
+def test_running_and_new_processes_attach(limiter, engine, process_table, events):
+    running = process_table.spawn("encoder")
+    process_table.spawn("editor")
+    rule = _add_rule(limiter, process_name="encoder", limit_percentage=70, period_ms=50)
+    assert _next(events, "attached") == _attached(running, rule)
+
+    started = process_table.spawn("encoder")
+    assert _next(events, "attached") == _attached(started, rule)
+    assert engine.managed == {running: (70, 50), started: (70, 50)}
+    assert {info['pid'] for info in limiter.get_active()} == {running, started}
+
+
+def test_exit_event_fires_and_releases(limiter, engine, process_table, events):
+    pid = process_table.spawn("encoder")
+    rule = _add_rule(limiter, process_name="encoder", limit_percentage=70)
+    _next(events, "attached")
+    process_table.kill(pid)
+    assert _next(events, "exited") == ("exited", pid, rule)
+    assert engine.managed == {}
+    assert limiter.get_active() == []
+
+
+def test_update_rule_changes_limits_in_place(limiter, engine, process_table, events):
+    pid = process_table.spawn("encoder")
+    rule = _add_rule(limiter, process_name="encoder", limit_percentage=70, period_ms=50)
+    _next(events, "attached")
+    limiter.update_rule(rule, limit_percentage=40)
+    assert engine.managed == {pid: (40, 50)}  # The period was left alone
+    assert [info['limit_percentage'] for info in limiter.get_active()] == [40]
+
+
+def test_update_rule_releases_newly_excluded_processes(limiter, engine, process_table, events):
+    kept, excluded = process_table.spawn("chrome"), process_table.spawn("chrome_gpu")
+    rule = _add_rule(limiter, process_name="chrome*", limit_percentage=50)
+    for _ in range(2): _next(events, "attached")
+    limiter.update_rule(rule, exclude=["Chrome_GPU"])
+    assert set(engine.managed) == {kept}
+    assert {info['pid'] for info in limiter.get_active()} == {kept}
+
+    limiter.update_rule(rule, exclude=[])  # No longer excluded: claimed again on the next scan
+    assert _next(events, "attached") == _attached(excluded, rule)
+    assert set(engine.managed) == {kept, excluded}
+
+
+def test_remove_rule_releases_what_it_attached(limiter, engine, process_table, events):
+    process_table.spawn("encoder")
+    rule = _add_rule(limiter, process_name="encoder")
+    _next(events, "attached")
+    limiter.remove_rule(rule)
+    assert engine.managed == {}
+    assert limiter.get_rules() == []
+    with pytest.raises(ValueError):
+        limiter.update_rule(rule, limit_percentage=10)
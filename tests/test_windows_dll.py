@@ -0,0 +1,75 @@
+"""
+Smoke test of the real `limiter_engine.dll`, run on Windows before a rebuilt DLL is shipped.
+Every call the loaded DLL exports is exercised against busy child processes; calls it
+doesn't export are skipped (`WindowsEngine` uses its Python fallbacks for those).
+"""
+import subprocess
+import sys
+import time
+
+import pytest
+
+pytestmark = pytest.mark.skipif(sys.platform != "win32", reason="loads limiter_engine.dll")
+
+BUSY = [sys.executable, "-c", "while True: pass"]
+
+
+@pytest.fixture
+def engine():
+    from cpulimiter.backends.windows import WindowsEngine
+    engine = WindowsEngine()
+    yield engine
+    engine.shutdown()
+
+
+@pytest.fixture
+def busy():
+    procs = [subprocess.Popen(BUSY) for _ in range(4)]
+    yield [proc.pid for proc in procs]
+    for proc in procs: proc.kill(); proc.wait()
+
+
+def _wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline: return False
+        time.sleep(0.05)
+    return True
+
+
+def test_add_modify_remove(engine, busy):
+    engine.add_process(busy[0], 50)
+    assert _wait_for(lambda: busy[0] in engine.get_managed_pids())
+    engine.modify_process_limit(busy[0], 80)
+    engine.remove_process(busy[0])
+    assert _wait_for(lambda: busy[0] not in engine.get_managed_pids())
+
+
+def test_batch_calls(engine, busy):
+    if not engine._has_batch_api: pytest.skip("the DLL has no batch calls")
+    engine.add_many([(pid, 50) for pid in busy])
+    assert _wait_for(lambda: set(busy) <= set(engine.get_managed_pids()))
+    engine.modify_many([(pid, 70) for pid in busy])
+    engine.remove_many(busy)
+    assert _wait_for(lambda: not set(busy) & set(engine.get_managed_pids()))
+
+
+def test_stats_follow_the_limit_and_period(engine, busy):
+    if not (engine._has_stats_api and engine._has_period_api): pytest.skip("the DLL has no stats or period calls")
+    engine.add_process(busy[0], 50, period_ms=100)
+    time.sleep(2.0)
+    stats = {s.pid: s for s in engine.get_process_stats()}[busy[0]]
+    assert stats.period_ms == 100 and stats.cycles >= 15
+    assert stats.measured_duty == pytest.approx(0.5, abs=0.1)
+    assert engine.get_engine_stats().managed == 1
+
+
+def test_group_members_are_switched_together(engine, busy):
+    if not (engine._has_group_api and engine._has_stats_api): pytest.skip("the DLL has no group or stats calls")
+    engine.add_group("smoke", busy[:2], 50, 100)
+    engine.add_many([(pid, 50, 100) for pid in busy[2:]])
+    time.sleep(1.0)
+    stats = {s.pid: s for s in engine.get_process_stats()}
+    # Members share their last state change; the staggered processes don't.
+    assert abs(stats[busy[0]].since_last_change_s - stats[busy[1]].since_last_change_s) < 0.005
+    assert abs(stats[busy[2]].since_last_change_s - stats[busy[3]].since_last_change_s) > 0.005
@@ -0,0 +1,71 @@
+"""
+`WindowsEngine` against a fake DLL that records the calls it gets: group members are added
+in one shared phase when the DLL can do it, and one by one otherwise.
+"""
+import atexit
+
+import pytest
+
+from cpulimiter.backends import Engine
+from cpulimiter.backends.windows import WindowsEngine
+
+OLD_EXPORTS = ("StartLimiter", "StopLimiter", "AddProcess", "RemoveProcess", "ModifyProcessLimit", "GetManagedPids")
+BATCH_EXPORTS = ("AddProcesses", "ModifyProcessLimits", "RemoveProcesses")
+GROUP_EXPORTS = ("ReservePhase", "AddProcessesInPhase")
+
+
+class _Export:
+    def __init__(self, dll, name):
+        self.dll, self.name = dll, name
+
+    def __call__(self, *args):
+        self.dll.calls.append((self.name,) + tuple(list(arg) if hasattr(arg, "_length_") else arg for arg in args))  # Arrays as lists
+        return 0.25 if self.name == "ReservePhase" else 0
+
+
+class _FakeDll:
+    def __init__(self, exports):
+        self.calls = []
+        for name in exports: setattr(self, name, _Export(self, name))
+
+
+def _engine(exports, monkeypatch):
+    monkeypatch.setattr(atexit, "register", lambda func: None)
+    engine = WindowsEngine.__new__(WindowsEngine)  # Skips loading the real DLL
+    Engine.__init__(engine)
+    engine.dll = _FakeDll(exports)
+    engine._configure_functions()
+    engine._started = False
+    return engine
+
+
+def test_group_members_share_one_phase(monkeypatch):
+    engine = _engine(OLD_EXPORTS + BATCH_EXPORTS + GROUP_EXPORTS, monkeypatch)
+    engine.add_group("build", [11, 12], 40)
+    engine.set_group_members("build", [12, 13])
+    assert engine.dll.calls == [
+        ("StartLimiter",),
+        ("ReservePhase",),
+        ("AddProcessesInPhase", [11, 12], [40, 40], [0.0, 0.0], 2, 0.25),
+        ("RemoveProcesses", [11], 1),
+        ("AddProcessesInPhase", [13], [40], [0.0], 1, 0.25),  # A joining member gets the group's phase too
+    ]
+
+
+@pytest.mark.parametrize("exports", [OLD_EXPORTS, OLD_EXPORTS + BATCH_EXPORTS])
+def test_groups_fall_back_to_one_cycle_per_member(monkeypatch, exports):
+    engine = _engine(exports, monkeypatch)
+    engine.add_group("build", [11], 40)
+    assert ("ReservePhase",) not in engine.dll.calls
+    assert engine.dll.calls[-1] in (("AddProcess", 11, 40), ("AddProcesses", [11], [40], [0.0], 1))
+    assert engine._groups["build"]["pids"] == {11}
+
+
+def test_old_dll_uses_the_python_fallbacks(monkeypatch):
+    engine = _engine(OLD_EXPORTS, monkeypatch)
+    engine.set_default_period(100)
+    engine.add_many([(11, 50, 100)])
+    engine.modify_many([(11, 60)])
+    engine.remove_many([11])
+    assert engine.dll.calls == [("StartLimiter",), ("AddProcess", 11, 50), ("ModifyProcessLimit", 11, 60), ("RemoveProcess", 11)]
+    assert engine.get_process_stats() == [] and engine.get_engine_stats() is None